@@ -0,0 +1,93 @@
+# coding:utf-8
+
+"""Benchmark building a collision grid from tile properties
+
+Compares resolving every cell through get_tiledtile_by_gid and
+reading its properties, as before, with build_collision_grid.
+
+    python benchmarks/bench_collision.py [width] [height]
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer
+from tmx.collision import build_collision_grid, tile_property
+from tmx.tmx import get_numpy
+
+
+def make_map(path, width, height, tiles = 256):
+    """write a map with a csv layer, one tile in four has solid=true
+    """
+    random.seed(0)
+    out = ['<?xml version="1.0" encoding="UTF-8"?>',
+           '<map version="1.0" orientation="orthogonal" renderorder="right-down" '
+           'width="%d" height="%d" tilewidth="32" tileheight="32">' % (width, height),
+           ' <tileset firstgid="1" name="base" tilewidth="32" tileheight="32" tilecount="%d" columns="16">' % tiles]
+    for i in range(tiles):
+        out.append('  <tile id="%d"><properties><property name="solid" type="bool" value="%s"/>'
+                   '</properties></tile>' % (i, "true" if i % 4 == 0 else "false"))
+    out.append(' </tileset>')
+    out.append(' <layer name="ground" width="%d" height="%d">' % (width, height))
+    out.append('  <data encoding="csv">')
+    rows = []
+    for y in range(height):
+        rows.append(",".join(str(random.randint(0, tiles)) for x in range(width)))
+    out.append(",\n".join(rows))
+    out.append('  </data>')
+    out.append(' </layer>')
+    out.append('</map>')
+    with open(path, "w") as f:
+        f.write("\n".join(out))
+
+
+def legacy_grid(tiledmap):
+    result = []
+    for layer in tiledmap.layers:
+        if not isinstance(layer, TiledLayer):
+            continue
+        grid = layer.data.two_d_data()
+        for y in range(tiledmap.height):
+            for x in range(tiledmap.width):
+                tiledtile = tiledmap.get_tiledtile_by_gid(grid[y, x])
+                solid = False
+                if tiledtile is not None and tiledtile.properties is not None:
+                    for tiledproperty in tiledtile.properties.properties:
+                        if tiledproperty.name == "solid" and tiledproperty.value == "true":
+                            solid = True
+                result.append(solid)
+    return result
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    tempdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tempdir, "collision.tmx")
+        make_map(path, width, height)
+        tiledmap = TiledMap(path)
+        predicate = tile_property("solid")
+        grid = build_collision_grid(tiledmap, predicate)
+        assert grid.count() == sum(legacy_grid(tiledmap))
+        legacy = min(timeit.repeat(lambda: legacy_grid(tiledmap), number = 1, repeat = 1))
+        build = min(timeit.repeat(lambda: build_collision_grid(tiledmap, predicate), number = 1, repeat = 3))
+        cached = min(timeit.repeat(lambda: tiledmap.collision_grid(predicate), number = 1, repeat = 3))
+        dump = grid.dumps()
+        print("map %dx%d, numpy: %s" % (width, height, get_numpy() is not None))
+        print("per cell lookup  : %8.2f ms" % (legacy * 1000))
+        print("collision grid   : %8.2f ms" % (build * 1000))
+        print("cached           : %8.3f ms" % (cached * 1000))
+        print("dumps            : %8d bytes, %d packed" % (len(dump), len(grid.bits)))
+    finally:
+        shutil.rmtree(tempdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# coding:utf-8
+
+"""Benchmark csv layer data decoding and encoding
+
+Compares the per cell list comprehensions used before
+with csv_to_gids/gids_to_csv on a random layer.
+
+    python benchmarks/bench_csv.py [width] [height]
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx.tmx import csv_to_gids, gids_to_csv, get_numpy
+
+
+def legacy_decode(text):
+    return [int(i) for i in text.strip().split(",")]
+
+
+def legacy_encode(data, width, height):
+    return "\n".join([",".join([str(data[y * width + x]) for x in range(width)])
+                      for y in range(height)])
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    random.seed(0)
+    tiles = [0] + [random.randint(1, 512) for i in range(63)] + [0x80000005, 0x40000011]
+    gids = [random.choice(tiles) for i in range(width * height)]
+    text = gids_to_csv(gids, width)
+    legacytext = text.replace(",\n", ",")
+    assert csv_to_gids(text, len(gids)) == legacy_decode(legacytext) == gids
+
+    number = 3
+    def best(func):
+        return min(timeit.repeat(func, number = number, repeat = 3)) / number
+    print("layer %dx%d, numpy: %s" % (width, height, get_numpy() is not None))
+    print("decode legacy    : %8.2f ms" % (best(lambda: legacy_decode(legacytext)) * 1000))
+    print("csv_to_gids      : %8.2f ms" % (best(lambda: csv_to_gids(text, len(gids))) * 1000))
+    print("encode legacy    : %8.2f ms" % (best(lambda: legacy_encode(gids, width, height)) * 1000))
+    print("gids_to_csv      : %8.2f ms" % (best(lambda: gids_to_csv(gids, width)) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# coding:utf-8
+
+"""Benchmark base64 tile-data decoding
+
+Compares the old per-byte decode loop with tmx.gids_from_bytes on
+a zlib compressed layer.
+
+    python benchmarks/bench_decode.py [width] [height]
+"""
+
+import os
+import sys
+import base64
+import random
+import struct
+import timeit
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import six
+from tmx.tmx import gids_from_bytes, get_numpy
+
+
+def legacy_decode(data):
+    if six.PY2:
+        ndata = [ord(c) for c in data]
+    else:
+        ndata = [i for i in data]
+    result = []
+    for i in six.moves.range(0, len(ndata), 4):
+        n = (ndata[i]  + ndata[i + 1] * (2 ** 8) +
+             ndata[i + 2] * (2 ** 16) + ndata[i + 3] * (2 ** 24))
+        result.append(n)
+    return result
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    gids = [random.randint(0, 4096) for _ in six.moves.range(width * height)]
+    text = base64.b64encode(zlib.compress(struct.pack("<%dI" % len(gids), *gids)))
+
+    def decode(func):
+        return func(zlib.decompress(base64.b64decode(text)))
+
+    assert decode(legacy_decode) == decode(gids_from_bytes).tolist() == gids
+
+    number = 3
+    legacy = min(timeit.repeat(lambda: decode(legacy_decode), number=number, repeat=3)) / number
+    fast = min(timeit.repeat(lambda: decode(gids_from_bytes), number=number, repeat=3)) / number
+    print("layer %dx%d, numpy: %s" % (width, height, get_numpy() is not None))
+    print("legacy loop      : %8.2f ms" % (legacy * 1000))
+    print("gids_from_bytes  : %8.2f ms" % (fast * 1000))
+    print("speedup          : %8.1fx" % (legacy / fast))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# coding:utf-8
+
+"""Benchmark splitting a layer into tile gids and flip flags
+
+Compares masking every cell in a loop with split_gids and
+join_gids over the layer's uint32 buffer.
+
+    python benchmarks/bench_flags.py [width] [height]
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledGrid, GID_MASK, split_gids, join_gids
+from tmx.tmx import get_numpy
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+    random.seed(0)
+    # one tile in eight flipped
+    grid = TiledGrid(width, height, [random.randint(1, 512) | (random.randint(0, 7) << 29 if random.random() < 0.125 else 0)
+                                     for i in range(width * height)])
+
+    def per_cell():
+        gids = []
+        flags = []
+        for gid in grid.data:
+            gids.append(gid & GID_MASK)
+            flags.append(gid >> 29)
+        return gids, flags
+
+    gids, flags = split_gids(grid.data)
+    assert (gids.tolist(), list(flags)) == per_cell()
+    assert join_gids(gids, flags) == grid.data
+
+    def best(func):
+        return min(timeit.repeat(func, number = 1, repeat = 3))
+
+    print("layer %dx%d, numpy: %s" % (width, height, get_numpy() is not None))
+    print("per cell mask    : %8.2f ms" % (best(per_cell) * 1000))
+    print("split_gids       : %8.2f ms" % (best(lambda: split_gids(grid.data)) * 1000))
+    print("join_gids        : %8.2f ms" % (best(lambda: join_gids(gids, flags)) * 1000))
+
+
+if __name__ == "__main__":
+    main()
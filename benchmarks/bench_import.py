@@ -0,0 +1,80 @@
+# coding:utf-8
+
+"""Benchmark the time it takes to import tmx in a fresh interpreter
+
+Each run starts a new interpreter, the time of an interpreter that
+imports nothing is subtracted. The slowest modules imported by tmx
+are listed with the import time each one took itself.
+
+    python benchmarks/bench_import.py [runs]
+"""
+
+import os
+import sys
+import time
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# run in the child interpreter: time every import made by "import tmx"
+PROFILE = r"""
+import sys, time
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+real_import = builtins.__import__
+stack = []
+times = {}
+def timed_import(name, *args, **kwargs):
+    known = set(sys.modules)
+    stack.append(0.0)
+    start = time.time()
+    try:
+        return real_import(name, *args, **kwargs)
+    finally:
+        elapsed = time.time() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        if name and set(sys.modules) - known:
+            times[name] = times.get(name, 0.0) + elapsed - children
+builtins.__import__ = timed_import
+import tmx
+builtins.__import__ = real_import
+for name, seconds in sorted(times.items(), key = lambda item: -item[1])[:10]:
+    sys.stdout.write("%s %f\n" % (name, seconds))
+"""
+
+
+def run(code, runs):
+    """best wall time of runs fresh interpreters running code
+    """
+    best = None
+    for i in range(runs):
+        start = time.time()
+        subprocess.check_call([sys.executable, "-c", code], cwd = ROOT)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    empty = run("pass", runs)
+    full = run("import tmx", runs)
+    print("python -c pass       %8.2f ms" % (empty * 1000))
+    print("python -c import tmx %8.2f ms" % (full * 1000))
+    print("import tmx           %8.2f ms" % ((full - empty) * 1000))
+    print("self time of the slowest imports:")
+    output = subprocess.check_output([sys.executable, "-c", PROFILE], cwd = ROOT)
+    for line in output.decode("ascii").splitlines():
+        name, seconds = line.rsplit(" ", 1)
+        print("  %-20s %8.2f ms" % (name, float(seconds) * 1000))
+    if sys.version_info >= (3, 7):
+        print("see also: python -X importtime -c \"import tmx\"")
+
+
+if __name__ == "__main__":
+    main()
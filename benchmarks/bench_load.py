@@ -0,0 +1,80 @@
+# coding:utf-8
+
+"""Benchmark loading the same map from .tmx and from .json
+
+Each .tmx file given (or a generated one) is written as JSON with
+plain array data and with base64/zlib data, then every variant
+is loaded a few times.
+
+    python benchmarks/bench_load.py [file.tmx ...]
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap
+
+
+def make_map(path, width = 256, height = 256, layers = 4, objects = 5000):
+    """write a csv encoded map with an object group to path
+    """
+    random.seed(0)
+    out = ['<?xml version="1.0" encoding="UTF-8"?>',
+           '<map version="1.0" orientation="orthogonal" renderorder="right-down" '
+           'width="%d" height="%d" tilewidth="32" tileheight="32" nextobjectid="%d">'
+           % (width, height, objects + 1),
+           ' <tileset firstgid="1" name="base" tilewidth="32" tileheight="32" tilecount="256" columns="16">',
+           '  <image source="base.png" width="512" height="512"/>',
+           ' </tileset>']
+    for i in range(layers):
+        rows = [",".join(str(random.randint(0, 256)) for x in range(width)) for y in range(height)]
+        out.append(' <layer name="layer%d" width="%d" height="%d">' % (i, width, height))
+        out.append('  <data encoding="csv">\n' + ",\n".join(rows) + '\n</data>')
+        out.append(' </layer>')
+    out.append(' <objectgroup name="objects">')
+    for i in range(objects):
+        out.append('  <object id="%d" x="%d" y="%d" width="32" height="32"/>'
+                   % (i + 1, random.randint(0, width * 32), random.randint(0, height * 32)))
+    out.append(' </objectgroup>')
+    out.append('</map>')
+    with open(path, "w") as f:
+        f.write("\n".join(out))
+
+
+def main():
+    tempdir = tempfile.mkdtemp()
+    try:
+        sources = sys.argv[1:]
+        if not sources:
+            sources = [os.path.join(tempdir, "generated.tmx")]
+            make_map(sources[0])
+        for source in sources:
+            base = os.path.join(os.path.dirname(os.path.abspath(source)),
+                                "_bench_" + os.path.splitext(os.path.basename(source))[0])
+            variants = [("tmx", source, None, None),
+                        ("json array", base + "_array.json", "csv", None),
+                        ("json base64+zlib", base + "_zlib.json", "base64", "zlib")]
+            print("%s" % source)
+            try:
+                for name, path, encoding, compression in variants:
+                    if path != source and not TiledMap.write_tmx_json(TiledMap(source), path,
+                                                                      encoding, compression):
+                        raise IOError("failed to write %s" % path)
+                    seconds = min(timeit.repeat(lambda: TiledMap(path), number = 1, repeat = 3))
+                    print("  %-18s %8.2f ms  %10d bytes" % (name, seconds * 1000, os.path.getsize(path)))
+            finally:
+                for name, path, encoding, compression in variants:
+                    if path != source and os.path.exists(path):
+                        os.remove(path)
+    finally:
+        shutil.rmtree(tempdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# coding:utf-8
+
+"""Benchmark the memory of the object dense model classes
+
+Loads a generated (or given) .tmx file and reports, per class,
+the bytes an instance takes with __slots__ and the bytes the same
+attributes take in an instance __dict__, as the classes used before.
+Attribute values are shared by both layouts and not counted.
+
+    python benchmarks/bench_memory.py [file.tmx ...]
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledObject, TiledProperty, TiledFrame, TiledTile
+
+
+CLASSES = [TiledObject, TiledProperty, TiledFrame, TiledTile]
+
+
+def make_map(path, width = 64, height = 64, objects = 50000, tiles = 256):
+    """write a map with an xml layer, animated tiles
+    and objects carrying properties to path
+    """
+    random.seed(0)
+    out = ['<?xml version="1.0" encoding="UTF-8"?>',
+           '<map version="1.0" orientation="orthogonal" renderorder="right-down" '
+           'width="%d" height="%d" tilewidth="32" tileheight="32" nextobjectid="%d">'
+           % (width, height, objects + 1),
+           ' <tileset firstgid="1" name="base" tilewidth="32" tileheight="32" tilecount="%d" columns="16">' % tiles,
+           '  <image source="base.png" width="512" height="512"/>']
+    for i in range(tiles):
+        out.append('  <tile id="%d">' % i)
+        out.append('   <properties><property name="solid" type="bool" value="true"/></properties>')
+        out.append('   <animation><frame tileid="%d" duration="100"/><frame tileid="%d" duration="100"/></animation>'
+                   % (i, (i + 1) % tiles))
+        out.append('  </tile>')
+    out.append(' </tileset>')
+    out.append(' <layer name="ground" width="%d" height="%d">' % (width, height))
+    out.append('  <data>')
+    for i in range(width * height):
+        out.append('   <tile gid="%d"/>' % random.randint(0, tiles))
+    out.append('  </data>')
+    out.append(' </layer>')
+    out.append(' <objectgroup name="objects">')
+    for i in range(objects):
+        out.append('  <object id="%d" name="o%d" x="%d" y="%d" width="32" height="32">'
+                   % (i + 1, i, random.randint(0, width * 32), random.randint(0, height * 32)))
+        out.append('   <properties><property name="hp" type="int" value="%d"/></properties>'
+                   % random.randint(1, 100))
+        out.append('  </object>')
+    out.append(' </objectgroup>')
+    out.append('</map>')
+    with open(path, "w") as f:
+        f.write("\n".join(out))
+
+
+def slot_names(cls):
+    """attribute names stored in the __slots__ of cls and its bases,
+    private names mangled as python does
+    """
+    names = []
+    for klass in cls.__mro__:
+        for name in klass.__dict__.get("__slots__", ()):
+            if name.startswith("__") and not name.endswith("__"):
+                name = "_%s%s" % (klass.__name__.lstrip("_"), name)
+            names.append(name)
+    return names
+
+
+class DictObject(object):
+    pass
+
+
+def dict_size(names):
+    """bytes of an instance keeping names in its __dict__
+    """
+    instance = DictObject()
+    for name in names:
+        setattr(instance, name, None)
+    return sys.getsizeof(instance) + sys.getsizeof(instance.__dict__)
+
+
+def walk(tiledmap):
+    """yield the instances of CLASSES in tiledmap
+    """
+    def properties(owner):
+        if owner.properties is not None and owner.properties.properties:
+            for tiledproperty in owner.properties.properties:
+                yield tiledproperty
+    for tileset in tiledmap.tilesets or []:
+        for tile in tileset.tiles or []:
+            yield tile
+            for tiledproperty in properties(tile):
+                yield tiledproperty
+            if tile.animation is not None:
+                for frame in tile.animation.frames or []:
+                    yield frame
+    for layer in tiledmap.layers or []:
+        for tiledobject in getattr(layer, "objects", None) or []:
+            yield tiledobject
+            for tiledproperty in properties(tiledobject):
+                yield tiledproperty
+
+
+def main():
+    tempdir = tempfile.mkdtemp()
+    try:
+        sources = sys.argv[1:]
+        if not sources:
+            sources = [os.path.join(tempdir, "generated.tmx")]
+            make_map(sources[0])
+        for source in sources:
+            tiledmap = TiledMap(source)
+            counts = defaultdict(int)
+            slotted = defaultdict(int)
+            for instance in walk(tiledmap):
+                counts[type(instance)] += 1
+                slotted[type(instance)] += sys.getsizeof(instance)
+                if instance._extra is not None:
+                    slotted[type(instance)] += sys.getsizeof(instance._extra)
+            print("%s" % source)
+            print("  %-16s %9s %14s %14s" % ("class", "instances", "dict bytes/obj", "slots bytes/obj"))
+            for cls in CLASSES:
+                if not counts[cls]:
+                    continue
+                names = [name for name in slot_names(cls) if name != "_extra"]
+                print("  %-16s %9d %14d %14.1f" % (cls.__name__, counts[cls], dict_size(names),
+                                                   slotted[cls] / float(counts[cls])))
+    finally:
+        shutil.rmtree(tempdir)
+
+
+if __name__ == "__main__":
+    main()
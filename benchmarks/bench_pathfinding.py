@@ -0,0 +1,89 @@
+# coding:utf-8
+
+"""Benchmark paths over a maze shaped collision grid
+
+Compares A* with 4 and 8 way moves, jump point search, and the
+component label check that rejects unreachable goals up front.
+
+    python benchmarks/bench_pathfinding.py [size]
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx.pathfinding import PathFinder
+
+
+def make_maze(size, openings = 0.1):
+    """blocked cells of a size x size maze, a random backtracker
+    with a share of the walls knocked down so paths have choices
+    """
+    random.seed(0)
+    size |= 1
+    blocked = bytearray([1]) * (size * size)
+    blocked[size + 1] = 0
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        choices = [(dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 < x + dx < size - 1 and 0 < y + dy < size - 1
+                   and blocked[(y + dy) * size + x + dx]]
+        if not choices:
+            stack.pop()
+            continue
+        dx, dy = random.choice(choices)
+        blocked[(y + dy // 2) * size + x + dx // 2] = 0
+        blocked[(y + dy) * size + x + dx] = 0
+        stack.append((x + dx, y + dy))
+    for i in range(int(size * size * openings)):
+        x = random.randint(1, size - 2)
+        y = random.randint(1, size - 2)
+        blocked[y * size + x] = 0
+    return size, blocked
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    size, blocked = make_maze(size)
+    finder = PathFinder(size, size, blocked)
+    labels = min(timeit.repeat(lambda: PathFinder(size, size, blocked).components(),
+                               number = 1, repeat = 3))
+    cells = [(x, y) for y in range(size) for x in range(size) if not blocked[y * size + x]]
+    pairs = [(random.choice(cells), random.choice(cells)) for i in range(20)]
+
+    def run(diagonal, jump):
+        for start, goal in pairs:
+            finder.find_path(start, goal, diagonal, jump)
+
+    for start, goal in pairs:
+        astar = finder.path_cost(finder.find_path(start, goal, True, False))
+        jps = finder.path_cost(finder.find_path(start, goal, True, True))
+        assert abs(astar - jps) < 1e-9
+
+    # a walled in cell, found unreachable without a search
+    walled = bytearray(blocked)
+    for x, y in ((size - 3, size - 2), (size - 2, size - 3), (size - 3, size - 3)):
+        walled[y * size + x] = 1
+    walled[(size - 2) * size + size - 2] = 0
+    closed = PathFinder(size, size, walled)
+    closed.components()
+    unreachable = min(timeit.repeat(lambda: closed.find_path((1, 1), (size - 2, size - 2)),
+                                    number = 100, repeat = 3)) / 100
+
+    def best(func):
+        return min(timeit.repeat(func, number = 1, repeat = 3)) / len(pairs)
+
+    print("maze %dx%d, %d open cells" % (size, size, len(cells)))
+    print("A* 4 way         : %8.2f ms/path" % (best(lambda: run(False, False)) * 1000))
+    print("A* 8 way         : %8.2f ms/path" % (best(lambda: run(True, False)) * 1000))
+    print("jump point search: %8.2f ms/path" % (best(lambda: run(True, True)) * 1000))
+    print("unreachable goal : %8.4f ms" % (unreachable * 1000))
+    print("component labels : %8.2f ms" % (labels * 1000))
+
+
+if __name__ == "__main__":
+    main()
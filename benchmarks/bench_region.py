@@ -0,0 +1,59 @@
+# coding:utf-8
+
+"""Benchmark reading viewport sized regions of a layer
+
+Compares copying the whole grid per chunk, as before, with
+TiledGrid.get_region and a TiledGridView over the buffer.
+
+    python benchmarks/bench_region.py [width] [height]
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledGrid
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+    random.seed(0)
+    grid = TiledGrid(width, height, [random.randint(0, 512) for i in range(width * height)])
+    chunkwidth, chunkheight = 40, 24
+    chunks = [(random.randint(0, width - chunkwidth), random.randint(0, height - chunkheight))
+              for i in range(200)]
+
+    def full_copy():
+        for x, y in chunks[:5]:
+            rows = grid.tolist()
+            [row[x:x + chunkwidth] for row in rows[y:y + chunkheight]]
+
+    def region():
+        for x, y in chunks:
+            grid.get_region(x, y, chunkwidth, chunkheight)
+
+    def view():
+        for x, y in chunks:
+            grid.view(x, y, chunkwidth, chunkheight).tolist()
+
+    def blit():
+        target = TiledGrid(chunkwidth, chunkheight)
+        for x, y in chunks:
+            target.blit(grid, 0, 0, x, y)
+
+    def best(func, count):
+        return min(timeit.repeat(func, number = 1, repeat = 3)) / count
+
+    print("layer %dx%d, chunks of %dx%d" % (width, height, chunkwidth, chunkheight))
+    print("whole grid copy  : %8.3f ms/chunk" % (best(full_copy, 5) * 1000))
+    print("get_region       : %8.3f ms/chunk" % (best(region, len(chunks)) * 1000))
+    print("view().tolist()  : %8.3f ms/chunk" % (best(view, len(chunks)) * 1000))
+    print("blit             : %8.3f ms/chunk" % (best(blit, len(chunks)) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# coding:utf-8
+
+"""Benchmark area queries on an object group
+
+Compares a loop over TiledObjectgroup.objects with the
+spatial index, on randomly placed and rotated objects.
+
+    python benchmarks/bench_spatial.py [objects] [queries]
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledObjectgroup, TiledObject
+from tmx.spatial import object_bounds
+
+
+def make_group(count, size):
+    random.seed(0)
+    tiledmap = TiledMap()
+    group = TiledObjectgroup(tiledmap, tiledmap)
+    tiledmap.layers = [group]
+    for i in range(count):
+        tiledobject = TiledObject(tiledmap, group)
+        tiledobject.id = i + 1
+        tiledobject.x = random.randint(0, size)
+        tiledobject.y = random.randint(0, size)
+        tiledobject.width = random.randint(8, 96)
+        tiledobject.height = random.randint(8, 96)
+        if i % 4 == 0:
+            tiledobject.rotation = random.uniform(0, 360)
+        group.add_object(tiledobject)
+    return group
+
+
+def linear_query(group, x1, y1, x2, y2):
+    result = []
+    for tiledobject in group.objects:
+        bx1, by1, bx2, by2 = object_bounds(tiledobject)
+        if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+            result.append(tiledobject)
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    size = 32 * 1024
+    group = make_group(count, size)
+    rects = []
+    for i in range(queries):
+        x = random.uniform(0, size)
+        y = random.uniform(0, size)
+        rects.append((x, y, x + 640, y + 480))
+
+    build = min(timeit.repeat(lambda: (group.invalidate_spatial_index(), group.spatial_index()),
+                              number = 1, repeat = 3))
+    linear = timeit.timeit(lambda: [linear_query(group, *rect) for rect in rects[:20]], number = 1) / 20
+    indexed = timeit.timeit(lambda: [group.query_rect(*rect) for rect in rects], number = 1) / queries
+    nearest = timeit.timeit(lambda: [group.nearest(x, y, 8) for x, y, x2, y2 in rects], number = 1) / queries
+    assert set(linear_query(group, *rects[0])) == set(group.query_rect(*rects[0]))
+    print("%d objects, %d queries of 640x480" % (count, queries))
+    print("build index      : %8.2f ms" % (build * 1000))
+    print("linear query     : %8.3f ms  %8.0f /s" % (linear * 1000, 1 / linear))
+    print("query_rect       : %8.3f ms  %8.0f /s" % (indexed * 1000, 1 / indexed))
+    print("nearest, 8       : %8.3f ms  %8.0f /s" % (nearest * 1000, 1 / nearest))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# coding:utf-8
+
+"""Benchmark reading and writing .tmx files with each XML backend
+
+    python benchmarks/bench_xml.py [file.tmx ...]
+
+Without files a map with xml encoded layers and objects is generated.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap
+from tmx.xmlbackend import xml_backends, set_xml_backend
+from bench_load import make_map
+
+
+def main():
+    tempdir = tempfile.mkdtemp()
+    try:
+        sources = sys.argv[1:]
+        if not sources:
+            sources = [os.path.join(tempdir, "generated.tmx")]
+            make_map(sources[0], 128, 128, 2, 20000)
+            TiledMap.write_tmx_xml(TiledMap(sources[0]), sources[0], "xml")
+        target = os.path.join(tempdir, "out.tmx")
+        for source in sources:
+            print("%s" % source)
+            for name in xml_backends:
+                try:
+                    set_xml_backend(name)
+                except ImportError:
+                    print("  %-14s not installed" % name)
+                    continue
+                tiledmap = TiledMap(source)
+                read = min(timeit.repeat(lambda: TiledMap(source), number = 1, repeat = 3))
+                write = min(timeit.repeat(lambda: TiledMap.write_tmx_xml(tiledmap, target),
+                                          number = 1, repeat = 3))
+                print("  %-14s read %8.2f ms  write %8.2f ms" % (name, read * 1000, write * 1000))
+    finally:
+        set_xml_backend()
+        shutil.rmtree(tempdir)
+
+
+if __name__ == "__main__":
+    main()
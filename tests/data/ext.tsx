@@ -0,0 +1,5 @@
+<?xml version="1.0" encoding="UTF-8"?>
+<tileset name="ext" tilewidth="32" tileheight="32" tilecount="4" columns="2">
+ <image source="ext.png" width="64" height="64"/>
+ <tile id="1"><properties><property name="solid" type="bool" value="true"/></properties></tile>
+</tileset>
@@ -0,0 +1,153 @@
+# coding:utf-8
+
+"""Collision grids
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer, TiledObjectgroup
+from tmx.tmx import GID_MASK, _numpy
+from tmx.collision import (CollisionGrid, build_collision_grid, gid_lookup_table, tile_property,
+                           object_cells, pack_cells, unpack_bits)
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+SOLID = tile_property("solid")
+
+
+def random_cells(count):
+    return bytearray(random.randint(0, 1) for i in range(count))
+
+
+class CollisionGridTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(3)
+
+    def test_pack_unpack(self):
+        for count in list(range(0, 20)) + [63, 64, 65, 1000]:
+            cells = random_cells(count)
+            bits = pack_cells(cells)
+            self.assertEqual(len(bits), (count + 7) // 8)
+            self.assertEqual(unpack_bits(bits, count), cells, count)
+        self.assertEqual(pack_cells(bytearray([1, 0, 0, 0, 0, 0, 0, 1, 1])), bytearray([0x81, 0x80]))
+
+    def test_cells(self):
+        cells = random_cells(7 * 5)
+        grid = CollisionGrid.from_cells(7, 5, cells)
+        for y in range(5):
+            for x in range(7):
+                self.assertEqual(grid[y, x], bool(cells[y * 7 + x]))
+                self.assertEqual(grid.blocked(x, y), bool(cells[y * 7 + x]))
+        self.assertEqual(grid.cells(), cells)
+        self.assertEqual(grid.count(), sum(cells))
+        self.assertEqual(grid.tolist(), [[bool(c) for c in cells[y * 7:y * 7 + 7]] for y in range(5)])
+        self.assertTrue(grid.blocked(-1, 0) and grid.blocked(7, 0) and grid.blocked(0, 5))
+        self.assertRaises(IndexError, grid.__getitem__, (5, 0))
+        grid[4, 6] = True
+        self.assertTrue(grid[4, 6])
+        grid[4, 6] = False
+        self.assertFalse(grid[4, 6])
+        self.assertRaises(ValueError, CollisionGrid, 7, 5, bytearray(4))
+
+    def test_or(self):
+        first, second = random_cells(30), random_cells(30)
+        grid = CollisionGrid.from_cells(6, 5, first) | CollisionGrid.from_cells(6, 5, second)
+        self.assertEqual(grid.cells(), bytearray(a | b for a, b in zip(first, second)))
+        self.assertRaises(ValueError, grid.__or__, CollisionGrid(5, 6))
+
+    def test_dumps_loads(self):
+        grid = CollisionGrid.from_cells(13, 9, random_cells(13 * 9))
+        for compression in (None, "zlib", "gzip"):
+            data = grid.dumps(compression)
+            self.assertTrue(data.startswith(CollisionGrid.MAGIC))
+            self.assertEqual(CollisionGrid.loads(data), grid)
+        self.assertNotEqual(CollisionGrid.loads(grid.dumps()), CollisionGrid(13, 9))
+        self.assertRaises(ValueError, CollisionGrid.loads, b"nope")
+
+
+class PureCollisionGridTest(CollisionGridTest):
+    """ the same without numpy
+    """
+    def setUp(self):
+        CollisionGridTest.setUp(self)
+        self.numpy = list(_numpy)
+        _numpy[:] = [None]
+
+    def tearDown(self):
+        _numpy[:] = self.numpy
+
+
+class BuildTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tiledmap = TiledMap(SAMPLE)
+        self.layers = [layer for layer in self.tiledmap.layers if isinstance(layer, TiledLayer)]
+        self.objects = dict((tiledobject.id, tiledobject) for layer in self.tiledmap.layers
+                            if isinstance(layer, TiledObjectgroup) for tiledobject in layer.objects)
+
+    def brute(self, blocked):
+        # any layer's cell blocks when blocked(gid)
+        width = self.tiledmap.width
+        cells = bytearray(width * self.tiledmap.height)
+        for layer in self.layers:
+            for i, gid in enumerate(layer.data.one_d_data()):
+                if blocked(gid & GID_MASK):
+                    cells[i] = 1
+        return cells
+
+    def test_lookup_table(self):
+        table = gid_lookup_table(self.tiledmap, SOLID)
+        # tile 1 of both tilesets
+        self.assertEqual([gid for gid in range(len(table)) if table[gid]], [2, 18])
+
+    def test_tiles(self):
+        grid = build_collision_grid(self.tiledmap, SOLID)
+        self.assertEqual((grid.width, grid.height), (self.tiledmap.width, self.tiledmap.height))
+        self.assertEqual(grid.cells(), self.brute(lambda gid: gid in (2, 18)))
+        self.assertEqual(build_collision_grid(self.tiledmap).cells(), self.brute(bool))
+        self.assertEqual(build_collision_grid(self.tiledmap, SOLID, layers = []).count(), 0)
+
+    def test_objects(self):
+        tilewidth, tileheight = self.tiledmap.tilewidth, self.tiledmap.tileheight
+        width, height = self.tiledmap.width, self.tiledmap.height
+        self.assertEqual(object_cells(self.objects[1], tilewidth, tileheight, width, height), [(0, 1)])
+        self.assertEqual(object_cells(self.objects[4], tilewidth, tileheight, width, height), [])
+        self.assertEqual(object_cells(self.objects[5], tilewidth, tileheight, width, height), [(2, 1)])
+        # a tile object without width and height covers its tile
+        self.assertEqual(object_cells(self.objects[6], tilewidth, tileheight, width, height), [(4, 0)])
+        grid = build_collision_grid(self.tiledmap, layers = [], objectgroups = True,
+                                    objectpredicate = lambda o: o.gid is not None)
+        self.assertEqual(sorted((x, y) for y in range(height) for x in range(width) if grid[y, x]),
+                         [(2, 1), (4, 0)])
+
+    def test_cached(self):
+        grid = self.tiledmap.collision_grid(SOLID)
+        self.assertIs(self.tiledmap.collision_grid(SOLID), grid)
+        self.layers[0].data.fill(0, 0, 1, 1, 2)
+        rebuilt = self.tiledmap.collision_grid(SOLID)
+        self.assertIsNot(rebuilt, grid)
+        self.assertTrue(rebuilt[0, 0])
+
+
+class PureBuildTest(BuildTest):
+    """ the same without numpy
+    """
+    def setUp(self):
+        BuildTest.setUp(self)
+        self.numpy = list(_numpy)
+        _numpy[:] = [None]
+
+    def tearDown(self):
+        _numpy[:] = self.numpy
+
+
+if __name__ == "__main__":
+    unittest.main()
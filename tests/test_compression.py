@@ -0,0 +1,78 @@
+# coding:utf-8
+
+"""Compression codec registry
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer, compressions, register_compression
+from tmx.tmx import compress_data, decompress_data, get_compression, gids_to_bytes
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+DATA = gids_to_bytes(list(range(512)) * 8)
+
+
+class CompressionTest(unittest.TestCase):
+
+    def test_builtin_codecs(self):
+        for name in ("zlib", "gzip", "zstd"):
+            self.assertIn(name, compressions)
+        for name in compressions:
+            if name == "zstd":
+                try:
+                    import zstandard
+                except ImportError:
+                    continue
+            codec = get_compression(name)
+            for level in (None, codec.levels[0], codec.levels[1]):
+                packed = compress_data(DATA, name, level)
+                self.assertEqual(decompress_data(packed, name), DATA, (name, level))
+
+    def test_levels(self):
+        self.assertTrue(len(compress_data(DATA, "zlib", 9)) < len(compress_data(DATA, "zlib", 0)))
+        self.assertRaises(ValueError, compress_data, DATA, "zlib", 10)
+        self.assertRaises(ValueError, compress_data, DATA, "zlib", -1)
+
+    def test_no_compression(self):
+        self.assertIs(compress_data(DATA, None), DATA)
+        self.assertIs(decompress_data(DATA, ""), DATA)
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, get_compression, "lz4")
+        self.assertRaises(ValueError, compress_data, DATA, "lz4")
+        self.assertRaises(ValueError, decompress_data, DATA, "lz4")
+
+
+class RegisterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+        register_compression("reverse", lambda data, level: data[::-1], lambda data: data[::-1], (0, 0))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        del compressions["reverse"]
+
+    def test_custom_codec(self):
+        path = os.path.join(self.tempdir, "out.tmx")
+        TiledMap.write_tmx_xml(TiledMap(SAMPLE), path, "base64", "reverse", raise_errors = True)
+        with open(path, "rb") as f:
+            self.assertIn(b'compression="reverse"', f.read())
+        expected = [layer.data.one_d_data() for layer in TiledMap(SAMPLE).layers
+                    if isinstance(layer, TiledLayer)]
+        self.assertEqual([layer.data.one_d_data() for layer in TiledMap(path).layers
+                          if isinstance(layer, TiledLayer)], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+# coding:utf-8
+
+"""Batch conversion
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer
+from tmx.convert import FORMATS, collect_tmx_files, convert_file, convert_batch
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLE = os.path.join(DATA, "sample.tmx")
+
+
+def layer_gids(tiledmap):
+    return [layer.data.one_d_data() for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+
+
+class ConvertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tempdir, "maps")
+        os.makedirs(os.path.join(self.source, "sub"))
+        for dirname in (self.source, os.path.join(self.source, "sub")):
+            shutil.copy(SAMPLE, dirname)
+            shutil.copy(os.path.join(DATA, "ext.tsx"), dirname)
+        self.outdir = os.path.join(self.tempdir, "out")
+        # the written maps still point at ext.tsx
+        os.makedirs(os.path.join(self.outdir, "sub"))
+        for dirname in (self.outdir, os.path.join(self.outdir, "sub")):
+            shutil.copy(os.path.join(DATA, "ext.tsx"), dirname)
+        self.expected = layer_gids(TiledMap(SAMPLE))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_collect(self):
+        found = collect_tmx_files([self.source, os.path.join(self.source, "*.tmx")])
+        self.assertEqual([os.path.relpath(path, base) for path, base in found],
+                         ["sample.tmx", os.path.join("sub", "sample.tmx"), "sample.tmx"])
+
+    def test_formats(self):
+        for format in sorted(FORMATS):
+            if format == "zstd":
+                try:
+                    import zstandard
+                except ImportError:
+                    continue
+            results = convert_batch([self.source], self.outdir, format, jobs = 1)
+            self.assertEqual([result.error for result in results], [None, None], format)
+            for result in results:
+                self.assertTrue(result.target.startswith(self.outdir))
+                if format == "json":
+                    tiledmap = TiledMap.read_tmx_json(result.target)
+                else:
+                    tiledmap = TiledMap(result.target)
+                self.assertEqual(layer_gids(tiledmap), self.expected, format)
+
+    def test_errors(self):
+        target = os.path.join(self.outdir, "sample.tmx")
+        self.assertRaises(ValueError, convert_file, SAMPLE, target, "yaml")
+        # the write error itself, not a generic one
+        try:
+            convert_file(SAMPLE, target, "zlib", level = 99)
+        except ValueError as e:
+            self.assertIn("99", str(e))
+        else:
+            self.fail("level 99 converted")
+        results = convert_batch([self.source], self.outdir, "zlib", jobs = 1, level = 99)
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertTrue(result.error.startswith("ValueError: Compression level 99"), result.error)
+
+    def test_pool(self):
+        results = convert_batch([self.source], self.outdir, "csv", jobs = 2)
+        self.assertEqual(sorted(os.path.relpath(result.target, self.outdir) for result in results),
+                         sorted(["sample.tmx", os.path.join("sub", "sample.tmx")]))
+        self.assertEqual([result.error for result in results], [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+# coding:utf-8
+
+"""Tile flip flags
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import (TiledMap, TiledLayer, TiledGrid, split_gids, join_gids, GID_MASK,
+                 FLIPPED_HORIZONTALLY_FLAG, FLIPPED_VERTICALLY_FLAG, FLIPPED_DIAGONALLY_FLAG)
+from tmx.tmx import GID_TYPECODE, _numpy
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+ENCODINGS = [("csv", None), ("xml", None), ("base64", None),
+             ("base64", "zlib"), ("base64", "gzip")]
+try:
+    import zstandard
+    ENCODINGS.append(("base64", "zstd"))
+except ImportError:
+    pass
+
+FLAGS = [0, FLIPPED_HORIZONTALLY_FLAG, FLIPPED_VERTICALLY_FLAG, FLIPPED_DIAGONALLY_FLAG,
+         FLIPPED_HORIZONTALLY_FLAG | FLIPPED_DIAGONALLY_FLAG, 0xE0000000]
+
+
+def flipped(gids):
+    return [gid | random.choice(FLAGS) if gid else gid for gid in gids]
+
+
+class SplitJoinTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(5)
+
+    def test_split_join(self):
+        for count in (0, 1, 17, 500):
+            gids = flipped([random.randint(0, 40) for i in range(count)])
+            for source in (gids, TiledGrid(count, 1, gids).data):
+                tiles, flags = split_gids(source)
+                self.assertEqual(tiles.typecode, GID_TYPECODE)
+                self.assertEqual(list(tiles), [gid & GID_MASK for gid in gids])
+                self.assertEqual(list(flags), [gid >> 29 for gid in gids])
+                joined = join_gids(tiles, flags)
+                self.assertEqual(joined.typecode, GID_TYPECODE)
+                self.assertEqual(list(joined), gids)
+
+    def test_no_flags(self):
+        gids = [random.randint(0, 40) for i in range(50)]
+        tiles, flags = split_gids(gids)
+        self.assertEqual(list(tiles), gids)
+        self.assertEqual(flags, bytearray(50))
+        self.assertEqual(list(join_gids(gids, flags)), gids)
+        # flags given with join_gids replace the gid's own
+        self.assertEqual(list(join_gids([0x80000003, 4], [0, 2])), [3, 0x40000004])
+        self.assertRaises(ValueError, join_gids, gids, flags[:-1])
+
+
+class PureSplitJoinTest(SplitJoinTest):
+    """ the same without numpy
+    """
+    def setUp(self):
+        SplitJoinTest.setUp(self)
+        self.numpy = list(_numpy)
+        _numpy[:] = [None]
+
+    def tearDown(self):
+        _numpy[:] = self.numpy
+
+
+class LayerFlagsTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(9)
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+        self.tiledmap = TiledMap(SAMPLE)
+        self.layers = [layer for layer in self.tiledmap.layers if isinstance(layer, TiledLayer)]
+        for layer in self.layers:
+            data = layer.data
+            grid = data.two_d_data()
+            data.set_region(0, 0, TiledGrid(grid.width, grid.height, flipped(grid.data.tolist())))
+        self.expected = [layer.data.one_d_data() for layer in self.layers]
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_lookups(self):
+        data = self.layers[0].data
+        grid = data.two_d_data()
+        for y in range(grid.height):
+            for x in range(grid.width):
+                gid = grid[y, x]
+                self.assertEqual(data.get_flags_position(x, y), gid >> 29)
+                self.assertIs(data.get_tiledtile_position(x, y), self.tiledmap.get_tiledtile_by_gid(gid & GID_MASK))
+                self.assertIs(self.tiledmap.get_tileset_by_gid(gid), self.tiledmap.get_tileset_by_gid(gid & GID_MASK))
+
+    def test_split_join_data(self):
+        data = self.layers[0].data
+        tiles, flags = data.split_data()
+        self.assertEqual(tiles.data.tolist(), [gid & GID_MASK for gid in self.expected[0]])
+        revision = data.revision()
+        data.join_data(tiles, bytearray(len(flags)))
+        self.assertTrue(data.revision() > revision)
+        self.assertEqual(data.one_d_data(), [gid & GID_MASK for gid in self.expected[0]])
+        data.join_data(tiles.data.tolist(), flags)
+        self.assertEqual(data.one_d_data(), self.expected[0])
+
+    def test_write(self):
+        for encoding, compression in ENCODINGS:
+            path = os.path.join(self.tempdir, "out.tmx")
+            TiledMap.write_tmx_xml(self.tiledmap, path, encoding, compression, raise_errors = True)
+            written = [layer.data.one_d_data() for layer in TiledMap(path).layers if isinstance(layer, TiledLayer)]
+            self.assertEqual(written, self.expected, (encoding, compression))
+            if encoding == "xml":
+                continue
+            path = os.path.join(self.tempdir, "out.json")
+            TiledMap.write_tmx_json(self.tiledmap, path, encoding, compression, raise_errors = True)
+            written = [layer.data.one_d_data() for layer in TiledMap.read_tmx_json(path).layers
+                       if isinstance(layer, TiledLayer)]
+            self.assertEqual(written, self.expected, (encoding, compression, "json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
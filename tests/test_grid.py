@@ -0,0 +1,189 @@
+# coding:utf-8
+
+"""TiledGrid storage and region read/write
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer, TiledGrid, TiledGridView
+from tmx.tmx import GID_TYPECODE
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+
+def numbered(width, height):
+    return TiledGrid(width, height, list(range(width * height)))
+
+
+def brute_region(grid, x, y, width, height):
+    return [[grid[j, i] for i in range(x, x + width)] for j in range(y, y + height)]
+
+
+class GridTest(unittest.TestCase):
+
+    def test_packed(self):
+        grid = TiledGrid(3, 2, [1, 2, 3, 0x80000004, 5, 0xFFFFFFFF])
+        self.assertEqual(grid.data.typecode, GID_TYPECODE)
+        self.assertEqual(grid.data.itemsize, 4)
+        self.assertEqual(grid[1, 0], 0x80000004)
+        self.assertEqual(grid[1][2], 0xFFFFFFFF)
+        self.assertEqual(grid.tolist(), [[1, 2, 3], [0x80000004, 5, 0xFFFFFFFF]])
+        grid[0, 1] = 0x40000007
+        self.assertEqual(grid.data[1], 0x40000007)
+        grid[1][0] = 9
+        self.assertEqual(grid.data[3], 9)
+        self.assertEqual(TiledGrid(0, 4).tolist(), [[]] * 4)
+
+    def test_bad_data(self):
+        self.assertRaises(ValueError, TiledGrid, 3, 2, [1, 2, 3])
+        grid = numbered(3, 2)
+        self.assertRaises(IndexError, grid.__getitem__, (2, 0))
+        self.assertRaises(IndexError, grid.__getitem__, (0, 3))
+
+    def test_get_region(self):
+        grid = numbered(7, 5)
+        for x, y, width, height in ((0, 0, 7, 5), (1, 2, 3, 2), (0, 1, 7, 3), (6, 4, 1, 1), (2, 2, 0, 0)):
+            region = grid.get_region(x, y, width, height)
+            self.assertEqual((region.width, region.height), (width, height))
+            self.assertEqual(region.tolist(), brute_region(grid, x, y, width, height))
+        self.assertRaises(IndexError, grid.get_region, 5, 0, 3, 1)
+        self.assertRaises(IndexError, grid.get_region, -1, 0, 1, 1)
+
+    def test_view(self):
+        grid = numbered(7, 5)
+        view = grid.view(2, 1, 3, 2)
+        self.assertTrue(isinstance(view, TiledGridView))
+        self.assertEqual(view.tolist(), brute_region(grid, 2, 1, 3, 2))
+        view[1, 2] = 100
+        self.assertEqual(grid[2, 4], 100)
+        view.fill(7)
+        self.assertEqual(brute_region(grid, 2, 1, 3, 2), [[7] * 3] * 2)
+        self.assertEqual(grid[0, 2], 2)
+        self.assertEqual(view.copy().tolist(), [[7] * 3] * 2)
+
+    def test_set_region_and_fill(self):
+        grid = numbered(6, 4)
+        grid.set_region(1, 1, [[90, 91], [92, 93]])
+        self.assertEqual(brute_region(grid, 1, 1, 2, 2), [[90, 91], [92, 93]])
+        grid.set_region(4, 2, numbered(2, 2))
+        self.assertEqual(brute_region(grid, 4, 2, 2, 2), [[0, 1], [2, 3]])
+        grid.fill(0, 3, 6, 1, 5)
+        self.assertEqual(brute_region(grid, 0, 3, 6, 1), [[5] * 6])
+        self.assertRaises(IndexError, grid.set_region, 5, 0, [[1, 2]])
+
+    def test_blit(self):
+        random.seed(1)
+        for n in range(200):
+            target = numbered(6, 5)
+            source = TiledGrid(4, 3, [random.randint(0, 3) for j in range(12)])
+            x, y = random.randint(-5, 7), random.randint(-4, 6)
+            sx, sy = random.randint(-2, 3), random.randint(-2, 2)
+            skipgid = random.choice((None, 0))
+            # cell by cell, the source from (sx, sy) lands at (x, y)
+            expected = target.tolist()
+            for sj in range(max(sy, 0), source.height):
+                for si in range(max(sx, 0), source.width):
+                    tx, ty = x + si - sx, y + sj - sy
+                    if 0 <= tx < 6 and 0 <= ty < 5 and source[sj, si] != skipgid:
+                        expected[ty][tx] = source[sj, si]
+            target.blit(source, x, y, sx, sy, skipgid = skipgid)
+            self.assertEqual(target.tolist(), expected, (x, y, sx, sy, skipgid))
+
+    def test_blit_overlap(self):
+        grid = numbered(5, 1)
+        self.assertEqual(grid.blit(grid, 1, 0, 0, 0, 4, 1), (1, 0, 4, 1))
+        self.assertEqual(grid.tolist(), [[0, 0, 1, 2, 3]])
+
+
+class LayerRegionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_edit_and_write(self):
+        tiledmap = TiledMap(SAMPLE)
+        layers = [layer for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+        data = layers[0].data
+        revision = data.revision()
+        data.fill(0, 0, 2, 2, 3)
+        data.set_region(6, 4, [[1, 2], [5, 17]])
+        data.blit(layers[1].data, 2, 2, 0, 0, 2, 1)
+        self.assertTrue(data.revision() > revision)
+        expected = data.two_d_data().tolist()
+        self.assertEqual(data.one_d_data(), [gid for row in expected for gid in row])
+        path = os.path.join(self.tempdir, "out.tmx")
+        TiledMap.write_tmx_xml(tiledmap, path, raise_errors = True)
+        written = [layer for layer in TiledMap(path).layers if isinstance(layer, TiledLayer)]
+        self.assertEqual(written[0].data.two_d_data().tolist(), expected)
+        self.assertEqual(written[1].data.one_d_data(), layers[1].data.one_d_data())
+        self.assertEqual(data.get_region(0, 0, 2, 2).tolist(), [[3, 3], [3, 3]])
+
+
+
+class LayerGridTest(unittest.TestCase):
+    """ two_d_data of the layers, gids above 16 bits and flip flags included
+    """
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+        with open(SAMPLE, "rb") as f:
+            text = f.read()
+        # tile 1 of the first tileset flipped horizontally, and a gid out of 16 bits
+        text = text.replace(b"\n0,17,5,1,2,2,3,5,\n", b"\n2147483650,17,5,1,2,2,3,70000,\n", 1)
+        self.path = os.path.join(self.tempdir, "flipped.tmx")
+        with open(self.path, "wb") as f:
+            f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def csv_data(self, tiledmap):
+        return [layer.data for layer in tiledmap.layers
+                if isinstance(layer, TiledLayer) and layer.name == "csv"][0]
+
+    def test_flipped(self):
+        tiledmap = TiledMap(self.path)
+        grid = self.csv_data(tiledmap).two_d_data()
+        self.assertTrue(isinstance(grid, TiledGrid))
+        self.assertEqual((grid.width, grid.height), (8, 6))
+        self.assertEqual(grid[0, 0], 0x80000002)
+        self.assertEqual(grid[0][7], 70000)
+        self.assertEqual(grid[5, 7], 2)
+        tile = self.csv_data(tiledmap).get_tiledtile_position(0, 0)
+        self.assertEqual(tile.id, 1)
+        self.assertIs(tile, tiledmap.get_tiledtile_by_gid(2))
+
+    def test_write_back(self):
+        expected = self.csv_data(TiledMap(self.path)).two_d_data().tolist()
+        path = os.path.join(self.tempdir, "out.tmx")
+        for encoding, compression in (("csv", None), ("xml", None), ("base64", "zlib")):
+            TiledMap.write_tmx_xml(TiledMap(self.path), path, encoding, compression, raise_errors = True)
+            self.assertEqual(self.csv_data(TiledMap(path)).two_d_data().tolist(), expected, encoding)
+
+    def test_rows_share_buffer(self):
+        data = self.csv_data(TiledMap(self.path))
+        grid = data.two_d_data()
+        row = grid[1]
+        row[0] = 0x40000011
+        self.assertEqual(grid[1, 0], 0x40000011)
+        self.assertEqual(grid.data[8], 0x40000011)
+        self.assertEqual(grid[-1].tolist(), [17, 17, 0, 1, 5, 5, 17, 2])
+        data.grid_changed()
+        self.assertEqual(data.one_d_data()[8], 0x40000011)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# coding:utf-8
+
+"""Indenting of the written .tmx
+
+    python -m unittest discover tests
+
+The writers are compared with the recursive indent() they replaced.
+"""
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap
+from tmx.tmx import indent, write_element, PRETTY_INDENTS, COMPACT_INDENTS
+from tmx.ElementTree import Element, SubElement, tostring
+from tmx.xmlbackend import get_xml_backend
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLE = os.path.join(DATA, "sample.tmx")
+
+MODES = [(True, PRETTY_INDENTS, "  ", "\n"), (False, COMPACT_INDENTS, "", "")]
+
+
+def recursive_indent(elem, level = 0, unit = "  ", newline = "\n"):
+    """ the indent() of the first release, with the unit and newline as parameters
+    """
+    i = newline + level * unit
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = i + unit
+        for e in elem:
+            recursive_indent(e, level + 1, unit, newline)
+        if not e.tail or not e.tail.strip():
+            e.tail = i
+    if level and (not elem.tail or not elem.tail.strip()):
+        elem.tail = i
+    return elem
+
+
+def nested_tree(depth):
+    """ a chain of elements depth deep, with siblings, texts and tails on the way
+    """
+    root = Element("map")
+    parent = root
+    for level in range(depth):
+        SubElement(parent, "property", name = "n%d" % level)
+        if level % 3 == 0:
+            SubElement(parent, "data").text = "1,2,\n3"
+        child = SubElement(parent, "group", id = str(level))
+        if level % 5 == 0:
+            child.text = "  \n "
+        if level % 7 == 0:
+            child.tail = "kept"
+        SubElement(parent, "image", source = "a&b.png")
+        parent = child
+    return root
+
+
+class IndentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(DATA, "ext.tsx"), self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_indent(self):
+        for pretty, indents, unit, newline in MODES:
+            expected = tostring(recursive_indent(nested_tree(100), 0, unit, newline))
+            self.assertEqual(tostring(indent(nested_tree(100), indents = indents)), expected, pretty)
+
+    def test_write_element(self):
+        tree = nested_tree(100)
+        for pretty, indents, unit, newline in MODES:
+            expected = tostring(recursive_indent(nested_tree(100), 0, unit, newline))
+            written = []
+            write_element(written.append, tree, indents = indents)
+            self.assertEqual("".join(written), expected, pretty)
+            # the element itself is not changed
+            self.assertIsNone(tree.text)
+
+    def test_deep(self):
+        # deeper than the recursion limit let the old indent and tostring go
+        tree = nested_tree(sys.getrecursionlimit() + 100)
+        written = []
+        write_element(written.append, tree)
+        indented = []
+        write_element(indented.append, indent(tree))
+        self.assertEqual(indented, written)
+        self.assertTrue(written[-1].startswith("</map>"))
+
+    def test_writers(self):
+        tiledmap = TiledMap(SAMPLE)
+        path = os.path.join(self.tempdir, "out.tmx")
+        for pretty, indents, unit, newline in MODES:
+            tiledmap.pretty = pretty
+            tiledmap.unfoldtsx = True
+            element = recursive_indent(tiledmap.write_xml(), 0, unit, newline)
+            get_xml_backend().write(element, path, "utf-8")
+            with io.open(path, "rb") as f:
+                expected = f.read()
+            for streaming in (False, True):
+                TiledMap.write_tmx_xml(tiledmap, path, streaming = streaming, pretty = pretty,
+                                       raise_errors = True)
+                with io.open(path, "rb") as f:
+                    self.assertEqual(f.read(), expected, (pretty, streaming))
+
+
+if __name__ == "__main__":
+    unittest.main()
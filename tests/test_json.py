@@ -0,0 +1,172 @@
+# coding:utf-8
+
+"""JSON map writing and reading
+
+    python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer, TiledObjectgroup, TiledGrid
+from tmx.tmx import GID_TYPECODE, json_data_rows, json_fill_rows, json_check_rows, read_json_value
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+
+def layer_gids(tiledmap):
+    return [layer.data.one_d_data() for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+
+
+def properties(obj):
+    return sorted((p.name, p.type, p.value) for p in obj.properties.properties)
+
+
+def object_properties(tiledmap):
+    return [properties(o) for layer in tiledmap.layers if isinstance(layer, TiledObjectgroup)
+            for o in layer.objects if o.properties is not None]
+
+
+class JsonWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+        self.expected = TiledMap(SAMPLE)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, **kwargs):
+        path = os.path.join(self.tempdir, "out.json")
+        self.assertTrue(TiledMap.write_tmx_json(TiledMap(SAMPLE), path, "csv", raise_errors = True,
+                                                **kwargs))
+        with io.open(path, "rb") as file:
+            return file.read()
+
+    def test_streaming_identical(self):
+        for indent in (None, 4):
+            for sort_keys in (False, True):
+                text = self.write(indent = indent, sort_keys = sort_keys)
+                streamed = self.write(indent = indent, sort_keys = sort_keys, streaming = True)
+                self.assertEqual(streamed, text, (indent, sort_keys))
+                self.assertNotIn(b"tmx-data-", text)
+
+    def test_read_back(self):
+        for indent in (None, 4):
+            for sort_keys in (False, True):
+                for streaming in (False, True):
+                    self.write(indent = indent, sort_keys = sort_keys, streaming = streaming)
+                    tiledmap = TiledMap.read_tmx_json(os.path.join(self.tempdir, "out.json"))
+                    self.assertEqual(layer_gids(tiledmap), layer_gids(self.expected))
+                    self.assertEqual(properties(tiledmap), properties(self.expected))
+
+    def test_row_layout(self):
+        lines = self.write(indent = 4).decode("utf-8").splitlines()
+        start = lines.index(u'            "data": [')
+        rows = lines[start + 1:start + 7]
+        self.assertEqual(rows[0], u"                0,17,5,1,2,2,3,5,")
+        self.assertEqual(rows[-1], u"                17,17,0,1,5,5,17,2")
+        self.assertEqual(lines[start + 7], u"            ],")
+
+    def test_row_layout_compact(self):
+        text = self.write(indent = None).decode("utf-8")
+        self.assertNotIn(u"\n", text)
+        self.assertIn(u'"data":[0,17,5,1,2,2,3,5,0,0,17,', text)
+
+    def test_fill_rows(self):
+        dic = {"layers": [{"type": "tilelayer", "width": 2, "data": [1, 2, 3, 4]}]}
+        datarows = json_data_rows(dic, None)
+        placeholder, = datarows
+        filled = set()
+        # a placeholder inside a larger chunk is put back too
+        self.assertEqual(json_fill_rows('{"data": ' + placeholder + "}", datarows, filled),
+                         '{"data": [1,2,3,4]}')
+        json_check_rows(datarows, filled)
+        self.assertRaises(ValueError, json_check_rows, datarows, set())
+
+
+class JsonReadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, tiledmap, name, *args):
+        path = os.path.join(self.tempdir, name)
+        self.assertTrue(TiledMap.write_tmx_json(tiledmap, path, *args, raise_errors = True))
+        with io.open(path, "rb") as f:
+            return path, f.read()
+
+    def test_round_trip(self):
+        for args in ((), ("csv",), ("base64", "zlib")):
+            path, text = self.write(TiledMap(SAMPLE), "first.json", *args)
+            self.assertEqual(self.write(TiledMap.read_tmx_json(path), "second.json")[1], text, args)
+
+    def test_property_types(self):
+        path, text = self.write(TiledMap(SAMPLE), "out.json")
+        dic = json.loads(text.decode("utf-8"))
+        self.assertEqual(dic["properties"], {"title": "Sample & test", "speed": 1.5})
+        self.assertEqual(dic["propertytypes"], {"title": "string", "speed": "float"})
+        tiledmap = TiledMap.read_tmx_json(path)
+        self.assertEqual(properties(tiledmap), [("speed", "float", "1.5"), ("title", None, "Sample & test")])
+        self.assertEqual(properties(tiledmap.get_tiledtile_by_gid(2)), [("solid", "bool", "true")])
+        expected = TiledMap(SAMPLE)
+        self.assertEqual(object_properties(tiledmap), object_properties(expected))
+        self.assertTrue(object_properties(expected))
+
+    def test_json_values(self):
+        self.assertEqual(read_json_value("width", "12"), 12)
+        self.assertEqual(read_json_value("x", 1.5), 1.5)
+        self.assertEqual(read_json_value("visible", False), 0)
+        self.assertEqual(read_json_value("value", True), "true")
+        # strings of text attributes are kept as they are
+        name = u"caf\xe9"
+        self.assertIs(read_json_value("name", name), name)
+        self.assertIsNone(read_json_value("name", None))
+
+    def test_array_data(self):
+        path = self.write(TiledMap(SAMPLE), "out.json", "csv")[0]
+        for lazy in (False, True):
+            tiledmap = TiledMap.read_tmx_json(path, lazy)
+            for layer in tiledmap.layers:
+                if isinstance(layer, TiledLayer):
+                    grid = layer.data.two_d_data()
+                    self.assertTrue(isinstance(grid, TiledGrid))
+                    self.assertEqual(grid.data.typecode, GID_TYPECODE)
+                    self.assertEqual(layer.data.encoding, "csv")
+            self.assertEqual(layer_gids(tiledmap), layer_gids(TiledMap(SAMPLE)))
+
+    def test_source_data(self):
+        # untouched layers keep their source, a csv one is written as the plain array
+        tiledmap = TiledMap(SAMPLE)
+        layers = [layer for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+        csv = [layer for layer in layers if layer.data.encoding == "csv"][0]
+        self.assertEqual(csv.data.write_json(), {"data": csv.data.one_d_data()})
+        path, text = self.write(tiledmap, "out.json")
+        dic = json.loads(text.decode("utf-8"))
+        written = [layer for layer in dic["layers"] if layer["name"] == csv.name][0]
+        self.assertNotIn("encoding", written)
+        self.assertEqual(layer_gids(TiledMap.read_tmx_json(path)), layer_gids(TiledMap(SAMPLE)))
+
+    def test_base64_data(self):
+        path = self.write(TiledMap(SAMPLE), "out.json", "base64", "gzip")[0]
+        for lazy in (False, True):
+            tiledmap = TiledMap.read_tmx_json(path, lazy)
+            self.assertEqual([layer.data.compression for layer in tiledmap.layers
+                              if isinstance(layer, TiledLayer)], ["gzip"] * 5)
+            self.assertEqual(layer_gids(tiledmap), layer_gids(TiledMap(SAMPLE)))
+
+
+if __name__ == "__main__":
+    unittest.main()
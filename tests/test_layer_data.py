@@ -0,0 +1,171 @@
+# coding:utf-8
+
+"""Layer data decoding and encoding round trips
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import array
+import random
+import struct
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer
+from tmx.tmx import GID_TYPECODE, _numpy, gids_from_bytes, gids_to_bytes, csv_to_gids, gids_to_csv
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+ENCODINGS = [("csv", None), ("xml", None), ("base64", None),
+             ("base64", "zlib"), ("base64", "gzip")]
+try:
+    import zstandard
+    ENCODINGS.append(("base64", "zstd"))
+except ImportError:
+    pass
+
+
+def layer_gids(tiledmap):
+    return [layer.data.one_d_data() for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+
+
+class CodecTest(unittest.TestCase):
+
+    def test_gids_from_bytes(self):
+        gids = [0, 1, 17, 0x1FFFFFFF, 0x80000005, 0xFFFFFFFF]
+        data = gids_from_bytes(gids_to_bytes(gids))
+        self.assertEqual(data.typecode, GID_TYPECODE)
+        self.assertEqual(data.tolist(), gids)
+        self.assertEqual(gids_to_bytes(data), gids_to_bytes(gids))
+
+    def test_gids_to_bytes(self):
+        gids = [0, 1, 17, 0x1FFFFFFF, 0x80000005, 0xFFFFFFFF, 65536]
+        # the bytes the per-gid encoder built, four ints a gid
+        legacy = b"".join(struct.pack("<4B", gid & 0xFF, gid >> 8 & 0xFF, gid >> 16 & 0xFF, gid >> 24)
+                          for gid in gids)
+        self.assertEqual(gids_to_bytes(gids), legacy)
+        self.assertEqual(gids_to_bytes(tuple(gids)), legacy)
+        self.assertEqual(gids_to_bytes(array.array(GID_TYPECODE, gids)), legacy)
+        self.assertEqual(gids_to_bytes(gids_from_bytes(legacy)), legacy)
+        self.assertEqual(gids_to_bytes([]), b"")
+
+    def test_csv(self):
+        gids = [0, 1, 17, 0x80000005, 2, 3]
+        text = gids_to_csv(gids, 3)
+        self.assertEqual(text, "0,1,17,\n2147483653,2,3")
+        self.assertEqual(csv_to_gids(text, len(gids)), gids)
+        self.assertEqual(csv_to_gids(text + ",\n"), gids)
+
+    def test_csv_layout(self):
+        random.seed(2)
+        gids = [random.choice((0, 1, 17, 0x1FFFFFFF, 0xFFFFFFFF, random.randint(0, 5000))) for i in range(600)]
+        for width in (1, 7, 600):
+            text = gids_to_csv(gids, width)
+            self.assertEqual(text.count("\n"), (len(gids) - 1) // width)
+            self.assertEqual(csv_to_gids(text, len(gids)), gids)
+            self.assertTrue(all(type(gid) is int for gid in csv_to_gids(text, len(gids))))
+        # layouts other writers use: spaces, CRLF, no trailing newline
+        self.assertEqual(csv_to_gids(" 1, 2,\r\n 3 ,4\r\n", 4), [1, 2, 3, 4])
+        self.assertEqual(csv_to_gids("\n1,2,\n3,4,\n"), [1, 2, 3, 4])
+        self.assertEqual(csv_to_gids(""), [])
+        self.assertRaises(ValueError, csv_to_gids, "1,x,3", 3)
+
+    def test_csv_malformed(self):
+        # numpy.fromstring would stop at the bad cell and keep the gids before it
+        for text in ("1,2,3,x", "1,2,3,4x", "1,2,0x3", "1,2.5,3", "1,2,\n3,-,4"):
+            self.assertRaises(ValueError, csv_to_gids, text)
+            self.assertRaises(ValueError, csv_to_gids, text, 3)
+        self.assertEqual(csv_to_gids(u"1,2,\n3"), [1, 2, 3])
+        self.assertEqual(csv_to_gids("1,99999999999999999999"), [1, 99999999999999999999])
+
+
+class PureCodecTest(CodecTest):
+    """ the same without numpy
+    """
+    def setUp(self):
+        self.numpy = list(_numpy)
+        _numpy[:] = [None]
+
+    def tearDown(self):
+        _numpy[:] = self.numpy
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        # the sample's external tileset, found next to the written maps
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+        self.expected = layer_gids(TiledMap(SAMPLE))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_layers_agree(self):
+        # every layer of the sample holds the same gids in another encoding
+        for gids in self.expected[1:]:
+            self.assertEqual(gids, self.expected[0])
+
+    def test_one_d_data_ints(self):
+        for gids in self.expected:
+            self.assertTrue(all(type(gid) is int for gid in gids))
+
+    def test_read_modes(self):
+        for kwargs in ({"lazy": True}, {"streaming": True}, {"mapped": True},
+                       {"mapped": True, "lazy": True}):
+            self.assertEqual(layer_gids(TiledMap(SAMPLE, **kwargs)), self.expected, kwargs)
+
+    def test_tmx(self):
+        for encoding, compression in ENCODINGS:
+            for streaming in (False, True):
+                path = os.path.join(self.tempdir, "out.tmx")
+                self.assertTrue(TiledMap.write_tmx_xml(TiledMap(SAMPLE), path, encoding, compression,
+                                                       streaming = streaming, raise_errors = True))
+                self.assertEqual(layer_gids(TiledMap(path)), self.expected, (encoding, compression))
+
+    def test_base64_text(self):
+        # every uncompressed layer re-encoded gives the text of the sample's base64 layer
+        tiledmap = TiledMap(SAMPLE)
+        layers = [layer for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+        source = [layer.data.datasrc().strip() for layer in layers if layer.name == "b64"][0]
+        count = len([layer for layer in layers if layer.data.compression is None])
+        path = os.path.join(self.tempdir, "out.tmx")
+        for streaming in (False, True):
+            TiledMap.write_tmx_xml(tiledmap, path, "base64", streaming = streaming, raise_errors = True)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read().count(source.encode("ascii")), count, streaming)
+
+    def test_json(self):
+        for encoding, compression in ENCODINGS:
+            if encoding == "xml":
+                continue
+            path = os.path.join(self.tempdir, "out.json")
+            self.assertTrue(TiledMap.write_tmx_json(TiledMap(SAMPLE), path, encoding, compression,
+                                                    raise_errors = True))
+            self.assertEqual(layer_gids(TiledMap.read_tmx_json(path)), self.expected,
+                             (encoding, compression))
+
+    def test_compression_level(self):
+        path = os.path.join(self.tempdir, "out.tmx")
+        for level in (0, 9):
+            TiledMap.write_tmx_xml(TiledMap(SAMPLE), path, "base64", "zlib",
+                                   compressionlevel = level, raise_errors = True)
+            self.assertEqual(layer_gids(TiledMap(path)), self.expected)
+
+    def test_write_errors(self):
+        path = os.path.join(self.tempdir, "out.tmx")
+        self.assertFalse(TiledMap.write_tmx_xml(TiledMap(SAMPLE), path, "base64", "zlib",
+                                                compressionlevel = 99))
+        self.assertRaises(ValueError, TiledMap.write_tmx_xml, TiledMap(SAMPLE), path,
+                          "base64", "zlib", compressionlevel = 99, raise_errors = True)
+        self.assertRaises(ValueError, TiledMap.write_tmx_xml, TiledMap(SAMPLE), path,
+                          "yaml", raise_errors = True)
+
+
+if __name__ == "__main__":
+    unittest.main()
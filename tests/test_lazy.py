@@ -0,0 +1,93 @@
+# coding:utf-8
+
+"""Lazy layer decoding
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import zlib
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer, TiledObjectgroup
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+
+def tile_layers(tiledmap):
+    return [layer for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+
+
+class LazyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), self.tempdir)
+        with open(SAMPLE, "rb") as f:
+            self.text = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tempdir, name)
+        with open(path, "wb") as f:
+            f.write(text)
+        return path
+
+    def test_decode_on_access(self):
+        # a broken zlib layer only fails once its gids are asked for
+        source = [layer.data.datasrc() for layer in tile_layers(TiledMap(SAMPLE)) if layer.name == "zlib"][0]
+        path = self.write("broken.tmx", self.text.replace(source.strip().encode("ascii"), b"AAAA"))
+        self.assertRaises(zlib.error, TiledMap, path)
+        tiledmap = TiledMap(path, lazy = True)
+        layers = tile_layers(tiledmap)
+        self.assertEqual(layers[0].data.one_d_data(), tile_layers(TiledMap(SAMPLE))[0].data.one_d_data())
+        self.assertEqual([layer.name for layer in tiledmap.layers if isinstance(layer, TiledObjectgroup)],
+                         ["objs"])
+        broken = [layer for layer in layers if layer.name == "zlib"][0]
+        self.assertRaises(zlib.error, broken.data.one_d_data)
+        self.assertRaises(zlib.error, broken.data.two_d_data)
+
+    def test_cached(self):
+        tiledmap = TiledMap(SAMPLE, lazy = True)
+        for layer in tile_layers(tiledmap):
+            self.assertIs(layer.data.two_d_data(), layer.data.two_d_data())
+            self.assertIs(layer.data.one_d_data(), layer.data.one_d_data())
+
+    def test_write_untouched(self):
+        # gzip headers hold a time, re-compressing would not give the same text back
+        sources = [layer.data.datasrc() for layer in tile_layers(TiledMap(SAMPLE))]
+        path = os.path.join(self.tempdir, "out.tmx")
+        for streaming in (False, True):
+            tiledmap = TiledMap(SAMPLE, lazy = True)
+            TiledMap.write_tmx_xml(tiledmap, path, streaming = streaming, raise_errors = True)
+            with open(path, "rb") as f:
+                written = f.read()
+            for source in sources:
+                self.assertIn(source.strip().encode("ascii"), written)
+            # nothing was decoded on the way
+            self.assertTrue(all(not layer.data._TiledData__decoded for layer in tile_layers(tiledmap)
+                                if layer.name != "xml"))
+
+    def test_edited(self):
+        tiledmap = TiledMap(SAMPLE, lazy = True)
+        layer = [layer for layer in tile_layers(tiledmap) if layer.name == "gzip"][0]
+        source = layer.data.datasrc().strip().encode("ascii")
+        layer.data.fill(0, 0, 1, 1, 3)
+        path = os.path.join(self.tempdir, "out.tmx")
+        TiledMap.write_tmx_xml(tiledmap, path, raise_errors = True)
+        with open(path, "rb") as f:
+            self.assertNotIn(source, f.read())
+        written = [layer for layer in tile_layers(TiledMap(path)) if layer.name == "gzip"][0]
+        self.assertEqual(written.data.two_d_data()[0, 0], 3)
+        self.assertEqual(written.data.compression, "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
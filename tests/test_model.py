@@ -0,0 +1,182 @@
+# coding:utf-8
+
+"""Model classes and xml encoded layer data
+
+    python -m unittest discover tests
+"""
+
+import gc
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import (TiledMap, TiledLayer, TiledObject, TiledObjectgroup, TiledProperty, TiledTile,
+                 TiledFrame, TiledTileset)
+from tmx.tmx import TiledData_Tile
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLE = os.path.join(DATA, "sample.tmx")
+EXTRA = os.path.join(DATA, "extra.tmx")
+
+
+class SlotsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_slots(self):
+        for cls in (TiledObject, TiledProperty, TiledTile, TiledFrame):
+            instance = cls(None, None)
+            self.assertFalse(hasattr(instance, "__dict__"), cls.__name__)
+            self.assertRaises(AttributeError, setattr, instance, "unknown", 1)
+        # classes with few instances keep a __dict__
+        self.assertTrue(hasattr(TiledTileset(None, None), "__dict__"))
+
+    def test_defaults(self):
+        tiledobject = TiledObject(None, None)
+        self.assertEqual((tiledobject.id, tiledobject.gid, tiledobject.properties), (None, None, None))
+        self.assertRaises(AttributeError, getattr, tiledobject, "unknown")
+
+    def test_sample(self):
+        tiledmap = TiledMap(SAMPLE)
+        tile = tiledmap.get_tiledtile_by_gid(3)
+        self.assertEqual([(frame.tileid, frame.duration) for frame in tile.animation.frames],
+                         [(2, 100), (3, 100)])
+        group = [layer for layer in tiledmap.layers if isinstance(layer, TiledObjectgroup)][0]
+        tiledobject = group.objects[4]
+        self.assertEqual((tiledobject.id, tiledobject.gid), (5, 2))
+        self.assertEqual(tiledobject.properties.properties[0].name, "hp")
+
+    def test_extra_attributes(self):
+        tiledmap = TiledMap(EXTRA)
+        tiledobject = tiledmap.layers[0].objects[0]
+        self.assertEqual(tiledobject.custom, "yes")
+        self.assertEqual(tiledobject.properties.properties[0].note, "kept")
+        path = os.path.join(self.tempdir, "out.tmx")
+        for streaming in (False, True):
+            TiledMap.write_tmx_xml(tiledmap, path, streaming = streaming, raise_errors = True)
+            with open(path, "rb") as f:
+                text = f.read()
+            self.assertIn(b'height="4" custom="yes"', text)
+            self.assertIn(b'value="1" note="kept"', text)
+
+
+class SchemaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(DATA, "ext.tsx"), self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_schema(self):
+        schema = TiledObject._schema
+        self.assertEqual(schema.nodename, "object")
+        self.assertEqual(schema.attributes, ("id", "name", "type", "x", "y", "width", "height",
+                                             "rotation", "gid", "visible"))
+        self.assertEqual(schema.children, ("properties", "ellipse", "polygon", "polyline"))
+        self.assertEqual((schema.casters["id"], schema.casters["rotation"]), (int, float))
+        self.assertIs(TiledObject._schema, schema)
+        self.assertEqual(TiledLayer._schema.nodename, "layer")
+        # subclasses share the schema of the Tiled* class
+        class Spawn(TiledObject):
+            __slots__ = ()
+        self.assertIs(Spawn._schema, schema)
+
+    def test_cast(self):
+        tiledmap = TiledMap(SAMPLE)
+        self.assertEqual((tiledmap.width, tiledmap.tilewidth), (8, 32))
+        layers = [layer for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+        self.assertEqual([(layer.opacity, layer.visible) for layer in layers[:3]],
+                         [(None, None), (0.5, None), (None, 0)])
+        group = [layer for layer in tiledmap.layers if isinstance(layer, TiledObjectgroup)][0]
+        self.assertEqual([(o.id, o.x, o.rotation) for o in group.objects[:3]],
+                         [(1, 10, None), (2, 100, None), (3, 50, 45.0)])
+        self.assertIs(type(group.objects[2].rotation), float)
+        self.assertEqual((group.objects[0].name, group.objects[0].type), ("rect", "spawn"))
+
+    def test_write(self):
+        # as the reflective writer put them out
+        expected = b"""  <objectgroup name="objs" color="#a0a0a4">
+    <object id="1" name="rect" type="spawn" x="10" y="20" width="30" height="40" />
+    <object id="2" x="100" y="100" width="20" height="10">
+      <ellipse />
+    </object>
+    <object id="3" x="50" y="60" rotation="45">
+      <polygon points="0,0 20,0 20,20 -5,10" />
+    </object>
+    <object id="4" x="70" y="80">
+      <polyline points="0,0 10,5 30,-5" />
+    </object>
+    <object id="5" gid="2" x="64" y="64" width="32" height="32">
+      <properties>
+        <property name="hp" type="int" value="10" />
+      </properties>
+    </object>
+    <object id="6" gid="18" x="128" y="32" />
+  </objectgroup>
+  <imagelayer name="bg" offsetx="4" offsety="8">
+    <image source="bg.png" />
+  </imagelayer>
+</map>"""
+        path = os.path.join(self.tempdir, "out.tmx")
+        for streaming in (False, True):
+            TiledMap.write_tmx_xml(TiledMap(SAMPLE), path, streaming = streaming, raise_errors = True)
+            with open(path, "rb") as f:
+                self.assertTrue(f.read().endswith(expected), streaming)
+
+
+class XmlTilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(DATA, "ext.tsx"), self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def xml_data(self, tiledmap):
+        return [layer.data for layer in tiledmap.layers
+                if isinstance(layer, TiledLayer) and layer.name == "xml"][0]
+
+    def test_no_tile_objects(self):
+        for kwargs in ({}, {"lazy": True}, {"streaming": True}):
+            tiledmap = TiledMap(SAMPLE, **kwargs)
+            data = self.xml_data(tiledmap)
+            self.assertEqual(len(data.one_d_data()), tiledmap.width * tiledmap.height)
+            gc.collect()
+            self.assertEqual([o for o in gc.get_objects() if isinstance(o, TiledData_Tile)], [], kwargs)
+
+    def test_grid_only(self):
+        for kwargs in ({}, {"streaming": True}):
+            data = self.xml_data(TiledMap(SAMPLE, **kwargs))
+            # only the grid's buffer is kept until the list is asked for
+            self.assertIsNone(data._TiledData__one_d_data, kwargs)
+            self.assertEqual(data.one_d_data(), data.two_d_data().data.tolist())
+            self.assertTrue(all(type(gid) is int for gid in data.one_d_data()))
+
+    def test_write_back(self):
+        tiledmap = TiledMap(SAMPLE)
+        expected = self.xml_data(tiledmap).one_d_data()
+        path = os.path.join(self.tempdir, "out.tmx")
+        for streaming in (False, True):
+            TiledMap.write_tmx_xml(tiledmap, path, streaming = streaming, raise_errors = True)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read().count(b"<tile gid="), len(expected))
+            self.assertEqual(self.xml_data(TiledMap(path)).one_d_data(), expected)
+        data = self.xml_data(tiledmap)
+        data.fill(0, 0, 1, 1, 9)
+        TiledMap.write_tmx_xml(tiledmap, path, raise_errors = True)
+        self.assertEqual(self.xml_data(TiledMap(path)).one_d_data(), [9] + expected[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# coding:utf-8
+
+"""Package imports
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import pickle
+import subprocess
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+import tmx
+
+OPTIONAL = ["tmx.ElementTree", "tmx.xmlbackend", "tmx.spatial", "tmx.collision", "tmx.pathfinding"]
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+
+def fresh(code):
+    """ output of code run in a new interpreter, with tmx imported
+    """
+    return subprocess.check_output([sys.executable, "-c", "import sys\nimport tmx\n" + code],
+                                   cwd = ROOT).decode("ascii").split()
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_import(self):
+        loaded = fresh("print(' '.join(sorted(m for m in sys.modules if sys.modules[m] is not None)))")
+        for module in OPTIONAL + ["mmap", "binascii", "json", "zlib"]:
+            self.assertNotIn(module, loaded)
+        self.assertIn("tmx.tmx", loaded)
+        self.assertIs(type(sys.modules["tmx"]), type(sys))
+
+    def test_on_use(self):
+        # reading a map loads the backends, writing one the vendored ElementTree
+        loaded = fresh("m = tmx.TiledMap(%r)\nprint(' '.join(m for m in sys.modules if m.startswith('tmx.')))"
+                       % SAMPLE)
+        self.assertIn("tmx.xmlbackend", loaded)
+        self.assertNotIn("tmx.spatial", loaded)
+        loaded = fresh("str(tmx.TiledMap(%r))\nprint(' '.join(m for m in sys.modules if m.startswith('tmx.')))"
+                       % SAMPLE)
+        self.assertIn("tmx.ElementTree", loaded)
+
+    def test_explicit(self):
+        from tmx.ElementTree import Element
+        from tmx.spatial import SpatialIndex
+        from tmx.pathfinding import PathFinder
+        self.assertIs(tmx.ElementTree.Element, Element)
+        self.assertIs(tmx.spatial.SpatialIndex, SpatialIndex)
+        self.assertIs(tmx.pathfinding.PathFinder, PathFinder)
+        self.assertIs(tmx.tmx.etree.Element, Element)
+
+    def test_star(self):
+        names = {}
+        exec("from tmx import *", names)
+        for name in tmx.tmx.__all__:
+            self.assertIn(name, names)
+        self.assertIs(names["TiledMap"], tmx.TiledMap)
+
+    def test_pickle(self):
+        tiledmap = tmx.TiledMap(SAMPLE)
+        self.assertEqual(str(pickle.loads(pickle.dumps(tiledmap, 2))), str(tiledmap))
+
+
+if __name__ == "__main__":
+    unittest.main()
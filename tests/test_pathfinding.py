@@ -0,0 +1,187 @@
+# coding:utf-8
+
+"""Path finding on orthogonal, hexagonal and staggered grids
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import math
+import heapq
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap
+from tmx.collision import CollisionGrid, tile_property
+from tmx.pathfinding import PathFinder, path_finder
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+SQRT2 = math.sqrt(2)
+
+LAYOUTS = [("orthogonal", "y", "odd")] + [(orientation, axis, index)
+                                          for orientation in ("hexagonal", "staggered")
+                                          for axis in ("x", "y") for index in ("odd", "even")]
+
+
+def reference_neighbours(finder, x, y, diagonal):
+    """ ((x, y), cost) of the walkable neighbours, spelled out per layout
+    """
+    walkable = finder.walkable
+    orientation, axis = finder.orientation, finder.staggeraxis
+    if orientation not in ("hexagonal", "staggered"):
+        steps = [((x + 1, y), 1.0), ((x - 1, y), 1.0), ((x, y + 1), 1.0), ((x, y - 1), 1.0)]
+        if diagonal:
+            for dx, dy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                if walkable(x + dx, y) and walkable(x, y + dy):
+                    steps.append(((x + dx, y + dy), SQRT2))
+        return [(cell, cost) for cell, cost in steps if walkable(*cell)]
+    # work in rows, transposing columns of x staggered maps
+    if axis == "x":
+        x, y = y, x
+        walkable = lambda a, b: finder.walkable(b, a)
+    shifted = (y % 2 == 1) == (finder.staggerindex == "odd")
+    left, right = (x, x + 1) if shifted else (x - 1, x)
+    if orientation == "hexagonal":
+        steps = [((x + 1, y), 1.0), ((x - 1, y), 1.0), ((left, y - 1), 1.0), ((right, y - 1), 1.0),
+                 ((left, y + 1), 1.0), ((right, y + 1), 1.0)]
+    else:
+        steps = [((left, y - 1), 1.0), ((right, y - 1), 1.0), ((left, y + 1), 1.0), ((right, y + 1), 1.0)]
+        if diagonal:
+            corners = (((x + 1, y), (right, y - 1), (right, y + 1)),
+                       ((x - 1, y), (left, y - 1), (left, y + 1)),
+                       ((x, y - 2), (left, y - 1), (right, y - 1)),
+                       ((x, y + 2), (left, y + 1), (right, y + 1)))
+            for cell, a, b in corners:
+                if walkable(*a) and walkable(*b):
+                    steps.append((cell, SQRT2))
+    steps = [(cell, cost) for cell, cost in steps if walkable(*cell)]
+    if axis == "x":
+        steps = [((b, a), cost) for (a, b), cost in steps]
+    return steps
+
+
+def reference_cost(finder, start, goal, diagonal):
+    """ Dijkstra over reference_neighbours
+    """
+    distances = {start: 0.0}
+    queue = [(0.0, start)]
+    while queue:
+        distance, cell = heapq.heappop(queue)
+        if cell == goal:
+            return distance
+        if distance > distances[cell]:
+            continue
+        for neighbour, cost in reference_neighbours(finder, cell[0], cell[1], diagonal):
+            if distance + cost < distances.get(neighbour, float("inf")) - 1e-9:
+                distances[neighbour] = distance + cost
+                heapq.heappush(queue, (distance + cost, neighbour))
+    return None
+
+
+def random_finder(width, height, density, layout):
+    cells = [1 if random.random() < density else 0 for i in range(width * height)]
+    return PathFinder(width, height, cells, *layout)
+
+
+def walkable_cells(finder):
+    return [(x, y) for y in range(finder.height) for x in range(finder.width) if finder.walkable(x, y)]
+
+
+class PathFinderTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(11)
+
+    def assertPath(self, finder, path, start, goal, diagonal):
+        self.assertEqual((path[0], path[-1]), (start, goal))
+        for cell, following in zip(path, path[1:]):
+            self.assertIn(following, [c for c, cost in reference_neighbours(finder, cell[0], cell[1], diagonal)])
+
+    def test_neighbours(self):
+        for layout in LAYOUTS:
+            finder = random_finder(9, 8, 0.3, layout)
+            for x, y in walkable_cells(finder):
+                for diagonal in (False, True):
+                    expected = sorted(cell for cell, cost in reference_neighbours(finder, x, y, diagonal))
+                    self.assertEqual(sorted(finder.neighbours(x, y, diagonal)), expected, (layout, x, y))
+                    # moves go both ways
+                    for cell in expected:
+                        self.assertIn((x, y), finder.neighbours(cell[0], cell[1], diagonal))
+
+    def test_jump_point_search(self):
+        for n in range(40):
+            finder = random_finder(random.randint(5, 24), random.randint(5, 24), random.choice((0.1, 0.25, 0.4)),
+                                   LAYOUTS[0])
+            cells = walkable_cells(finder)
+            for m in range(10):
+                start, goal = random.choice(cells), random.choice(cells)
+                jump = finder.find_path(start, goal, diagonal = True)
+                plain = finder.find_path(start, goal, diagonal = True, jump = False)
+                expected = reference_cost(finder, start, goal, True)
+                if expected is None:
+                    self.assertIsNone(jump)
+                    self.assertIsNone(plain)
+                    continue
+                self.assertAlmostEqual(finder.path_cost(jump), finder.path_cost(plain))
+                self.assertAlmostEqual(finder.path_cost(jump), expected)
+                self.assertPath(finder, jump, start, goal, True)
+
+    def test_shortest(self):
+        for layout in LAYOUTS:
+            for n in range(10):
+                finder = random_finder(random.randint(4, 14), random.randint(4, 14), 0.3, layout)
+                cells = walkable_cells(finder)
+                for m in range(8):
+                    start, goal = random.choice(cells), random.choice(cells)
+                    for diagonal in (False, True):
+                        path = finder.find_path(start, goal, diagonal)
+                        expected = reference_cost(finder, start, goal, diagonal)
+                        if expected is None:
+                            self.assertIsNone(path, (layout, start, goal))
+                            continue
+                        self.assertAlmostEqual(finder.path_cost(path), expected, msg = (layout, start, goal))
+                        self.assertPath(finder, path, start, goal, diagonal)
+
+    def test_components(self):
+        for layout in LAYOUTS:
+            finder = random_finder(10, 9, 0.45, layout)
+            cells = walkable_cells(finder)
+            labels = finder.components()
+            for x, y in cells:
+                self.assertEqual(labels[y * 10 + x], finder.component(x, y))
+                self.assertNotEqual(labels[y * 10 + x], 0)
+            for m in range(30):
+                start, goal = random.choice(cells), random.choice(cells)
+                reachable = reference_cost(finder, start, goal, False) is not None
+                self.assertEqual(finder.reachable(start, goal), reachable, (layout, start, goal))
+
+    def test_blocked(self):
+        grid = CollisionGrid.from_cells(3, 3, [0, 1, 0,
+                                               0, 1, 0,
+                                               0, 1, 0])
+        finder = PathFinder(3, 3, grid)
+        self.assertIsNone(finder.find_path((0, 0), (2, 2)))
+        self.assertIsNone(finder.find_path((0, 0), (1, 1)))
+        self.assertEqual(finder.component(1, 0), 0)
+        finder.set_walkable(1, 2, True)
+        self.assertEqual(finder.path_cost(finder.find_path((0, 0), (2, 0))), 6)
+        self.assertEqual(finder.find_path((0, 0), (0, 0)), [(0, 0)])
+        self.assertRaises(ValueError, PathFinder, 3, 3, [0] * 8)
+
+    def test_map(self):
+        tiledmap = TiledMap(SAMPLE)
+        solid = tile_property("solid")
+        finder = path_finder(tiledmap, solid)
+        self.assertIs(path_finder(tiledmap, solid), finder)
+        grid = tiledmap.collision_grid(solid)
+        for x, y in walkable_cells(finder):
+            self.assertFalse(grid[y, x])
+        self.assertEqual(len(walkable_cells(finder)), grid.width * grid.height - grid.count())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+# coding:utf-8
+
+"""Object bounds and the spatial index
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import math
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledObject, TiledObjectgroup
+from tmx.spatial import SpatialIndex, object_bounds, object_size
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+
+def random_boxes(count, cellsize):
+    # integer boxes, many of them ending on cell edges
+    boxes = {}
+    for n in range(count):
+        x = random.choice((random.randint(-64, 256), cellsize * random.randint(-2, 8)))
+        y = random.choice((random.randint(-64, 256), cellsize * random.randint(-2, 8)))
+        boxes["item%d" % n] = (x, y, x + random.choice((0, cellsize, random.randint(0, 80))),
+                               y + random.choice((0, cellsize, random.randint(0, 80))))
+    return boxes
+
+
+def brute_rect(boxes, x1, y1, x2, y2):
+    return sorted(item for item, (bx1, by1, bx2, by2) in boxes.items()
+                  if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1)
+
+
+def distance(box, x, y):
+    dx = max(box[0] - x, 0, x - box[2])
+    dy = max(box[1] - y, 0, y - box[3])
+    return math.sqrt(dx * dx + dy * dy)
+
+
+class SpatialIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(7)
+        self.boxes = random_boxes(150, 32)
+        self.index = SpatialIndex(32)
+        for item, box in self.boxes.items():
+            self.index.add(item, box)
+
+    def test_edges_included(self):
+        index = SpatialIndex(32)
+        index.add("a", (0, 0, 32, 32))
+        index.add("b", (64, 0, 96, 32))
+        self.assertEqual(index.query_rect(32, 32, 40, 40), ["a"])
+        self.assertEqual(sorted(index.query_rect(32, 0, 64, 0)), ["a", "b"])
+        self.assertEqual(index.query_rect(33, 0, 63, 32), [])
+        self.assertEqual(index.query_point(96, 32), ["b"])
+        self.assertEqual(index.query_rect(-8, -8, -0.5, -0.5), [])
+        index.add("dot", (40, 40, 40, 40))
+        self.assertEqual(index.query_point(40, 40), ["dot"])
+
+    def test_query_rect(self):
+        for n in range(300):
+            x1, x2 = random.randint(-96, 320), random.randint(-96, 320)
+            y1, y2 = random.randint(-96, 320), random.randint(-96, 320)
+            if n % 3 == 0:
+                x1, y1 = 32 * (x1 // 32), 32 * (y1 // 32)
+            expected = brute_rect(self.boxes, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+            self.assertEqual(sorted(self.index.query_rect(x1, y1, x2, y2)), expected, (x1, y1, x2, y2))
+
+    def test_query_point(self):
+        for n in range(200):
+            x, y = random.randint(-96, 320), random.randint(-96, 320)
+            self.assertEqual(sorted(self.index.query_point(x, y)), brute_rect(self.boxes, x, y, x, y))
+
+    def test_nearest(self):
+        for n in range(100):
+            x, y = random.uniform(-200, 500), random.uniform(-200, 500)
+            count = random.randint(1, 6)
+            maxdistance = random.choice((None, 40))
+            found = self.index.nearest(x, y, count, maxdistance)
+            expected = sorted(distance(box, x, y) for box in self.boxes.values())
+            if maxdistance is not None:
+                expected = [d for d in expected if d <= maxdistance]
+            self.assertEqual([round(d, 9) for d, item in found], [round(d, 9) for d in expected[:count]])
+            for d, item in found:
+                self.assertAlmostEqual(d, distance(self.boxes[item], x, y))
+        self.assertEqual(SpatialIndex().nearest(0, 0), [])
+
+    def test_move_and_remove(self):
+        for n, item in enumerate(sorted(self.boxes)):
+            if n % 3 == 0:
+                self.index.remove(item)
+                del self.boxes[item]
+            elif n % 3 == 1:
+                x, y = random.randint(-64, 256), random.randint(-64, 256)
+                self.boxes[item] = (x, y, x + random.randint(0, 70), y + random.randint(0, 70))
+                self.index.move(item, self.boxes[item])
+        self.assertEqual(len(self.index), len(self.boxes))
+        for item, box in self.boxes.items():
+            self.assertEqual(self.index.bounds(item), box)
+        for n in range(200):
+            x, y = random.randint(-96, 320), random.randint(-96, 320)
+            expected = brute_rect(self.boxes, x, y, x + 48, y + 20)
+            self.assertEqual(sorted(self.index.query_rect(x, y, x + 48, y + 20)), expected)
+        self.assertRaises(KeyError, self.index.remove, "missing")
+
+    def test_cellsize(self):
+        self.assertRaises(ValueError, SpatialIndex, 0)
+
+
+class ObjectBoundsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tiledmap = TiledMap(SAMPLE)
+        self.group = [layer for layer in self.tiledmap.layers if isinstance(layer, TiledObjectgroup)][0]
+        self.objects = dict((tiledobject.id, tiledobject) for tiledobject in self.group.objects)
+
+    def test_bounds(self):
+        self.assertEqual(object_bounds(self.objects[1]), (10, 20, 40, 60))
+        self.assertEqual(object_bounds(self.objects[2]), (100, 100, 120, 110))
+        # tile objects sit on their bottom-left corner
+        self.assertEqual(object_bounds(self.objects[5]), (64, 32, 96, 64))
+        self.assertEqual(object_bounds(self.objects[4]), (70, 75, 100, 85))
+        x1, y1, x2, y2 = object_bounds(self.objects[3])
+        self.assertAlmostEqual(x1, 50 - 15 / math.sqrt(2))
+        self.assertAlmostEqual(y2, 60 + 40 / math.sqrt(2))
+
+    def test_tile_object_without_size(self):
+        tiledobject = self.objects[6]
+        self.assertEqual((tiledobject.width, tiledobject.height), (None, None))
+        self.assertEqual(object_size(tiledobject), (32, 32))
+        self.assertEqual(object_bounds(tiledobject), (128, 0, 160, 32))
+        self.assertEqual(self.group.query_point(150, 10), [tiledobject])
+
+    def test_group_index(self):
+        self.assertEqual(sorted(o.id for o in self.group.query_rect(0, 0, 64, 64)), [1, 3, 5])
+        self.assertEqual(self.group.nearest(0, 0)[0][1].id, 1)
+        tiledobject = self.objects[1]
+        self.group.move_object(tiledobject, 300, 300)
+        self.assertEqual(sorted(o.id for o in self.tiledmap.spatial_index().query_rect(0, 0, 64, 64)), [3, 5])
+        self.assertEqual(self.group.query_point(310, 310), [tiledobject])
+        self.group.remove_object(tiledobject)
+        self.assertEqual(self.group.query_point(310, 310), [])
+        self.assertNotIn(tiledobject, self.tiledmap.spatial_index())
+        added = TiledObject(self.tiledmap, self.group)
+        added.x, added.y, added.width, added.height = 500, 500, 10, 10
+        self.group.add_object(added)
+        self.assertEqual(self.tiledmap.spatial_index().query_point(505, 505), [added])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# coding:utf-8
+
+"""Streaming .tmx reading and writing
+
+    python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap
+from tmx import xmlbackend
+from tmx.tmx import etree
+from tmx.ElementTree import Element
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+MAPS = [os.path.join(DATA, "sample.tmx"), os.path.join(DATA, "extra.tmx")]
+
+
+class StreamReadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = xmlbackend.get_xml_backend()
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(DATA, "ext.tsx"), self.tempdir)
+
+    def tearDown(self):
+        xmlbackend.set_xml_backend(self.backend.name)
+        shutil.rmtree(self.tempdir)
+
+    def written(self, tiledmap):
+        path = os.path.join(self.tempdir, "out.tmx")
+        TiledMap.write_tmx_xml(tiledmap, path, raise_errors = True)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_same_map(self):
+        for path in MAPS:
+            self.assertEqual(self.written(TiledMap(path, streaming = True)), self.written(TiledMap(path)), path)
+
+    def test_cleared(self):
+        # every child of the map is cleared as soon as it has been read
+        cleared = []
+        def iterparse(source, events = ("end",)):
+            depth = 0
+            for event, elem in self.backend.iterparse(source, events):
+                depth += 1 if event == "start" else -1
+                yield event, elem
+                if event == "end" and depth == 1:
+                    cleared.append((elem.tag, len(elem), len(elem.attrib)))
+        xmlbackend._backend = self.backend._replace(iterparse = iterparse)
+        tiledmap = TiledMap(MAPS[0], streaming = True)
+        xmlbackend.set_xml_backend(self.backend.name)
+        self.assertEqual([tag for tag, children, attrib in cleared],
+                         ["properties", "tileset", "tileset", "layer", "layer", "layer", "layer", "layer",
+                          "objectgroup", "imagelayer"])
+        self.assertEqual([(children, attrib) for tag, children, attrib in cleared], [(0, 0)] * len(cleared))
+        self.assertEqual(self.written(tiledmap), self.written(TiledMap(MAPS[0])))
+
+    def test_backends(self):
+        expected = self.written(TiledMap(MAPS[0]))
+        for name in xmlbackend.xml_backends:
+            try:
+                xmlbackend.set_xml_backend(name)
+            except ImportError:
+                continue
+            self.assertEqual(self.written(TiledMap(MAPS[0], streaming = True)), expected, name)
+
+
+
+class StreamWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(DATA, "ext.tsx"), self.tempdir)
+        self.path = os.path.join(self.tempdir, "out.tmx")
+
+    def tearDown(self):
+        etree.__dict__.pop("Element", None)
+        shutil.rmtree(self.tempdir)
+
+    def written(self, tiledmap, *args, **kwargs):
+        TiledMap.write_tmx_xml(tiledmap, self.path, *args, raise_errors = True, **kwargs)
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_same_output(self):
+        for path in MAPS:
+            for encoding in (None, "xml", "csv", "base64"):
+                for pretty in (True, False):
+                    tiledmap = TiledMap(path)
+                    self.assertEqual(self.written(tiledmap, encoding, streaming = True, pretty = pretty),
+                                     self.written(tiledmap, encoding, pretty = pretty), (path, encoding, pretty))
+
+    def test_file_object(self):
+        tiledmap = TiledMap(MAPS[0])
+        output = io.BytesIO()
+        self.assertTrue(TiledMap.write_tmx_xml(tiledmap, output, "xml", streaming = True, raise_errors = True))
+        self.assertFalse(output.closed)
+        self.assertEqual(output.getvalue(), self.written(tiledmap, "xml"))
+
+    def test_no_tile_elements(self):
+        # <tile> elements of xml encoded layers are written as text, not built
+        created = []
+        def element(tag, *args, **kwargs):
+            created.append(tag)
+            return Element(tag, *args, **kwargs)
+        tiledmap = TiledMap(MAPS[0])
+        cells = tiledmap.width * tiledmap.height
+        etree.Element = element
+        self.written(tiledmap, "xml", streaming = True)
+        # the <tile> elements of the tileset are all that is left
+        self.assertEqual(created.count("tile"), len(tiledmap.tilesets[0].tiles))
+        self.assertTrue(len(created) < cells)
+        del created[:]
+        self.written(tiledmap, "xml")
+        self.assertTrue(created.count("tile") >= 5 * cells)
+
+
+if __name__ == "__main__":
+    unittest.main()
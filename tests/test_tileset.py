@@ -0,0 +1,191 @@
+# coding:utf-8
+
+"""Tileset lookup by gid and tilesets shared through the .tsx cache
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import pickle
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledTileset, TiledTile, TiledImage, tileset_cache
+from tmx.tmx import GID_MASK
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.tmx")
+
+
+def brute_tileset(tiledmap, gid):
+    # the tileset with the largest firstgid not above gid
+    found = None
+    for tileset in tiledmap.tilesets:
+        if tileset.firstgid <= gid & GID_MASK and (found is None or tileset.firstgid > found.firstgid):
+            found = tileset
+    return found
+
+
+def tileset(tiledmap, firstgid, name):
+    tileset = TiledTileset(tiledmap, tiledmap)
+    tileset.firstgid = firstgid
+    tileset.name = name
+    return tileset
+
+
+class GidIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tiledmap = TiledMap(SAMPLE)
+
+    def assertLookups(self):
+        for gid in list(range(0, 40)) + [0x80000001, 0x40000011, 0xA0000013]:
+            self.assertIs(self.tiledmap.get_tileset_by_gid(gid), brute_tileset(self.tiledmap, gid), gid)
+
+    def test_lookup(self):
+        base, ext = self.tiledmap.tilesets
+        self.assertIsNone(self.tiledmap.get_tileset_by_gid(0))
+        self.assertIs(self.tiledmap.get_tileset_by_gid(16), base)
+        self.assertIs(self.tiledmap.get_tileset_by_gid(17), ext)
+        self.assertIs(self.tiledmap.get_tileset_by_gid(0x80000011), ext)
+        self.assertLookups()
+
+    def test_tiles(self):
+        tile = self.tiledmap.get_tiledtile_by_gid(2)
+        self.assertEqual((tile.id, tile.properties.properties[0].name), (1, "solid"))
+        self.assertEqual(self.tiledmap.get_tiledtile_by_gid(0x80000012).id, 1)
+        self.assertIsNone(self.tiledmap.get_tiledtile_by_gid(20))
+
+    def test_unsorted(self):
+        self.tiledmap.tilesets = [tileset(self.tiledmap, 30, "late")] + self.tiledmap.tilesets
+        self.assertLookups()
+
+    def test_set_tilesets(self):
+        self.assertLookups()
+        self.tiledmap.tilesets = [self.tiledmap.tilesets[0], tileset(self.tiledmap, 17, "other")]
+        self.assertEqual(self.tiledmap.get_tileset_by_gid(20).name, "other")
+        self.assertLookups()
+        self.tiledmap.tilesets = None
+        self.assertIsNone(self.tiledmap.get_tileset_by_gid(3))
+
+    def test_change_in_place(self):
+        self.assertLookups()
+        self.tiledmap.tilesets[1] = tileset(self.tiledmap, 17, "other")
+        self.tiledmap.invalidate_gid_index()
+        self.assertEqual(self.tiledmap.get_tileset_by_gid(20).name, "other")
+        self.tiledmap.tilesets.append(tileset(self.tiledmap, 21, "more"))
+        self.tiledmap.invalidate_gid_index()
+        self.assertLookups()
+        del self.tiledmap.tilesets[0]
+        self.tiledmap.invalidate_gid_index()
+        self.assertIsNone(self.tiledmap.get_tileset_by_gid(3))
+        self.assertLookups()
+
+    def test_firstgid_change(self):
+        self.assertLookups()
+        self.tiledmap.tilesets[1].firstgid = 10
+        self.assertEqual(self.tiledmap.get_tileset_by_gid(12).name, "ext")
+        self.assertLookups()
+        self.tiledmap.tilesets[0].firstgid = 40
+        self.assertLookups()
+
+    def test_tile_id_change(self):
+        tile = self.tiledmap.get_tiledtile_by_gid(2)
+        tile.id = 5
+        self.tiledmap.invalidate_gid_index()
+        self.assertIs(self.tiledmap.get_tiledtile_by_gid(6), tile)
+        self.assertIsNone(self.tiledmap.get_tiledtile_by_gid(2))
+
+
+class SharedTilesetTest(unittest.TestCase):
+
+    def setUp(self):
+        tileset_cache.invalidate()
+        self.first = TiledMap(SAMPLE)
+        self.second = TiledMap(SAMPLE)
+
+    def tearDown(self):
+        tileset_cache.invalidate()
+
+    def test_shared(self):
+        first, second = self.first.tilesets[1], self.second.tilesets[1]
+        self.assertTrue(first.shared and second.shared)
+        self.assertFalse(self.first.tilesets[0].shared)
+        self.assertIsNot(first, second)
+        self.assertIs(first.tiles, second.tiles)
+        self.assertIs(first.image, second.image)
+
+    def test_read_only(self):
+        tileset = self.first.tilesets[1]
+        tile = tileset.get_tiledtile_by_id(1)
+        self.assertRaises(AttributeError, setattr, tile, "id", 3)
+        self.assertRaises(AttributeError, setattr, tileset.image, "source", "other.png")
+        self.assertRaises(AttributeError, setattr, tile.properties.properties[0], "value", False)
+        self.assertRaises(TypeError, tileset.tiles.append, tile)
+        self.assertRaises(TypeError, tile.properties.properties.pop)
+        self.assertEqual(self.second.tilesets[1].get_tiledtile_by_id(1).id, 1)
+        # the map's own attributes stay editable
+        tileset.firstgid = 20
+        self.assertEqual(self.second.tilesets[1].firstgid, 17)
+
+    def test_types(self):
+        tileset = self.first.tilesets[1]
+        tile = tileset.get_tiledtile_by_id(1)
+        self.assertIs(type(tile), TiledTile)
+        self.assertIs(type(tileset.image), TiledImage)
+        self.assertIs(type(tileset.definition), TiledTileset)
+        # children hang off the cached tileset, not a map
+        self.assertIs(tile._parent, tileset.definition)
+        self.assertIsNone(tile._tiledmap)
+        self.assertEqual(tile._parent.name, "ext")
+
+    def test_pickle(self):
+        definition = self.first.tilesets[1].definition
+        copy = pickle.loads(pickle.dumps(definition, 2))
+        self.assertIs(type(copy), TiledTileset)
+        tile = copy.get_tiledtile_by_id(1)
+        self.assertIs(type(tile), TiledTile)
+        self.assertEqual(tile.properties.properties[0].name, "solid")
+        self.assertRaises(AttributeError, setattr, tile, "id", 3)
+        self.assertRaises(TypeError, copy.tiles.append, tile)
+        self.assertEqual(pickle.loads(pickle.dumps(TiledTile(None, None), 2)).id, None)
+
+    def test_read_refused(self):
+        tile = self.first.tilesets[1].get_tiledtile_by_id(1)
+        self.assertRaises(AttributeError, tile.read_json, {"id": 3})
+        self.assertEqual(tile.id, 1)
+
+    def test_unshare(self):
+        tileset = self.first.tilesets[1]
+        self.assertIs(tileset.unshare(), tileset)
+        self.assertFalse(tileset.shared)
+        self.assertIsNot(tileset.tiles, self.second.tilesets[1].tiles)
+        tile = tileset.get_tiledtile_by_id(1)
+        self.assertIs(tile._parent, tileset)
+        tile.properties.properties[0].value = False
+        tileset.image.source = "other.png"
+        tileset.tiles.append(tileset.tiles[0])
+        other = self.second.tilesets[1]
+        self.assertTrue(other.shared)
+        self.assertEqual(other.get_tiledtile_by_id(1).properties.properties[0].value, "true")
+        self.assertEqual(other.image.source, "ext.png")
+        self.assertEqual(len(other.tiles), 1)
+        self.assertTrue(TiledMap(SAMPLE).tilesets[1].shared)
+
+    def test_write(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            shutil.copy(os.path.join(os.path.dirname(SAMPLE), "ext.tsx"), tempdir)
+            path = os.path.join(tempdir, "out.json")
+            self.assertTrue(TiledMap.write_tmx_json(self.first, path, raise_errors = True))
+            written = TiledMap.read_tmx_json(path)
+            self.assertEqual(written.get_tiledtile_by_gid(18).properties.properties[0].name, "solid")
+        finally:
+            shutil.rmtree(tempdir)
+
+
+if __name__ == "__main__":
+    unittest.main()
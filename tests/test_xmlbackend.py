@@ -0,0 +1,166 @@
+# coding:utf-8
+
+"""XML backends and memory-mapped parsing
+
+    python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from tmx import TiledMap, TiledLayer
+from tmx import xmlbackend
+from tmx.xmlbackend import (xml_backends, get_xml_backend, set_xml_backend, parse_mapped, MappedText,
+                            write_xml_file)
+from tmx.ElementTree import Element, SubElement, ElementTree
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLE = os.path.join(DATA, "sample.tmx")
+
+
+def layer_gids(tiledmap):
+    return [layer.data.one_d_data() for layer in tiledmap.layers if isinstance(layer, TiledLayer)]
+
+
+def available_backends():
+    result = []
+    for name in xml_backends:
+        try:
+            set_xml_backend(name)
+        except ImportError:
+            continue
+        result.append(name)
+    return result
+
+
+class BackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = get_xml_backend().name
+        self.tempdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(DATA, "ext.tsx"), self.tempdir)
+        self.expected = layer_gids(TiledMap(SAMPLE))
+
+    def tearDown(self):
+        set_xml_backend(self.backend)
+        shutil.rmtree(self.tempdir)
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, set_xml_backend, "expat")
+
+    def test_read_write(self):
+        path = os.path.join(self.tempdir, "out.tmx")
+        for name in available_backends():
+            set_xml_backend(name)
+            self.assertEqual(get_xml_backend().name, name)
+            for kwargs in ({}, {"mapped": True}, {"streaming": True}):
+                self.assertEqual(layer_gids(TiledMap(SAMPLE, **kwargs)), self.expected, (name, kwargs))
+            TiledMap.write_tmx_xml(TiledMap(SAMPLE), path, "csv", raise_errors = True)
+            self.assertEqual(layer_gids(TiledMap(path)), self.expected, name)
+
+    def test_mapped_text(self):
+        root = parse_mapped(SAMPLE)
+        texts = [data.text for data in root.iter("data")]
+        self.assertTrue(any(isinstance(text, MappedText) for text in texts))
+        # <tile> children keep the xml encoded layer out of the mapping
+        self.assertFalse(any(isinstance(text, MappedText) and not text.read().strip() for text in texts))
+
+    def test_mapped_backend(self):
+        from tmx.ElementTree import Element
+        from xml.etree.cElementTree import Element as CElement
+        for name in available_backends():
+            set_xml_backend(name)
+            root = parse_mapped(SAMPLE)
+            self.assertTrue(any(isinstance(data.text, MappedText) for data in root.iter("data")), name)
+            if name == "ElementTree":
+                self.assertIsInstance(root, Element)
+            else:
+                # lxml elements can't hold a MappedText, cElementTree's are used
+                self.assertIs(type(root), type(CElement("map")), name)
+            self.assertEqual(layer_gids(TiledMap(SAMPLE, mapped = True)), self.expected, name)
+
+    def test_fallback(self):
+        # a data start tag in a comment can't be matched up, the file is parsed as usual
+        with open(SAMPLE, "rb") as f:
+            text = f.read()
+        path = os.path.join(self.tempdir, "comment.tmx")
+        with open(path, "wb") as f:
+            f.write(text.replace(b"<layer ", b"<!-- <data encoding=\"csv\">1</data> -->\n <layer ", 1))
+        for name in available_backends():
+            set_xml_backend(name)
+            root = parse_mapped(path)
+            self.assertIs(type(root), type(get_xml_backend().parse(path)), name)
+            self.assertFalse(any(isinstance(data.text, MappedText) for data in root.iter("data")))
+            self.assertEqual(layer_gids(TiledMap(path, mapped = True)), self.expected, name)
+
+
+class SerializeTest(unittest.TestCase):
+    """ the C backends write with serialize, byte for byte like the vendored ElementTree
+    """
+    def setUp(self):
+        self.backend = get_xml_backend().name
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        set_xml_backend(self.backend)
+        shutil.rmtree(self.tempdir)
+
+    def tree(self):
+        root = Element("map", version = "1.0")
+        root.text = "\n  "
+        item = SubElement(root, "property", name = u"caf\xe9 & <co>", value = 'say "hi"\nbye')
+        item.tail = "\n  "
+        SubElement(root, "data", encoding = "csv").text = u"1,2,\n3 & 4 > 2 \u4e2d"
+        SubElement(root, "empty").tail = "tail <t>"
+        SubElement(root, "blank").text = ""
+        return root
+
+    def vendored_bytes(self, elem, encoding):
+        output = io.BytesIO()
+        ElementTree(elem).write(output, encoding = encoding, xml_declaration = encoding, method = "xml")
+        return output.getvalue()
+
+    def test_serialize(self):
+        for encoding in ("utf-8", "iso-8859-1"):
+            output = io.BytesIO()
+            write_xml_file(self.tree(), output, encoding)
+            self.assertEqual(output.getvalue(), self.vendored_bytes(self.tree(), encoding), encoding)
+
+    def test_parsed(self):
+        # elements of every backend serialize the same
+        path = os.path.join(self.tempdir, "tree.xml")
+        with open(path, "wb") as f:
+            f.write(self.vendored_bytes(self.tree(), "utf-8"))
+        expected = self.vendored_bytes(get_xml_backend().parse(path), "utf-8")
+        for name in available_backends():
+            set_xml_backend(name)
+            output = io.BytesIO()
+            write_xml_file(get_xml_backend().parse(path), output)
+            self.assertEqual(output.getvalue(), expected, name)
+
+    def test_parser_used(self):
+        # the elements TiledMap reads come from the selected backend
+        for name in available_backends():
+            backend = set_xml_backend(name)
+            parsed = []
+            def parse(source):
+                root = backend.parse(source)
+                parsed.append((source, type(root)))
+                return root
+            xmlbackend._backend = backend._replace(parse = parse)
+            TiledMap(SAMPLE)
+            self.assertEqual(parsed[0], (SAMPLE, type(backend.parse(SAMPLE))), name)
+        set_xml_backend("ElementTree")
+        self.assertIsInstance(get_xml_backend().parse(SAMPLE), Element)
+        set_xml_backend("cElementTree")
+        self.assertNotIsInstance(get_xml_backend().parse(SAMPLE), Element)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,13 @@
 
 from .tmx import *
-from .ElementTree import *
+
+# the vendored ElementTree and the optional modules are imported
+# explicitly, so that import tmx stays cheap:
+#     from tmx.ElementTree import Element
+#     from tmx.xmlbackend import set_xml_backend
+#     from tmx.spatial import SpatialIndex
+#     from tmx.collision import CollisionGrid
+#     from tmx.pathfinding import PathFinder
 
 __version__ = (1, 0, 0)
 __author__ = 'wboy'
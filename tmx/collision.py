@@ -0,0 +1,410 @@
+# coding:utf-8
+
+# TMX library
+# Copyright (c) 2016 wboy <mrtop@126.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""=========================================
+Collision grids
+
+A packed bitset with one bit per map cell, set for blocked cells.
+Tile layers are resolved through a lookup table indexed by gid,
+in one pass over each layer's gid buffer (NumPy when installed).
+Objects can be rasterized on top of it.
+========================================="""
+
+import math
+import struct
+import binascii
+from operator import or_
+
+from six.moves import map
+
+from .tmx import (TiledLayer, TiledObjectgroup, get_numpy, compress_data, decompress_data,
+                  convert_to_bool, format_value, GID_MASK)
+from .spatial import object_bounds, object_size
+
+
+__all__ = ['CollisionGrid',
+           'build_collision_grid',
+           'gid_lookup_table',
+           'tile_property']
+
+# "0" or "1" for a cell byte of 0 or 1
+_BITCHARS = bytearray(range(256))
+_BITCHARS[0] = ord("0")
+_BITCHARS[1] = ord("1")
+_BITCHARS = bytes(_BITCHARS)
+_UNBITCHARS = bytearray(range(256))
+_UNBITCHARS[ord("0")] = 0
+_UNBITCHARS[ord("1")] = 1
+_UNBITCHARS = bytes(_UNBITCHARS)
+
+# set bits of every byte value
+_POPCOUNT = [bin(i).count("1") for i in range(256)]
+
+
+def pack_cells(cells):
+    """pack a sequence of 0/1 cell bytes into bits, most significant bit first
+
+    rtype : bytearray
+    """
+    count = len(cells)
+    if not count:
+        return bytearray()
+    numpy = get_numpy()
+    if numpy is not None:
+        return bytearray(numpy.packbits(numpy.asarray(cells, dtype=bool)).tobytes())
+    padding = -count % 8
+    text = bytes(bytearray(cells)).translate(_BITCHARS).decode("ascii") + "0" * padding
+    size = (count + padding) // 8
+    return bytearray(binascii.unhexlify("%0*x" % (size * 2, int(text, 2))))
+
+def unpack_bits(bits, count):
+    """one 0/1 byte per cell of the packed bits
+
+    rtype : bytearray
+    """
+    numpy = get_numpy()
+    if numpy is not None:
+        return bytearray(numpy.unpackbits(numpy.frombuffer(bytes(bits), dtype=numpy.uint8))[:count].tobytes())
+    if not count:
+        return bytearray()
+    text = bin(int(binascii.hexlify(bytes(bits)), 16))[2:].zfill(len(bits) * 8)
+    return bytearray(text[:count].encode("ascii").translate(_UNBITCHARS))
+
+
+class CollisionGrid(object):
+    """ 1 bit per cell collision mask of a map
+
+    A set bit is a blocked cell. Cell (x, y) is bit y * width + x,
+    bits are packed most significant first, as numpy.packbits does.
+
+    grid[y, x] reads or writes a cell as a bool.
+    """
+    MAGIC = b"TMXC"
+
+    def __init__(self, width, height, bits = None):
+        size = (width * height + 7) // 8
+        if bits is None:
+            bits = bytearray(size)
+        else:
+            bits = bytearray(bits)
+        if len(bits) != size:
+            e = 'Collision bits length {} does not match {}x{}.'.format(len(bits), width, height)
+            raise ValueError(e)
+        self.width = width
+        self.height = height
+        self.bits = bits
+
+    @classmethod
+    def from_cells(cls, width, height, cells):
+        """ grid of one 0/1 value per cell, in row order
+        """
+        return cls(width, height, pack_cells(cells))
+
+    def __getitem__(self, index):
+        y, x = index
+        i = self.__offset(x, y)
+        return bool(self.bits[i >> 3] & (0x80 >> (i & 7)))
+
+    def __setitem__(self, index, value):
+        y, x = index
+        i = self.__offset(x, y)
+        if value:
+            self.bits[i >> 3] |= 0x80 >> (i & 7)
+        else:
+            self.bits[i >> 3] &= ~(0x80 >> (i & 7)) & 0xFF
+
+    def __eq__(self, other):
+        if isinstance(other, CollisionGrid):
+            return (self.width == other.width and self.height == other.height
+                    and self.bits == other.bits)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __or__(self, other):
+        """ cells blocked in either grid
+        """
+        if (self.width, self.height) != (other.width, other.height):
+            raise ValueError("collision grids differ in size")
+        numpy = get_numpy()
+        if numpy is not None:
+            bits = numpy.bitwise_or(numpy.frombuffer(bytes(self.bits), dtype=numpy.uint8),
+                                    numpy.frombuffer(bytes(other.bits), dtype=numpy.uint8)).tobytes()
+        else:
+            bits = bytearray(map(or_, self.bits, other.bits))
+        return CollisionGrid(self.width, self.height, bits)
+
+    def __repr__(self):
+        return "<CollisionGrid %dx%d>" % (self.width, self.height)
+
+    def blocked(self, x, y):
+        """ True for blocked cells and cells outside the map
+        """
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return True
+        i = y * self.width + x
+        return bool(self.bits[i >> 3] & (0x80 >> (i & 7)))
+
+    def walkable(self, x, y):
+        return not self.blocked(x, y)
+
+    def count(self):
+        """ number of blocked cells
+        """
+        return sum(map(_POPCOUNT.__getitem__, self.bits))
+
+    def cells(self):
+        """ one 0/1 byte per cell in row order, 1 for blocked
+
+        rtype : bytearray
+        """
+        return unpack_bits(self.bits, self.width * self.height)
+
+    def tolist(self):
+        """ rtype : list of rows of bools
+        """
+        cells = self.cells()
+        w = self.width
+        return [[bool(c) for c in cells[y * w:(y + 1) * w]] for y in range(self.height)]
+
+    def tobytes(self):
+        """ the packed bits
+        """
+        return bytes(self.bits)
+
+    def dumps(self, compression = "zlib", level = None):
+        """ the grid as bytes: MAGIC, width, height, compression name and the bits
+
+        :param compression: None or a key of compressions
+        rtype : bytes
+        """
+        name = (compression or "").encode("ascii")
+        header = self.MAGIC + struct.pack("<IIB", self.width, self.height, len(name)) + name
+        return header + compress_data(bytes(self.bits), compression, level)
+
+    @classmethod
+    def loads(cls, data):
+        """ read bytes written by dumps
+
+        :raises: ValueError when data is not a dumped collision grid
+        rtype : CollisionGrid instance
+        """
+        data = bytes(data)
+        start = len(cls.MAGIC)
+        if data[:start] != cls.MAGIC:
+            raise ValueError("not a collision grid")
+        width, height, size = struct.unpack("<IIB", data[start:start + 9])
+        start += 9
+        compression = data[start:start + size].decode("ascii") or None
+        return cls(width, height, decompress_data(data[start + size:], compression))
+
+    def __offset(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            raise IndexError("collision grid index out of range")
+        return y * self.width + x
+
+
+def tile_property(name, value = True):
+    """a predicate on TiledTile for build_collision_grid
+
+    :param name: property name
+    :param value: value the property must have, None for any value;
+                  booleans also match "1", "yes" and the like
+    """
+    def predicate(tiledtile):
+        if tiledtile.properties is None:
+            return False
+        for tiledproperty in tiledtile.properties.properties or []:
+            if tiledproperty.name != name:
+                continue
+            if value is None:
+                return True
+            if isinstance(value, bool):
+                try:
+                    return convert_to_bool(tiledproperty.value) == value
+                except ValueError:
+                    return False
+            return format_value(tiledproperty.value, tiledproperty.type) == value
+        return False
+    return predicate
+
+def gid_lookup_table(tiledmap, predicate):
+    """blocked flag of every gid, for tiles of the map's tilesets
+
+    Gids past the end of the table and gids without a TiledTile
+    are not blocked.
+    :param predicate: function of a TiledTile returning a bool
+    rtype : bytearray, table[gid] is 1 or 0
+    """
+    blocked = []
+    for tileset in tiledmap.tilesets or []:
+        for tiledtile in tileset.tiles or []:
+            if predicate(tiledtile):
+                blocked.append(tileset.firstgid + tiledtile.id)
+    table = bytearray(max(blocked) + 1 if blocked else 1)
+    for gid in blocked:
+        table[gid] = 1
+    return table
+
+def layer_cells(gids, table = None):
+    """one 0/1 byte per cell of a layer
+
+    :param gids: uint32 array of the layer, TiledGrid.data
+    :param table: gid_lookup_table, None blocks every non-empty cell
+    rtype : numpy bool array or bytearray
+    """
+    numpy = get_numpy()
+    if numpy is not None:
+        gids = numpy.frombuffer(gids, dtype=numpy.uint32) & GID_MASK
+        if table is None:
+            return gids != 0
+        lut = numpy.frombuffer(bytes(table + bytearray(1)), dtype=numpy.uint8).astype(bool)
+        return lut[numpy.minimum(gids, len(table))]
+    size = len(table) if table is not None else 0
+    cells = {}
+    for gid in set(gids):
+        tileid = gid & GID_MASK
+        if table is None:
+            cells[gid] = 1 if tileid else 0
+        else:
+            cells[gid] = table[tileid] if tileid < size else 0
+    return bytearray(map(cells.__getitem__, gids))
+
+def object_cells(tiledobject, tilewidth, tileheight, width, height):
+    """cells whose center is inside an object
+
+    Rectangles, tiles, ellipses and polygons have an area, tiles
+    without a size take their tile's, see object_size;
+    polylines and points don't and give no cells.
+    rtype : list of (x, y)
+    """
+    polyline = tiledobject.polyline
+    if polyline is not None:
+        return []
+    polygon = tiledobject.polygon
+    if polygon is not None and not polygon.positions:
+        return []
+    objectwidth, objectheight = object_size(tiledobject)
+    if polygon is None and (not objectwidth or not objectheight):
+        return []
+    x1, y1, x2, y2 = object_bounds(tiledobject)
+    originx = tiledobject.x or 0
+    originy = tiledobject.y or 0
+    parent = tiledobject._parent
+    if parent is not None:
+        originx += getattr(parent, "offsetx", None) or 0
+        originy += getattr(parent, "offsety", None) or 0
+    radians = math.radians(tiledobject.rotation or 0)
+    cos = math.cos(radians)
+    sin = math.sin(radians)
+    if polygon is not None:
+        inside = polygon_contains(polygon.positions)
+    elif tiledobject.ellipse is not None:
+        rx = objectwidth / 2.0
+        ry = objectheight / 2.0
+        inside = lambda lx, ly: ((lx - rx) / rx) ** 2 + ((ly - ry) / ry) ** 2 <= 1.0
+    elif tiledobject.gid is not None:
+        left = 0
+        if tiledobject._tiledmap is not None and tiledobject._tiledmap.orientation == "isometric":
+            left = -objectwidth / 2.0
+        inside = lambda lx, ly: left <= lx <= left + objectwidth and -objectheight <= ly <= 0
+    else:
+        inside = lambda lx, ly: 0 <= lx <= objectwidth and 0 <= ly <= objectheight
+    cx1 = max(int(math.floor(x1 / float(tilewidth) - 0.5)), 0)
+    cy1 = max(int(math.floor(y1 / float(tileheight) - 0.5)), 0)
+    cx2 = min(int(math.ceil(x2 / float(tilewidth) - 0.5)), width - 1)
+    cy2 = min(int(math.ceil(y2 / float(tileheight) - 0.5)), height - 1)
+    result = []
+    for cy in range(cy1, cy2 + 1):
+        py = (cy + 0.5) * tileheight - originy
+        for cx in range(cx1, cx2 + 1):
+            px = (cx + 0.5) * tilewidth - originx
+            # into the object's frame, undoing its clockwise rotation
+            if inside(px * cos + py * sin, py * cos - px * sin):
+                result.append((cx, cy))
+    return result
+
+def polygon_contains(points):
+    """even-odd point in polygon test of points relative to the object
+    """
+    edges = list(zip(points, points[1:] + points[:1]))
+    def inside(x, y):
+        result = False
+        for (ax, ay), (bx, by) in edges:
+            if (ay > y) != (by > y) and x < (bx - ax) * (y - ay) / float(by - ay) + ax:
+                result = not result
+        return result
+    return inside
+
+def build_collision_grid(tiledmap, predicate = None, layers = None, objectgroups = None,
+                         objectpredicate = None):
+    """the collision grid of a map
+
+    :param predicate: function of a TiledTile, True when the tile blocks,
+                      see tile_property; None blocks every non-empty cell
+    :param layers: names of the tile layers used, None for all of them
+    :param objectgroups: names of the object groups rasterized, True for
+                         all of them, None for none
+    :param objectpredicate: function of a TiledObject, True when the
+                            object blocks; None for all objects
+    rtype : CollisionGrid instance
+    """
+    width = tiledmap.width
+    height = tiledmap.height
+    table = gid_lookup_table(tiledmap, predicate) if predicate is not None else None
+    cells = None
+    for layer in tiledmap.layers or []:
+        if not isinstance(layer, TiledLayer) or layer.data is None:
+            continue
+        if layers is not None and layer.name not in layers:
+            continue
+        grid = layer.data.two_d_data()
+        if grid is None:
+            continue
+        if (grid.width, grid.height) != (width, height):
+            e = 'Layer "{}" is {}x{}, the map {}x{}.'.format(layer.name, grid.width, grid.height,
+                                                              width, height)
+            raise ValueError(e)
+        layercells = layer_cells(grid.data, table)
+        if cells is None:
+            cells = layercells
+        elif isinstance(cells, bytearray):
+            cells = bytearray(map(or_, cells, layercells))
+        else:
+            cells |= layercells
+    if cells is None:
+        collisiongrid = CollisionGrid(width, height)
+    else:
+        collisiongrid = CollisionGrid.from_cells(width, height, cells)
+    if objectgroups is not None:
+        for layer in tiledmap.layers or []:
+            if not isinstance(layer, TiledObjectgroup):
+                continue
+            if objectgroups is not True and layer.name not in objectgroups:
+                continue
+            for tiledobject in layer.objects or []:
+                if objectpredicate is not None and not objectpredicate(tiledobject):
+                    continue
+                for x, y in object_cells(tiledobject, tiledmap.tilewidth, tiledmap.tileheight,
+                                         width, height):
+                    collisiongrid[y, x] = True
+    return collisiongrid
@@ -0,0 +1,247 @@
+# coding:utf-8
+
+# TMX library
+# Copyright (c) 2016 wboy <mrtop@126.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""=========================================
+Batch conversion of .tmx files
+
+    python -m tmx.convert [options] PATH [PATH ...]
+
+PATH is a .tmx file, a directory (searched recursively) or a glob pattern.
+Files are converted in a process pool; a failing file is reported and
+the batch goes on.
+========================================="""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import multiprocessing
+from collections import namedtuple
+
+try:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+except ImportError:
+    ProcessPoolExecutor = None
+
+from .tmx import TiledMap
+
+
+__all__ = ['FORMATS',
+           'ConvertResult',
+           'collect_tmx_files',
+           'convert_file',
+           'convert_batch']
+
+# format name : (output type, data encoding, data compression)
+FORMATS = {
+    "tmx"    : ("tmx", None, None),
+    "xml"    : ("tmx", "xml", None),
+    "csv"    : ("tmx", "csv", None),
+    "base64" : ("tmx", "base64", None),
+    "gzip"   : ("tmx", "base64", "gzip"),
+    "zlib"   : ("tmx", "base64", "zlib"),
+    "zstd"   : ("tmx", "base64", "zstd"),
+    "json"   : ("json", None, None),
+}
+
+ConvertResult = namedtuple("ConvertResult", ["source", "target", "error", "seconds", "size"])
+
+
+def collect_tmx_files(paths):
+    """expand files, directories and glob patterns to .tmx files
+
+    :param paths: list of string
+    :rtype list of (file path, base directory) tuples,
+           the base directory is used to keep the directory layout
+    """
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if os.path.splitext(filename)[1].lower() == ".tmx":
+                        result.append((os.path.join(dirpath, filename), path))
+        elif os.path.isfile(path):
+            result.append((path, os.path.dirname(path)))
+        else:
+            for filepath in sorted(glob.glob(path)):
+                if os.path.isfile(filepath) and os.path.splitext(filepath)[1].lower() == ".tmx":
+                    result.append((filepath, os.path.dirname(filepath)))
+    return result
+
+
+def target_path(source, base, outdir, format):
+    """output path of source for format
+
+    Without outdir the file is written next to the source.
+    """
+    extension = ".json" if FORMATS[format][0] == "json" else ".tmx"
+    name = os.path.splitext(os.path.relpath(source, base or "."))[0] + extension
+    if outdir is None:
+        return os.path.join(os.path.dirname(source), os.path.basename(name))
+    return os.path.join(outdir, name)
+
+
+def convert_file(source, target, format = "tmx", unfoldtsx = True, pretty = True,
+                 level = None):
+    """convert one .tmx file
+
+    :param source: string .tmx file's path
+    :param target: string output file's path
+    :param format: key of FORMATS
+    :param unfoldtsx: see TiledMap.write_tmx_xml
+    :param pretty: False writes compact .tmx and .json files
+    :param level: compression level of the layer data, None for the default
+    :raises: ValueError on unknown format, the error of a failed read or write
+    """
+    if format not in FORMATS:
+        raise ValueError('Format "{}" not supported.'.format(format))
+    output, encoding, compression = FORMATS[format]
+    tiledmap = TiledMap.read_tmx_xml(source)
+    dirname = os.path.dirname(target)
+    if dirname and not os.path.isdir(dirname):
+        try:
+            os.makedirs(dirname)
+        except OSError:
+            if not os.path.isdir(dirname):
+                raise
+    if output == "json":
+        TiledMap.write_tmx_json(tiledmap, target, encoding, compression, unfoldtsx,
+                                indent = 4 if pretty else None, streaming = True,
+                                compressionlevel = level, raise_errors = True)
+    else:
+        TiledMap.write_tmx_xml(tiledmap, target, encoding, compression, unfoldtsx,
+                               pretty = pretty, compressionlevel = level, raise_errors = True)
+
+
+def _convert_task(task):
+    """process pool worker, never raises
+
+    rtype ConvertResult
+    """
+    source, target, format, unfoldtsx, pretty, level = task
+    start = time.time()
+    error = None
+    try:
+        convert_file(source, target, format, unfoldtsx, pretty, level)
+    except Exception as e:
+        error = "%s: %s" % (type(e).__name__, e)
+    try:
+        size = os.path.getsize(source)
+    except OSError:
+        size = 0
+    return ConvertResult(source, target, error, time.time() - start, size)
+
+
+def convert_batch(paths, outdir = None, format = "tmx", unfoldtsx = True,
+                  jobs = None, callback = None, pretty = True, level = None):
+    """convert many .tmx files in a process pool
+
+    :param paths: list of files, directories or glob patterns
+    :param outdir: output directory, None writes next to the sources
+    :param format: key of FORMATS
+    :param jobs: number of worker processes, None uses every cpu,
+                 1 converts in the calling process
+    :param callback: called with each ConvertResult as it completes
+    :param pretty: False writes compact .tmx and .json files
+    :param level: compression level of the layer data, None for the default
+    :rtype list of ConvertResult, in completion order
+    """
+    if format not in FORMATS:
+        raise ValueError('Format "{}" not supported.'.format(format))
+    tasks = [(source, target_path(source, base, outdir, format), format, unfoldtsx, pretty, level)
+             for source, base in collect_tmx_files(paths)]
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(tasks)))
+
+    results = []
+    def done(result):
+        results.append(result)
+        if callback is not None:
+            callback(result)
+
+    if jobs == 1:
+        for task in tasks:
+            done(_convert_task(task))
+    elif ProcessPoolExecutor is not None:
+        with ProcessPoolExecutor(max_workers = jobs) as executor:
+            futures = [executor.submit(_convert_task, task) for task in tasks]
+            for future in as_completed(futures):
+                done(future.result())
+    else:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            for result in pool.imap_unordered(_convert_task, tasks):
+                done(result)
+        finally:
+            pool.close()
+            pool.join()
+    return results
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m tmx.convert",
+                                     description = "Convert .tmx maps between layer data formats and JSON.")
+    parser.add_argument("paths", nargs = "+", metavar = "PATH",
+                        help = ".tmx file, directory or glob pattern")
+    parser.add_argument("-f", "--format", default = "tmx", choices = sorted(FORMATS),
+                        help = "output format (default: tmx, keeps the layer data as it is)")
+    parser.add_argument("-o", "--outdir", default = None,
+                        help = "output directory (default: next to each source)")
+    parser.add_argument("-j", "--jobs", type = int, default = None,
+                        help = "worker processes (default: cpu count)")
+    parser.add_argument("--in-place", action = "store_true",
+                        help = "allow overwriting the source .tmx files")
+    parser.add_argument("--keep-tsx", action = "store_true",
+                        help = "do not unfold external .tsx tilesets")
+    parser.add_argument("-l", "--level", type = int, default = None,
+                        help = "compression level, e.g. 1 for previews, 9 for shipping builds")
+    parser.add_argument("--compact", action = "store_true",
+                        help = "write files without indentation")
+    parser.add_argument("-q", "--quiet", action = "store_true",
+                        help = "only report errors and the summary")
+    args = parser.parse_args(argv)
+
+    if args.outdir is None and FORMATS[args.format][0] == "tmx" and not args.in_place:
+        parser.error("writing .tmx next to the sources overwrites them, pass --outdir or --in-place")
+
+    def report(result):
+        if result.error is not None:
+            sys.stderr.write("FAIL %s: %s\n" % (result.source, result.error))
+        elif not args.quiet:
+            sys.stdout.write("ok   %s -> %s (%.1f ms)\n" % (result.source, result.target, result.seconds * 1000))
+
+    start = time.time()
+    results = convert_batch(args.paths, args.outdir, args.format, not args.keep_tsx,
+                            args.jobs, report, not args.compact, args.level)
+    elapsed = time.time() - start
+
+    failed = len([result for result in results if result.error is not None])
+    size = sum(result.size for result in results)
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    mbrate = size / elapsed / (1024.0 * 1024.0) if elapsed > 0 else 0.0
+    sys.stdout.write("%d files, %d converted, %d failed in %.2f s (%.1f files/s, %.2f MB/s)\n"
+                     % (len(results), len(results) - failed, failed, elapsed, rate, mbrate))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
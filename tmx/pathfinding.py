@@ -0,0 +1,472 @@
+# coding:utf-8
+
+# TMX library
+# Copyright (c) 2016 wboy <mrtop@126.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""=========================================
+Grid pathfinding over a collision grid
+
+    orthogonal, isometric : 4 neighbours, 8 with diagonal moves
+    hexagonal             : 6 neighbours
+    staggered             : 4 edge neighbours, 8 with the corner ones
+
+Cells are kept in a flat walkable bytearray with a blocked border,
+so neighbours are found by index offsets without bounds checks.
+Orthogonal paths with diagonal moves use jump point search,
+the others A*. Diagonal moves never cut a blocked corner.
+Connected components are labeled once and reject unreachable goals.
+========================================="""
+
+import math
+import array
+import heapq
+import weakref
+
+from .collision import CollisionGrid
+
+
+__all__ = ['PathFinder',
+           'path_finder']
+
+SQRT2 = math.sqrt(2)
+
+# blocked cells around the grid, staggered corners reach 2 rows away
+PADDING = 2
+
+# blocked cell byte to walkable cell byte
+_WALKABLE = bytearray(range(256))
+_WALKABLE[0] = 1
+_WALKABLE[1] = 0
+_WALKABLE = bytes(_WALKABLE)
+
+# axial deltas of the neighbours of hexagonal and staggered maps,
+# corners are (delta, first edge, second edge) of the edges they cross
+HEX_DELTAS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1))
+STAGGERED_EDGES = {
+    "y": ((0, 1), (-1, 1), (0, -1), (1, -1)),
+    "x": ((1, 0), (-1, 0), (1, -1), (-1, 1)),
+}
+STAGGERED_CORNERS = {
+    "y": (((1, 0), (0, 1), (1, -1)), ((-1, 0), (0, -1), (-1, 1)),
+          ((-1, 2), (0, 1), (-1, 1)), ((1, -2), (0, -1), (1, -1))),
+    "x": (((0, 1), (1, 0), (-1, 1)), ((0, -1), (-1, 0), (1, -1)),
+          ((2, -1), (1, 0), (1, -1)), ((-2, 1), (-1, 0), (-1, 1))),
+}
+
+
+def to_axial(x, y, staggeraxis, staggerindex):
+    """axial (q, r) of an offset cell of a staggered or hexagonal map
+    """
+    shift = 1 if staggerindex == "even" else -1
+    if staggeraxis == "x":
+        return x, y - (x + shift * (x & 1)) // 2
+    return x - (y + shift * (y & 1)) // 2, y
+
+def from_axial(q, r, staggeraxis, staggerindex):
+    """offset cell (x, y) of axial (q, r)
+    """
+    shift = 1 if staggerindex == "even" else -1
+    if staggeraxis == "x":
+        return q, r + (q + shift * (q & 1)) // 2
+    return q + (r + shift * (r & 1)) // 2, r
+
+def octile(dx, dy):
+    """length of the shortest 8 neighbour path over dx, dy steps
+    """
+    if dx < dy:
+        return SQRT2 * dx + (dy - dx)
+    return SQRT2 * dy + (dx - dy)
+
+
+class PathFinder(object):
+    """ Paths over the walkable cells of a grid
+
+    :param width, height: grid size in cells
+    :param blocked: CollisionGrid, or one 0/1 value per cell in row order, 1 for blocked
+    :param orientation, staggeraxis, staggerindex: as on TiledMap
+    """
+    def __init__(self, width, height, blocked, orientation = "orthogonal",
+                 staggeraxis = "y", staggerindex = "odd"):
+        if isinstance(blocked, CollisionGrid):
+            blocked = blocked.cells()
+        if len(blocked) != width * height:
+            e = 'Blocked cells length {} does not match {}x{}.'.format(len(blocked), width, height)
+            raise ValueError(e)
+        self.width = width
+        self.height = height
+        self.orientation = orientation
+        self.staggeraxis = staggeraxis or "y"
+        self.staggerindex = staggerindex or "odd"
+        self.__stride = stride = width + 2 * PADDING
+        walk = bytearray(stride * (height + 2 * PADDING))
+        cells = bytearray(bytes(bytearray(blocked)).translate(_WALKABLE))
+        for y in range(height):
+            start = (y + PADDING) * stride + PADDING
+            walk[start:start + width] = cells[y * width:(y + 1) * width]
+        self.__walk = walk
+        self.__labels = None
+        self.__tables()
+
+    @classmethod
+    def from_map(cls, tiledmap, collisiongrid = None):
+        """ finder over a map's collision grid, tiledmap.collision_grid() by default
+        """
+        if collisiongrid is None:
+            collisiongrid = tiledmap.collision_grid()
+        return cls(tiledmap.width, tiledmap.height, collisiongrid, tiledmap.orientation,
+                   tiledmap.staggeraxis, tiledmap.staggerindex)
+
+    def __tables(self):
+        """ flat index offsets of the neighbours, per parity of the
+        staggered row or column on hexagonal and staggered maps
+        """
+        stride = self.__stride
+        if self.orientation in ("hexagonal", "staggered"):
+            axis = self.staggeraxis
+            edges = HEX_DELTAS if self.orientation == "hexagonal" else STAGGERED_EDGES[axis]
+            corners = () if self.orientation == "hexagonal" else STAGGERED_CORNERS[axis]
+            self.__edges = []
+            self.__corners = []
+            for parity in (0, 1):
+                x, y = (parity, 0) if axis == "x" else (0, parity)
+                q, r = to_axial(x, y, axis, self.staggerindex)
+                def offset(delta):
+                    nx, ny = from_axial(q + delta[0], r + delta[1], axis, self.staggerindex)
+                    return (ny - y) * stride + (nx - x)
+                self.__edges.append(tuple(offset(delta) for delta in edges))
+                self.__corners.append(tuple((offset(delta), offset(a), offset(b))
+                                            for delta, a, b in corners))
+        else:
+            self.__edges = [(1, -1, stride, -stride)] * 2
+            self.__corners = [((stride + 1, 1, stride), (stride - 1, -1, stride),
+                               (-stride + 1, 1, -stride), (-stride - 1, -1, -stride))] * 2
+
+    def index(self, x, y):
+        return (y + PADDING) * self.__stride + x + PADDING
+
+    def position(self, i):
+        y, x = divmod(i, self.__stride)
+        return x - PADDING, y - PADDING
+
+    def walkable(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        return bool(self.__walk[self.index(x, y)])
+
+    def set_walkable(self, x, y, walkable):
+        """ change a cell, the component labels are computed again when needed
+        """
+        self.__walk[self.index(x, y)] = 1 if walkable else 0
+        self.__labels = None
+
+    def __parity(self, i):
+        y, x = divmod(i, self.__stride)
+        if self.staggeraxis == "x":
+            return (x - PADDING) & 1
+        return (y - PADDING) & 1
+
+    def __neighbours(self, i, diagonal):
+        """ (index, cost) of the walkable neighbours of index i
+        """
+        walk = self.__walk
+        parity = self.__parity(i) if self.orientation in ("hexagonal", "staggered") else 0
+        result = [(i + d, 1.0) for d in self.__edges[parity] if walk[i + d]]
+        if diagonal:
+            for d, a, b in self.__corners[parity]:
+                if walk[i + d] and walk[i + a] and walk[i + b]:
+                    result.append((i + d, SQRT2))
+        return result
+
+    def neighbours(self, x, y, diagonal = False):
+        """ walkable neighbours of a cell
+
+        rtype : list of (x, y)
+        """
+        return [self.position(j) for j, cost in self.__neighbours(self.index(x, y), diagonal)]
+
+    def components(self):
+        """ connected component labels, computed once
+
+        Diagonal and corner moves connect nothing the edge moves
+        don't, as they never cut blocked cells.
+        rtype : array of one label per cell in row order, 0 for blocked
+        """
+        labels = self.__component_labels()
+        stride = self.__stride
+        result = array.array(labels.typecode)
+        for y in range(self.height):
+            start = (y + PADDING) * stride + PADDING
+            result += labels[start:start + self.width]
+        return result
+
+    def component(self, x, y):
+        """ label of the component of a cell, 0 for blocked cells
+        """
+        if not self.walkable(x, y):
+            return 0
+        return self.__component_labels()[self.index(x, y)]
+
+    def reachable(self, start, goal):
+        """ True when a path joins the (x, y) cells start and goal
+        """
+        label = self.component(*start)
+        return label != 0 and label == self.component(*goal)
+
+    def __component_labels(self):
+        if self.__labels is not None:
+            return self.__labels
+        walk = self.__walk
+        labels = array.array('i', [0]) * len(walk)
+        staggered = self.orientation in ("hexagonal", "staggered")
+        edges = self.__edges
+        label = 0
+        start = walk.find(b"\x01")
+        while start != -1:
+            if not labels[start]:
+                label += 1
+                labels[start] = label
+                queue = [start]
+                for i in queue:
+                    for d in edges[self.__parity(i) if staggered else 0]:
+                        j = i + d
+                        if walk[j] and not labels[j]:
+                            labels[j] = label
+                            queue.append(j)
+            start = walk.find(b"\x01", start + 1)
+        self.__labels = labels
+        return labels
+
+    def find_path(self, start, goal, diagonal = False, jump = True):
+        """ a shortest path between two cells
+
+        :param start, goal: (x, y) cells
+        :param diagonal: allow diagonal moves, corner moves on staggered maps
+        :param jump: use jump point search on orthogonal and isometric maps
+                     with diagonal moves
+        rtype : list of (x, y) from start to goal, or None
+        """
+        if not self.reachable(start, goal):
+            return None
+        i = self.index(*start)
+        goalindex = self.index(*goal)
+        if self.orientation in ("hexagonal", "staggered"):
+            heuristic = self.__axial_heuristic(goal, diagonal)
+            expand = lambda i, parent: self.__neighbours(i, diagonal)
+        else:
+            heuristic = self.__grid_heuristic(goalindex, diagonal)
+            if diagonal and jump:
+                expand = lambda i, parent: self.__jump_successors(i, parent, goalindex)
+            else:
+                expand = lambda i, parent: self.__neighbours(i, diagonal)
+        path = self.__astar(i, goalindex, expand, heuristic)
+        if path is None:
+            return None
+        if diagonal and jump and self.orientation not in ("hexagonal", "staggered"):
+            path = self.__fill_jumps(path)
+        return [self.position(i) for i in path]
+
+    def path_cost(self, path):
+        """ length of a path returned by find_path, in grid steps
+        """
+        cost = 0.0
+        for (x1, y1), (x2, y2) in zip(path, path[1:]):
+            if self.orientation == "hexagonal":
+                diagonal = False
+            elif self.orientation == "staggered":
+                across = abs(x2 - x1) if self.staggeraxis == "x" else abs(y2 - y1)
+                diagonal = across != 1
+            else:
+                diagonal = x1 != x2 and y1 != y2
+            cost += SQRT2 if diagonal else 1.0
+        return cost
+
+    @staticmethod
+    def __astar(start, goal, expand, heuristic):
+        g = {start: 0.0}
+        parents = {start: None}
+        closed = set()
+        heap = [(heuristic(start), 0, start)]
+        counter = 1
+        while heap:
+            f, n, i = heapq.heappop(heap)
+            if i == goal:
+                path = []
+                while i is not None:
+                    path.append(i)
+                    i = parents[i]
+                path.reverse()
+                return path
+            if i in closed:
+                continue
+            closed.add(i)
+            cost = g[i]
+            for j, step in expand(i, parents[i]):
+                if j in closed:
+                    continue
+                newcost = cost + step
+                if newcost < g.get(j, float("inf")):
+                    g[j] = newcost
+                    parents[j] = i
+                    heapq.heappush(heap, (newcost + heuristic(j), counter, j))
+                    counter += 1
+        return None
+
+    def __grid_heuristic(self, goal, diagonal):
+        stride = self.__stride
+        gy, gx = divmod(goal, stride)
+        if diagonal:
+            def heuristic(i):
+                y, x = divmod(i, stride)
+                return octile(abs(x - gx), abs(y - gy))
+        else:
+            def heuristic(i):
+                y, x = divmod(i, stride)
+                return abs(x - gx) + abs(y - gy)
+        return heuristic
+
+    def __axial_heuristic(self, goal, diagonal):
+        axis = self.staggeraxis
+        index = self.staggerindex
+        gq, gr = to_axial(goal[0], goal[1], axis, index)
+        position = self.position
+        hexagonal = self.orientation == "hexagonal"
+        def heuristic(i):
+            x, y = position(i)
+            q, r = to_axial(x, y, axis, index)
+            dq = q - gq
+            dr = r - gr
+            if hexagonal:
+                return max(abs(dq), abs(dr), abs(dq + dr))
+            # steps along the two edge directions of the staggered lattice
+            if axis == "x":
+                m, n = dq + dr, -dr
+            else:
+                m, n = dq + dr, -dq
+            if diagonal:
+                return octile(abs(m), abs(n))
+            return abs(m) + abs(n)
+        return heuristic
+
+    def __jump_successors(self, i, parent, goal):
+        """ (jump point, cost) reached from i, neighbours pruned by the
+        direction from parent
+        """
+        walk = self.__walk
+        stride = self.__stride
+        if parent is None:
+            directions = [(j - i) for j, cost in self.__neighbours(i, True)]
+        else:
+            y, x = divmod(i, stride)
+            py, px = divmod(parent, stride)
+            dx = (x > px) - (x < px)
+            dy = (y > py) - (y < py)
+            dw = dy * stride
+            directions = []
+            if dx and dy:
+                if walk[i + dw]:
+                    directions.append(dw)
+                if walk[i + dx]:
+                    directions.append(dx)
+                if walk[i + dw] and walk[i + dx]:
+                    directions.append(dx + dw)
+            else:
+                # the step forward and the two sides
+                if dx:
+                    forward, side = dx, stride
+                else:
+                    forward, side = dw, 1
+                for sign in (side, -side):
+                    if walk[i + sign]:
+                        directions.append(sign)
+                        if walk[i + forward]:
+                            directions.append(forward + sign)
+                if walk[i + forward]:
+                    directions.append(forward)
+        result = []
+        for d in directions:
+            point = self.__jump(i + d, d, goal)
+            if point is not None:
+                y1, x1 = divmod(i, stride)
+                y2, x2 = divmod(point, stride)
+                result.append((point, octile(abs(x2 - x1), abs(y2 - y1))))
+        return result
+
+    def __jump(self, i, d, goal):
+        """ the next jump point from i going in direction d, or None
+        """
+        walk = self.__walk
+        stride = self.__stride
+        dx = (d + 1) % stride - 1
+        dw = d - dx
+        if dx and dw:
+            while True:
+                if not walk[i]:
+                    return None
+                if i == goal:
+                    return i
+                if self.__jump_straight(i + dx, dx, stride, goal) is not None or \
+                        self.__jump_straight(i + dw, dw, 1, goal) is not None:
+                    return i
+                if not (walk[i + dx] and walk[i + dw]):
+                    return None
+                i += d
+        return self.__jump_straight(i, d, stride if dx else 1, goal)
+
+    def __jump_straight(self, i, d, side, goal):
+        """ jump along d, side is the offset to the cells beside the line
+        """
+        walk = self.__walk
+        while True:
+            if not walk[i]:
+                return None
+            if i == goal:
+                return i
+            if (walk[i - side] and not walk[i - side - d]) or \
+                    (walk[i + side] and not walk[i + side - d]):
+                return i
+            i += d
+
+    def __fill_jumps(self, path):
+        """ every cell between consecutive jump points
+        """
+        stride = self.__stride
+        result = [path[0]]
+        for a, b in zip(path, path[1:]):
+            ay, ax = divmod(a, stride)
+            by, bx = divmod(b, stride)
+            step = ((bx > ax) - (bx < ax)) + ((by > ay) - (by < ay)) * stride
+            i = a
+            while i != b:
+                i += step
+                result.append(i)
+        return result
+
+
+# collision grid : its PathFinder, dropped with the grid
+_finders = weakref.WeakKeyDictionary()
+
+def path_finder(tiledmap, predicate = None, layers = None, objectgroups = None, objectpredicate = None):
+    """the PathFinder of a map's collision grid, see TiledMap.collision_grid
+
+    The finder and its component labels are cached as long as the
+    map's cached collision grid is.
+    rtype : PathFinder instance
+    """
+    collisiongrid = tiledmap.collision_grid(predicate, layers, objectgroups, objectpredicate)
+    finder = _finders.get(collisiongrid)
+    if finder is None:
+        finder = _finders[collisiongrid] = PathFinder.from_map(tiledmap, collisiongrid)
+    return finder
@@ -0,0 +1,292 @@
+# coding:utf-8
+
+# TMX library
+# Copyright (c) 2016 wboy <mrtop@126.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""=========================================
+Spatial index of map objects
+
+A uniform grid of square cells, every object is kept in the cells
+its bounding box overlaps. Bounds are axis aligned boxes in pixels,
+after the object's rotation, see object_bounds.
+========================================="""
+
+import math
+import heapq
+
+
+__all__ = ['SpatialIndex',
+           'object_bounds',
+           'object_size']
+
+
+def object_size(tiledobject):
+    """width and height of an object
+
+    Tile objects written without a size take the size of their tile,
+    the tile's own image in image collection tilesets.
+
+    :param tiledobject: TiledObject instance
+    :rtype (width, height)
+    """
+    width = tiledobject.width or 0
+    height = tiledobject.height or 0
+    tiledmap = tiledobject._tiledmap
+    if tiledobject.gid is None or (width and height) or tiledmap is None:
+        return (width, height)
+    tiledtile = tiledmap.get_tiledtile_by_gid(tiledobject.gid)
+    image = tiledtile.image if tiledtile is not None else None
+    if image is not None and image.width and image.height:
+        return (width or image.width, height or image.height)
+    tileset = tiledmap.get_tileset_by_gid(tiledobject.gid)
+    if tileset is None:
+        return (width, height)
+    return (width or tileset.tilewidth or 0, height or tileset.tileheight or 0)
+
+
+def object_bounds(tiledobject):
+    """axis aligned bounds of an object
+
+    Rectangles, ellipses and tile objects use their size, see
+    object_size, polygons and polylines their points; the shape is rotated
+    clockwise around (x, y) by rotation degrees. Tile objects are
+    aligned bottom-left, bottom-center on isometric maps.
+    The offsetx and offsety of the object's group are added.
+
+    :param tiledobject: TiledObject instance
+    :rtype (x1, y1, x2, y2)
+    """
+    x = tiledobject.x or 0
+    y = tiledobject.y or 0
+    parent = tiledobject._parent
+    if parent is not None:
+        x += getattr(parent, "offsetx", None) or 0
+        y += getattr(parent, "offsety", None) or 0
+    shape = tiledobject.polygon or tiledobject.polyline
+    rotation = tiledobject.rotation
+    if shape is None and not rotation and tiledobject.gid is None:
+        return (x, y, x + (tiledobject.width or 0), y + (tiledobject.height or 0))
+    if shape is not None and shape.positions:
+        points = shape.positions
+    else:
+        width, height = object_size(tiledobject)
+        if tiledobject.gid is not None:
+            left = 0
+            if tiledobject._tiledmap is not None and tiledobject._tiledmap.orientation == "isometric":
+                left = -width / 2.0
+            points = ((left, -height), (left + width, -height), (left + width, 0), (left, 0))
+        else:
+            points = ((0, 0), (width, 0), (width, height), (0, height))
+    if rotation:
+        radians = math.radians(rotation)
+        cos = math.cos(radians)
+        sin = math.sin(radians)
+        points = [(px * cos - py * sin, px * sin + py * cos) for px, py in points]
+    xs = [px for px, py in points]
+    ys = [py for px, py in points]
+    return (x + min(xs), y + min(ys), x + max(xs), y + max(ys))
+
+
+class SpatialIndex(object):
+    """ Uniform grid index of items with bounds
+
+    Items are any hashable values, TiledObject instances by default
+    with object_bounds. add, move and remove update the grid in place.
+
+    cellsize : width and height of a cell in pixels
+    """
+    def __init__(self, cellsize = 128, bounds = object_bounds):
+        if cellsize <= 0:
+            raise ValueError("cellsize must be positive: %r" % (cellsize,))
+        self.cellsize = cellsize
+        self.__getbounds = bounds
+        self.__cells = {}
+        # item : (bounds, cell range)
+        self.__items = {}
+        # extent of the cells in use, only grows
+        self.__extent = None
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __contains__(self, item):
+        return item in self.__items
+
+    def __iter__(self):
+        return iter(self.__items)
+
+    def __cellrange(self, bounds):
+        size = float(self.cellsize)
+        return (int(math.floor(bounds[0] / size)), int(math.floor(bounds[1] / size)),
+                int(math.floor(bounds[2] / size)), int(math.floor(bounds[3] / size)))
+
+    def add(self, item, bounds = None):
+        """ index item, bounds are computed when not given
+
+        An item already in the index is moved.
+        """
+        if item in self.__items:
+            self.remove(item)
+        if bounds is None:
+            bounds = self.__getbounds(item)
+        bounds = tuple(bounds)
+        cellrange = self.__cellrange(bounds)
+        cx1, cy1, cx2, cy2 = cellrange
+        cells = self.__cells
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cell = cells[cx, cy] = set()
+                cell.add(item)
+        self.__items[item] = (bounds, cellrange)
+        extent = self.__extent
+        if extent is None:
+            self.__extent = cellrange
+        elif cx1 < extent[0] or cy1 < extent[1] or cx2 > extent[2] or cy2 > extent[3]:
+            self.__extent = (min(cx1, extent[0]), min(cy1, extent[1]),
+                             max(cx2, extent[2]), max(cy2, extent[3]))
+
+    def remove(self, item):
+        """ drop item from the index
+
+        :raises: KeyError when item is not indexed
+        """
+        bounds, (cx1, cy1, cx2, cy2) = self.__items.pop(item)
+        cells = self.__cells
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                cell = cells[cx, cy]
+                cell.discard(item)
+                if not cell:
+                    del cells[cx, cy]
+
+    def move(self, item, bounds = None):
+        """ update item after its position, size, rotation or points changed
+        """
+        if bounds is None:
+            bounds = self.__getbounds(item)
+        bounds = tuple(bounds)
+        entry = self.__items.get(item)
+        if entry is not None and entry[1] == self.__cellrange(bounds):
+            # same cells, only the bounds changed
+            self.__items[item] = (bounds, entry[1])
+            return
+        self.add(item, bounds)
+
+    def bounds(self, item):
+        """ indexed bounds of item
+
+        rtype : (x1, y1, x2, y2)
+        """
+        return self.__items[item][0]
+
+    def clear(self):
+        self.__cells.clear()
+        self.__items.clear()
+        self.__extent = None
+
+    def query_rect(self, x1, y1, x2, y2):
+        """ items whose bounds intersect the rectangle, edges included
+
+        rtype : list
+        """
+        if x1 > x2:
+            x1, x2 = x2, x1
+        if y1 > y2:
+            y1, y2 = y2, y1
+        cx1, cy1, cx2, cy2 = self.__cellrange((x1, y1, x2, y2))
+        extent = self.__extent
+        if extent is None:
+            return []
+        cx1 = max(cx1, extent[0])
+        cy1 = max(cy1, extent[1])
+        cx2 = min(cx2, extent[2])
+        cy2 = min(cy2, extent[3])
+        cells = self.__cells
+        items = self.__items
+        if cx1 == cx2 and cy1 == cy2:
+            candidates = cells.get((cx1, cy1), ())
+        else:
+            candidates = set()
+            for cy in range(cy1, cy2 + 1):
+                for cx in range(cx1, cx2 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell:
+                        candidates.update(cell)
+        result = []
+        for item in candidates:
+            bounds = items[item][0]
+            if bounds[0] <= x2 and bounds[2] >= x1 and bounds[1] <= y2 and bounds[3] >= y1:
+                result.append(item)
+        return result
+
+    def query_point(self, x, y):
+        """ items whose bounds contain the point
+
+        rtype : list
+        """
+        return self.query_rect(x, y, x, y)
+
+    def nearest(self, x, y, count = 1, maxdistance = None):
+        """ the count items whose bounds are the closest to the point
+
+        The distance is 0 inside the bounds. Cells are searched in
+        rings around the point until no closer item can be found.
+
+        rtype : list of (distance, item), closest first
+        """
+        extent = self.__extent
+        if extent is None or count <= 0:
+            return []
+        size = self.cellsize
+        cx = int(math.floor(x / float(size)))
+        cy = int(math.floor(y / float(size)))
+        lastring = max(cx - extent[0], extent[2] - cx, cy - extent[1], extent[3] - cy, 0)
+        cells = self.__cells
+        items = self.__items
+        seen = set()
+        found = []
+        for ring in range(lastring + 1):
+            if ring == 0:
+                keys = ((cx, cy),)
+            else:
+                top = [(i, cy - ring) for i in range(cx - ring, cx + ring + 1)]
+                bottom = [(i, cy + ring) for i in range(cx - ring, cx + ring + 1)]
+                left = [(cx - ring, i) for i in range(cy - ring + 1, cy + ring)]
+                right = [(cx + ring, i) for i in range(cy - ring + 1, cy + ring)]
+                keys = top + bottom + left + right
+            for key in keys:
+                cell = cells.get(key)
+                if not cell:
+                    continue
+                for item in cell:
+                    if item in seen:
+                        continue
+                    seen.add(item)
+                    x1, y1, x2, y2 = items[item][0]
+                    dx = x1 - x if x < x1 else (x - x2 if x > x2 else 0)
+                    dy = y1 - y if y < y1 else (y - y2 if y > y2 else 0)
+                    distance = math.sqrt(dx * dx + dy * dy)
+                    if maxdistance is None or distance <= maxdistance:
+                        found.append((distance, id(item), item))
+            # everything outside the searched rings is at least this far
+            reach = ring * size
+            if maxdistance is not None and reach > maxdistance:
+                break
+            if len(found) >= count and heapq.nsmallest(count, found)[-1][0] <= reach:
+                break
+        return [(distance, item) for distance, key, item in heapq.nsmallest(count, found)]
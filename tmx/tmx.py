@@ -22,30 +22,59 @@ TMX Map Format (TiledMapEditor 0.17.0)
 ========================================="""
 
 import sys
-reload(sys)
-sys.setdefaultencoding('utf-8')
-
-
 import logging
 import six
 import os
-import json
-import base64
-import gzip
-import zlib
 import array
+import bisect
+import threading
 from itertools import chain, product
 from collections import defaultdict, namedtuple, OrderedDict
-#from xml.etree.ElementTree import *
-from ElementTree import *
 from six.moves import map
 
 
+class LazyModule(object):
+    """ a module imported on its first attribute access
+
+    the attributes read are kept on the LazyModule, later reads
+    are plain attribute lookups.
+    """
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, key):
+        if self.__module is None:
+            __import__(self.__name)
+            self.__module = sys.modules[self.__name]
+        value = getattr(self.__module, key)
+        setattr(self, key, value)
+        return value
+
+json = LazyModule("json")
+base64 = LazyModule("base64")
+zlib = LazyModule("zlib")
+# mmap and the backends are only needed once a file is read or written
+xmlbackend = LazyModule(__name__.rpartition(".")[0] + ".xmlbackend")
+# the vendored ElementTree, only needed once a map is written
+etree = LazyModule(__name__.rpartition(".")[0] + ".ElementTree")
+
+_numpy = []
+
+def get_numpy():
+    """ numpy, imported on the first call, or None when it is not installed
+    """
+    if not _numpy:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy.append(numpy)
+    return _numpy[0]
+
+# handlers are left to the application
 logger = logging.getLogger(__name__)
-streamHandler = logging.StreamHandler()
-streamHandler.setLevel(logging.INFO)
-logger.addHandler(streamHandler)
-logger.setLevel(logging.INFO)
+logger.addHandler(logging.NullHandler())
 
 
 __all__ = ['TiledObjectType',
@@ -53,6 +82,8 @@ __all__ = ['TiledObjectType',
            'TiledProperties',
            'TiledMap',
            'TiledTileset',
+           'TiledTilesetCache',
+           'tileset_cache',
            'TiledTileoffset',
            'TiledProperties',
            'TiledProperty',
@@ -64,6 +95,18 @@ __all__ = ['TiledObjectType',
            'TiledFrame',
            'TiledLayer',
            'TiledData',
+           'TiledGrid',
+           'TiledGridRow',
+           'TiledGridView',
+           'FLIPPED_HORIZONTALLY_FLAG',
+           'FLIPPED_VERTICALLY_FLAG',
+           'FLIPPED_DIAGONALLY_FLAG',
+           'GID_MASK',
+           'split_gids',
+           'join_gids',
+           'TiledCompression',
+           'compressions',
+           'register_compression',
            'TiledImagelayer',
            'TiledObjectgroup',
            'TiledObject',
@@ -71,34 +114,42 @@ __all__ = ['TiledObjectType',
            'TiledPolygon',
            'TiledPolyline']
 
-types = defaultdict(lambda: str)
+def to_text(value):
+    """cast an attribute to a string, strings are kept as they are
+    so unicode values don't depend on the default encoding
+    """
+    if isinstance(value, six.string_types):
+        return value
+    return str(value)
+
+types = defaultdict(lambda: to_text)
 types.update({
-    "version": str,
-    "orientation": str,
-    "renderorder": str,
+    "version": to_text,
+    "orientation": to_text,
+    "renderorder": to_text,
     "width": int,
     "height": int,
     "tilewidth": int,
     "tileheight": int,
     "hexsidelength": int,
-    "staggeraxis": str,
-    "staggerindex": str,
-    "backgroundcolor": str,
+    "staggeraxis": to_text,
+    "staggerindex": to_text,
+    "backgroundcolor": to_text,
     "nextobjectid": int,
     "firstgid": int,
-    "source": str,
-    "name": str,
+    "source": to_text,
+    "name": to_text,
     "spacing": int,
     "margin": int,
     "tilecount": int,
     "columns": int,
     "x": int,
     "y": int,
-    "format": str,
-    "trans": str,
+    "format": to_text,
+    "trans": to_text,
     "tile": int,
     "id": int,
-    "terrain" : str,
+    "terrain" : to_text,
     "probability": float,
     "tileid": int,
     "duration": int,
@@ -106,15 +157,15 @@ types.update({
     "visible": int,
     "offsetx": float,
     "offsety": float,
-    "encoding": str,
-    "compression": str,
+    "encoding": to_text,
+    "compression": to_text,
     "gid": int,
-    "color": str,
-    "draworder": str,
-    "type": str,
+    "color": to_text,
+    "draworder": to_text,
+    "type": to_text,
     "rotation": float,
-    "points": str,
-    "value": str,
+    "points": to_text,
+    "value": to_text,
 })
 
 typesdefaultvalue = defaultdict(lambda: str)
@@ -193,19 +244,406 @@ def get_class_node_name(classname):
             raise Exception
     return classtypesnodename[classname]
 
-def indent( elem, level=0):
-    i = "\n" + level*"  "
-    if len(elem):
-        if not elem.text or not elem.text.strip():
-            elem.text = i + "  "
-        for e in elem:
-            indent(e, level+1)
-        if not e.tail or not e.tail.strip():
-            e.tail = i
-    if level and (not elem.tail or not elem.tail.strip()):
-        elem.tail = i
+class IndentTable(object):
+    """ the newline and indent written before an element at each depth
+
+    The strings are built once per depth and reused.
+    IndentTable("", "") gives compact output.
+    """
+    def __init__(self, unit = "  ", newline = "\n"):
+        self.__unit = unit
+        self.__table = [newline]
+
+    def __getitem__(self, level):
+        table = self.__table
+        while len(table) <= level:
+            table.append(table[-1] + self.__unit)
+        return table[level]
+
+PRETTY_INDENTS = IndentTable()
+COMPACT_INDENTS = IndentTable("", "")
+
+def indent(elem, level = 0, indents = PRETTY_INDENTS):
+    """indent elem and its children in place, without recursion
+
+    Blank texts and tails are replaced, other texts are kept.
+    :param indents: IndentTable, COMPACT_INDENTS strips the blank texts
+    """
+    stack = [(elem, level, False)]
+    while stack:
+        e, level, last = stack.pop()
+        count = len(e)
+        if count:
+            if not e.text or not e.text.strip():
+                e.text = indents[level + 1]
+            stack.extend((child, level + 1, i == count - 1) for i, child in enumerate(e))
+        if level and (not e.tail or not e.tail.strip()):
+            e.tail = indents[level - 1] if last else indents[level]
     return elem
 
+# stands for a layer data array in the encoded json, see json_data_rows
+JSON_DATA_PLACEHOLDER = "\0tmx-data-%d\0"
+
+def json_data_rows(dic, indent):
+    """swap the layer data arrays of a map's dict for placeholder strings
+
+    The arrays are written one map row per line instead of
+    one gid per line the way json indents them.
+    :param dic: dict of TiledMap.write_json, changed in place
+    :param indent: json indent, None writes each array on a single line
+    rtype : dict, encoded placeholder : encoded array
+    """
+    datarows = {}
+    for layer in dic.get("layers") or []:
+        data = layer.get("data")
+        if type(data) is not list or not data:
+            continue
+        placeholder = JSON_DATA_PLACEHOLDER % len(datarows)
+        width = layer.get("width") or len(data)
+        if indent is None:
+            rows = "[" + ",".join([str(gid) for gid in data]) + "]"
+        else:
+            # data sits in map.layers[i].data, 3 levels below the top
+            inner = "\n" + " " * (indent * 4)
+            rows = ("[" + inner + ("," + inner).join([",".join([str(gid) for gid in data[i:i + width]])
+                                                     for i in range(0, len(data), width)])
+                    + "\n" + " " * (indent * 3) + "]")
+        datarows[json.dumps(placeholder)] = rows
+        layer["data"] = placeholder
+    return datarows
+
+def json_fill_rows(text, datarows, filled):
+    """put the arrays of json_data_rows back in place of their placeholders
+
+    :param text: encoded json, whole or a chunk of iterencode
+    :param datarows: dict of json_data_rows
+    :param filled: set, the placeholders found are added to it
+    rtype : string
+    """
+    rows = datarows.get(text)
+    if rows is not None:
+        filled.add(text)
+        return rows
+    if "tmx-data-" in text:
+        for placeholder, rows in datarows.items():
+            if placeholder in text:
+                text = text.replace(placeholder, rows)
+                filled.add(placeholder)
+    return text
+
+def json_check_rows(datarows, filled):
+    """raise ValueError when a layer data array was not put back
+    """
+    if len(filled) != len(datarows):
+        raise ValueError("{} layer data arrays were not written.".format(len(datarows) - len(filled)))
+
+def write_element(write, elem, level = 0, tail = None, encoding = "utf-8", indents = PRETTY_INDENTS):
+    """serialize elem indented the way indent() does, without changing elem
+
+    :param write: file object's write
+    :param level: indent level of elem
+    :param tail: written after elem unless elem has a tail text of its own
+    :param indents: IndentTable
+    """
+    stack = [iter(((elem, level, tail),))]
+    ends = []
+    while stack:
+        for e, level, tail in stack[-1]:
+            write_start_tag(write, e, encoding)
+            text = e.text
+            count = len(e)
+            if count and (not text or not text.strip()):
+                text = indents[level + 1]
+            if text or count:
+                write(">")
+                if text:
+                    write(etree._escape_cdata(text, encoding))
+                if count:
+                    stack.append(iter([(child, level + 1, indents[level] if i == count - 1 else indents[level + 1])
+                                       for i, child in enumerate(e)]))
+                    ends.append((e, level, tail))
+                    break
+                write("</" + e.tag + ">")
+            else:
+                write(" />")
+            write_tail(write, e, level, tail, encoding)
+        else:
+            stack.pop()
+            if ends:
+                e, level, tail = ends.pop()
+                write("</" + e.tag + ">")
+                write_tail(write, e, level, tail, encoding)
+
+def write_start_tag(write, elem, encoding = "utf-8"):
+    """write "<tag attr=..." of elem, the tag is left open
+    """
+    write("<" + elem.tag)
+    for key, value in elem.items():
+        write(" %s=\"%s\"" % (key, etree._escape_attrib(value, encoding)))
+
+def write_tail(write, elem, level, tail, encoding = "utf-8"):
+    """write the tail of elem, tail replaces a blank tail below the root
+    """
+    text = elem.tail
+    if level and (not text or not text.strip()):
+        text = tail
+    if text:
+        write(etree._escape_cdata(text, encoding))
+
+# array typecode of a 32-bit unsigned int, used to hold tile gids
+GID_TYPECODE = 'I' if array.array('I').itemsize == 4 else 'L'
+
+def gid_array(data):
+    """a uint32 array over native-endian uint32 bytes
+
+    return array.array
+    """
+    gids = array.array(GID_TYPECODE)
+    if six.PY2:
+        gids.fromstring(data)
+    else:
+        gids.frombytes(data)
+    return gids
+
+def gids_from_bytes(data):
+    """convert little-endian uint32 bytes to a uint32 gid array
+
+    The bytes are copied into the array as they are, swapped
+    on big-endian hosts; no list of ints is built.
+    return array.array
+    """
+    gids = gid_array(data)
+    if sys.byteorder == 'big':
+        gids.byteswap()
+    return gids
+
+def gids_to_list(gids):
+    """a list of ints from a uint32 gid array
+
+    Python 2 reads uint32 array items as long, they are
+    converted through a signed 64-bit array instead.
+    return list
+    """
+    if not six.PY2:
+        return gids.tolist()
+    numpy = get_numpy()
+    if numpy is not None:
+        return numpy.frombuffer(gids, dtype=numpy.uint32).astype(numpy.int64).tolist()
+    if array.array('l').itemsize >= 8:
+        return array.array('l', gids).tolist()
+    return [int(gid) for gid in gids]
+
+def gids_to_bytes(gids):
+    """pack a gid sequence into little-endian uint32 bytes
+
+    return bytes
+    """
+    if isinstance(gids, array.array) and gids.itemsize == 4 and sys.byteorder == 'little':
+        return gids.tostring() if six.PY2 else gids.tobytes()
+    numpy = get_numpy()
+    if numpy is not None:
+        return numpy.asarray(gids, dtype='<u4').tobytes()
+    data = array.array(GID_TYPECODE, gids)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    if six.PY2:
+        return data.tostring()
+    return data.tobytes()
+
+# Tiled keeps the flip flags of a tile in the top 3 bits of its gid
+FLIPPED_HORIZONTALLY_FLAG = 0x80000000
+FLIPPED_VERTICALLY_FLAG = 0x40000000
+FLIPPED_DIAGONALLY_FLAG = 0x20000000
+FLAGS_SHIFT = 29
+GID_MASK = 0x1FFFFFFF
+
+def split_gids(gids):
+    """split gids into tile gids and flip flags in one pass
+
+    The flags of a cell are its top 3 bits shifted down, 4 for
+    horizontal, 2 for vertical and 1 for diagonal flips.
+    Uses NumPy when it is available, otherwise layers without
+    flipped tiles are copied as they are and every distinct gid
+    is split once.
+    :param gids: uint32 array, TiledGrid.data, or a gid sequence
+    return (uint32 array of gids, bytearray of flags, one per cell)
+    """
+    numpy = get_numpy()
+    if numpy is not None:
+        if isinstance(gids, array.array) and gids.itemsize == 4:
+            data = numpy.frombuffer(gids, dtype=numpy.uint32)
+        else:
+            data = numpy.asarray(gids, dtype=numpy.uint32)
+        tiles = gid_array((data & GID_MASK).tobytes())
+        flags = bytearray((data >> FLAGS_SHIFT).astype(numpy.uint8).tobytes())
+        return tiles, flags
+    if not len(gids) or max(gids) <= GID_MASK:
+        return array.array(GID_TYPECODE, gids), bytearray(len(gids))
+    distinct = set(gids)
+    tiles = dict((gid, gid & GID_MASK) for gid in distinct)
+    flags = dict((gid, gid >> FLAGS_SHIFT) for gid in distinct)
+    return (array.array(GID_TYPECODE, map(tiles.__getitem__, gids)),
+            bytearray(map(flags.__getitem__, gids)))
+
+def join_gids(gids, flags):
+    """recombine tile gids and flip flags as split_gids returns them
+
+    return uint32 array of gids with the flags in their top 3 bits
+    """
+    if len(gids) != len(flags):
+        e = 'Flags length {} does not match {} gids.'.format(len(flags), len(gids))
+        raise ValueError(e)
+    numpy = get_numpy()
+    if numpy is not None:
+        if isinstance(gids, array.array) and gids.itemsize == 4:
+            data = numpy.frombuffer(gids, dtype=numpy.uint32)
+        else:
+            data = numpy.asarray(gids, dtype=numpy.uint32)
+        flags = numpy.frombuffer(bytes(bytearray(flags)), dtype=numpy.uint8)
+        shifted = (flags.astype(numpy.uint32) & 7) << FLAGS_SHIFT
+        return gid_array(((data & GID_MASK) | shifted).tobytes())
+    if not bytearray(flags).strip(b"\0"):
+        return array.array(GID_TYPECODE, [gid & GID_MASK for gid in gids])
+    return array.array(GID_TYPECODE, [(gid & GID_MASK) | ((flag & 7) << FLAGS_SHIFT)
+                                      for gid, flag in zip(gids, flags)])
+
+class TiledCompression(namedtuple("TiledCompression", ["name", "compress", "decompress", "levels"])):
+    """ A layer data compression codec
+
+    compress(data, level) : bytes, level None uses the codec's default level
+    decompress(data) : bytes
+    levels : (lowest, highest) compression level
+    """
+    __slots__ = ()
+
+# compression name : TiledCompression, see register_compression
+compressions = OrderedDict()
+
+def register_compression(name, compress, decompress, levels):
+    """add or replace the codec of a <data compression="..."> value
+    """
+    compressions[name] = TiledCompression(name, compress, decompress, levels)
+
+def get_compression(name):
+    """ rtype : TiledCompression
+    :raises: ValueError when name is not registered
+    """
+    codec = compressions.get(name)
+    if codec is None:
+        e = 'Compression type "{}" not supported.'.format(name)
+        raise ValueError(e)
+    return codec
+
+def compress_data(data, compression, level = None):
+    """compress layer data bytes, no compression returns data as it is
+
+    :param level: None for the codec's default level
+    :raises: ValueError on unknown compression or level out of range
+    """
+    if not compression:
+        return data
+    codec = get_compression(compression)
+    if level is not None and not codec.levels[0] <= level <= codec.levels[1]:
+        e = 'Compression level {} of "{}" not in {}..{}.'.format(level, compression, *codec.levels)
+        raise ValueError(e)
+    return codec.compress(data, level)
+
+def decompress_data(data, compression):
+    """decompress layer data bytes, no compression returns data as it is
+
+    :raises: ValueError on unknown compression
+    """
+    if not compression:
+        return data
+    return get_compression(compression).decompress(data)
+
+def _zlib_compress(data, level):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+    return compressor.compress(data) + compressor.flush()
+
+def _zlib_decompress(data):
+    return zlib.decompress(data)
+
+def _gzip_compress(data, level):
+    # wbits 31 : deflate with a gzip header and trailer
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level,
+                                  zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def _gzip_decompress(data):
+    # wbits 47 : gzip or zlib header, every gzip member is read
+    result = []
+    while data:
+        decompressor = zlib.decompressobj(47)
+        result.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return b"".join(result)
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        e = 'Compression type "zstd" needs the zstandard module.'
+        raise ValueError(e)
+    return zstandard
+
+def _zstd_compress(data, level):
+    return _zstandard().ZstdCompressor(level = 3 if level is None else level).compress(data)
+
+def _zstd_decompress(data):
+    return _zstandard().ZstdDecompressor().decompressobj().decompress(data)
+
+register_compression("zlib", _zlib_compress, _zlib_decompress, (0, 9))
+register_compression("gzip", _gzip_compress, _gzip_decompress, (0, 9))
+register_compression("zstd", _zstd_compress, _zstd_decompress, (1, 22))
+
+# the characters of csv layer data NumPy parses the way int() does
+CSV_CHARS = b"0123456789, \t\r\n"
+
+def csv_is_plain(text):
+    """True when text only holds digits, commas and whitespace
+    """
+    if not isinstance(text, bytes):
+        try:
+            text = text.encode("ascii")
+        except UnicodeError:
+            return False
+    return not text.translate(None, CSV_CHARS)
+
+def csv_to_gids(text, count = None):
+    """parse csv layer data to a gid list
+
+    Cells are separated by commas and/or newlines, a trailing comma
+    at the end of a row is fine. NumPy parses the whole text at once
+    when it is available, otherwise every distinct cell is parsed once.
+    NumPy stops quietly at a bad cell, so it is only used for text of
+    plain digits, anything else goes through int() and raises ValueError.
+    :param count: expected number of gids, the NumPy result is only
+                  used when it has that many
+    return list
+    """
+    numpy = get_numpy()
+    if numpy is not None and csv_is_plain(text):
+        gids = numpy.fromstring(text.replace(",", " "), dtype = numpy.int64, sep = " ")
+        # a cell too large for int64 is clamped
+        if (count is None or len(gids) == count) and not (len(gids) and
+                                                          gids.max() == numpy.iinfo(numpy.int64).max):
+            return gids.tolist()
+    cells = text.replace(",", " ").split()
+    ints = dict((cell, int(cell)) for cell in set(cells))
+    return list(map(ints.__getitem__, cells))
+
+def gids_to_csv(gids, width):
+    """format gids as csv rows of width cells
+
+    Every distinct gid is formatted once, rows are joined
+    with ",\n" the way Tiled writes them.
+    return string
+    """
+    strings = dict((gid, "%d" % gid) for gid in set(gids))
+    cells = list(map(strings.__getitem__, gids))
+    return ",\n".join([",".join(cells[i:i + width]) for i in range(0, len(cells), width)])
+
 def read_positions(text):
     """parse a text string of float tuples and return [(x,...),...]
     """
@@ -239,9 +677,9 @@ def format_value(value, typestr = None):
             return int(value)
         return value
     else:
-        if str(value).lower() == str(True).lower(): 
+        if six.text_type(value).lower() == str(True).lower(): 
             return True
-        elif str(value).lower() == str(False).lower():
+        elif six.text_type(value).lower() == str(False).lower():
             return True
         else:
             try:
@@ -253,6 +691,27 @@ def format_value(value, typestr = None):
             except:
                 return value
     
+def read_json_value(key, value):
+    """cast a json value to the type read_xml gives the attribute key
+
+    Numbers are kept as they are for numeric attributes, so a float
+    x or y is not truncated.
+    """
+    if value is None:
+        return None
+    caster = types[key]
+    if isinstance(value, bool):
+        if caster is to_text:
+            return str(value).lower()
+        return int(value)
+    if isinstance(value, (six.integer_types, float)):
+        if caster is to_text:
+            return "%s" % float_to_int(value)
+        return float_to_int(value)
+    if isinstance(value, six.string_types) and caster is not to_text:
+        return caster(value)
+    return value
+
 def convert_to_bool(text):
     """ Convert a few common variations of "true" and "false" to boolean
 
@@ -265,7 +724,7 @@ def convert_to_bool(text):
     except:
         pass
 
-    text = str(text).lower()
+    text = six.text_type(text).lower()
     if text == "true":
         return True
     if text == "yes":
@@ -303,24 +762,411 @@ class Enum(set):
 TiledObjectType = Enum(["NONE", "TILE", "RECTANGLE", "ELLIPSE", "POLYGON", "POLYLINE"])
 
 
+class TiledGrid(object):
+    """ Compact 2D gid grid
+
+    One contiguous uint32 buffer holding width * height gids in row order,
+    so gids with flip flags set fit as they are.
+    grid[y, x] reads or writes a gid, grid[y] returns a row view sharing
+    the buffer.
+    """
+    def __init__(self, width, height, data = None):
+        self.__width = width
+        self.__height = height
+        if data is None:
+            self.__data = array.array(GID_TYPECODE, [0]) * (width * height)
+        elif isinstance(data, array.array) and data.typecode == GID_TYPECODE:
+            self.__data = data
+        else:
+            self.__data = array.array(GID_TYPECODE, data)
+        if len(self.__data) != width * height:
+            e = 'Grid data length {} does not match {}x{}.'.format(len(self.__data), width, height)
+            raise ValueError(e)
+
+    @property
+    def width(self):
+        return self.__width
+
+    @property
+    def height(self):
+        return self.__height
+
+    @property
+    def data(self):
+        """ flat uint32 array shared by the grid and its rows
+        """
+        return self.__data
+
+    def __len__(self):
+        return self.__height
+
+    def __iter__(self):
+        for y in range(self.__height):
+            yield TiledGridRow(self, y)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            y, x = index
+            return self.__data[self.offset(x, y)]
+        return TiledGridRow(self, self.__check(index, self.__height))
+
+    def __setitem__(self, index, value):
+        y, x = index
+        self.__data[self.offset(x, y)] = value
+
+    def __eq__(self, other):
+        if isinstance(other, TiledGrid):
+            return (self.__width == other.width and self.__height == other.height
+                    and self.__data == other.data)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return "<TiledGrid %dx%d>" % (self.__width, self.__height)
+
+    def offset(self, x, y):
+        """ index of (x, y) in the flat buffer
+        """
+        return self.__check(y, self.__height) * self.__width + self.__check(x, self.__width)
+
+    def tolist(self):
+        """ rtype : list of row lists
+        """
+        w = self.__width
+        return [self.__data[i * w:(i + 1) * w].tolist() for i in range(self.__height)]
+
+    def row_data(self, y, x = 0, width = None):
+        """ a copy of width gids of row y from x, as a uint32 array
+        """
+        if width is None:
+            width = self.__width - x
+        start = y * self.__width + x
+        return self.__data[start:start + width]
+
+    def view(self, x, y, width, height):
+        """ a rectangle of the grid sharing its buffer
+
+        rtype : TiledGridView instance
+        """
+        self.check_region(x, y, width, height)
+        return TiledGridView(self, x, y, width, height)
+
+    def get_region(self, x, y, width, height):
+        """ a copy of a rectangle of the grid in a compact buffer,
+        one slice copied per row
+
+        rtype : TiledGrid instance
+        """
+        self.check_region(x, y, width, height)
+        data = self.__data
+        w = self.__width
+        if x == 0 and width == w:
+            return TiledGrid(width, height, data[y * w:(y + height) * w])
+        region = array.array(GID_TYPECODE)
+        for start in range(y * w + x, (y + height) * w, w):
+            region += data[start:start + width]
+        return TiledGrid(width, height, region)
+
+    def set_region(self, x, y, region):
+        """ copy region into the grid with its top-left at (x, y)
+
+        :param region: TiledGrid, TiledGridView or a list of row lists
+        """
+        rows = grid_rows(region)
+        width = len(rows[0]) if rows else 0
+        self.check_region(x, y, width, len(rows))
+        data = self.__data
+        w = self.__width
+        for j, row in enumerate(rows):
+            start = (y + j) * w + x
+            data[start:start + width] = row
+
+    def fill(self, x, y, width, height, gid):
+        """ set every gid of a rectangle
+        """
+        self.check_region(x, y, width, height)
+        data = self.__data
+        w = self.__width
+        row = array.array(GID_TYPECODE, [gid]) * width
+        for start in range(y * w + x, (y + height) * w, w):
+            data[start:start + width] = row
+
+    def blit(self, source, x = 0, y = 0, sx = 0, sy = 0, width = None, height = None, skipgid = None):
+        """ copy a rectangle of source to (x, y), clipped to both grids
+
+        :param source: TiledGrid or TiledGridView instance, may overlap this grid
+        :param sx, sy, width, height: rectangle of source, all of it by default
+        :param skipgid: gid of source left out, such as 0 for empty cells
+        rtype : (x, y, width, height) rectangle written
+        """
+        if width is None:
+            width = source.width - sx
+        if height is None:
+            height = source.height - sy
+        # clip to the source, then to this grid
+        if sx < 0:
+            width += sx; x -= sx; sx = 0
+        if sy < 0:
+            height += sy; y -= sy; sy = 0
+        if x < 0:
+            width += x; sx -= x; x = 0
+        if y < 0:
+            height += y; sy -= y; y = 0
+        width = min(width, source.width - sx, self.__width - x)
+        height = min(height, source.height - sy, self.__height - y)
+        if width <= 0 or height <= 0:
+            return (x, y, 0, 0)
+        rows = (source.row_data(sy + j, sx, width) for j in range(height))
+        if source is self or getattr(source, "grid", None) is self:
+            # rows are copies, read them all before writing over them
+            rows = list(rows)
+        data = self.__data
+        w = self.__width
+        for j, row in enumerate(rows):
+            start = (y + j) * w + x
+            if skipgid is not None:
+                row = array.array(GID_TYPECODE, [gid if gid != skipgid else old for gid, old
+                                                 in zip(row, data[start:start + width])])
+            data[start:start + width] = row
+        return (x, y, width, height)
+
+    def check_region(self, x, y, width, height):
+        """ raise IndexError when the rectangle is not inside the grid
+        """
+        if x < 0 or y < 0 or width < 0 or height < 0 or \
+                x + width > self.__width or y + height > self.__height:
+            e = 'grid region {},{} {}x{} out of {}x{}'.format(x, y, width, height,
+                                                            self.__width, self.__height)
+            raise IndexError(e)
+
+    @staticmethod
+    def __check(index, size):
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError("grid index out of range")
+        return index
+
+class TiledGridRow(object):
+    """ A row of a TiledGrid
+
+    Reads and writes go straight to the grid buffer, nothing is copied.
+    """
+    def __init__(self, grid, y):
+        self.__data = grid.data
+        self.__width = grid.width
+        self.__start = y * grid.width
+
+    def __len__(self):
+        return self.__width
+
+    def __iter__(self):
+        for i in range(self.__start, self.__start + self.__width):
+            yield self.__data[i]
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return [self.__data[self.__start + i] for i in range(*x.indices(self.__width))]
+        return self.__data[self.__start + self.__check(x)]
+
+    def __setitem__(self, x, value):
+        self.__data[self.__start + self.__check(x)] = value
+
+    def __eq__(self, other):
+        return self.tolist() == list(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "<TiledGridRow %r>" % self.tolist()
+
+    def tolist(self):
+        return self.__data[self.__start:self.__start + self.__width].tolist()
+
+    def __check(self, x):
+        if x < 0:
+            x += self.__width
+        if x < 0 or x >= self.__width:
+            raise IndexError("grid row index out of range")
+        return x
+
+
+class TiledGridView(object):
+    """ A rectangle of a TiledGrid
+
+    Strided over the grid buffer: reads and writes go straight
+    to the grid, view[y, x] is relative to the rectangle.
+    """
+    def __init__(self, grid, x, y, width, height):
+        self.grid = grid
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self.row_data(y).tolist()
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            y, x = index
+            return self.grid[self.y + self.__check(y, self.height), self.x + self.__check(x, self.width)]
+        return self.row_data(self.__check(index, self.height)).tolist()
+
+    def __setitem__(self, index, value):
+        y, x = index
+        self.grid[self.y + self.__check(y, self.height), self.x + self.__check(x, self.width)] = value
+
+    def __repr__(self):
+        return "<TiledGridView %d,%d %dx%d>" % (self.x, self.y, self.width, self.height)
+
+    def row_data(self, y, x = 0, width = None):
+        """ a copy of width gids of row y from x, as a uint32 array
+        """
+        if width is None:
+            width = self.width - x
+        return self.grid.row_data(self.y + y, self.x + x, width)
+
+    def tolist(self):
+        """ rtype : list of row lists
+        """
+        return list(self)
+
+    def copy(self):
+        """ rtype : TiledGrid instance, compact copy of the rectangle
+        """
+        return self.grid.get_region(self.x, self.y, self.width, self.height)
+
+    def fill(self, gid):
+        self.grid.fill(self.x, self.y, self.width, self.height, gid)
+
+    @staticmethod
+    def __check(index, size):
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError("grid view index out of range")
+        return index
+
+def grid_rows(region):
+    """ the rows of a region as uint32 arrays
+
+    :param region: TiledGrid, TiledGridView or a list of row lists
+    rtype : list of array
+    """
+    if isinstance(region, (TiledGrid, TiledGridView)):
+        return [region.row_data(y) for y in range(region.height)]
+    rows = [row if isinstance(row, array.array) and row.typecode == GID_TYPECODE
+            else array.array(GID_TYPECODE, row) for row in region]
+    if len(set(len(row) for row in rows)) > 1:
+        raise ValueError("region rows differ in length")
+    return rows
+
+
+class TiledSchema(object):
+    """ Precompiled read/write description of a BaseObject subclass
+
+    nodename : xml tag
+    attributes : xml attribute names, in the order __init__ assigns them
+    children : child object attribute names, in the order __init__ assigns them
+    casters : attribute name : type used to cast xml values
+    defaults : (attribute name, default value) pairs set by BaseObject.__init__
+    """
+    def __init__(self, nodename, attributes, children):
+        self.nodename = nodename
+        self.attributes = tuple(attributes)
+        self.children = tuple(children)
+        self.public = self.attributes + self.children
+        self.childset = frozenset(children)
+        self.casters = dict((key, types[key]) for key in attributes)
+        self.defaults = tuple((key, typesdefaultvalue[key]) for key in attributes
+                              if typesdefaultvalue.has_key(key))
+
+    def __repr__(self):
+        return "<TiledSchema %s %r %r>" % (self.nodename, self.attributes, self.children)
+
+def build_schema(cls):
+    """ build the TiledSchema of a BaseObject subclass
+
+    A throwaway subclass records the attributes __init__ assigns,
+    the ones with a known type are xml attributes, the others children.
+    """
+    assigned = []
+    def __setattr__(self, key, value):
+        if not key.startswith('_') and key not in assigned:
+            assigned.append(key)
+        object.__setattr__(self, key, value)
+    recorder = type(cls.__name__, (cls,), {"__setattr__": __setattr__, "_schema": None})
+    recorder(None, None)
+    attributes = [key for key in assigned if types.has_key(key)]
+    children = [key for key in assigned if not types.has_key(key)]
+    return TiledSchema(get_class_node_name(cls.__name__), attributes, children)
+
+
+class LazySchema(object):
+    """ class attribute building the TiledSchema of a class on first access
+
+    Subclasses share the schema of the Tiled* class they derive from.
+    """
+    def __get__(self, instance, cls):
+        for klass in cls.__mro__:
+            if klass.__name__ in classtypesnodename:
+                schema = build_schema(klass)
+                klass._schema = schema
+                return schema
+        raise AttributeError("%s has no TiledSchema" % cls.__name__)
+
+
+_setattr = object.__setattr__
+
 class BaseObject(object):
+    """ Base of the Tiled* classes
+
+    Classes with many instances (objects, properties, frames, tiles)
+    declare __slots__ for their public attributes, the others keep a __dict__.
+    Xml attributes unknown to the schema are kept in _extra
+    and written back after the known ones.
+    """
+    __slots__ = ("_tiledmap", "_parent", "_extra")
+
+    # TiledSchema of the class, built on first use
+    _schema = LazySchema()
+
     def __init__(self, tiledmap = None, parent=None):
         """ Initialize default value
         """
-        items = vars(self).items()
-        if items is not None:
-            for key, value in vars(self).items():
-                if key.startswith('_'):
-                    continue
-                if typesdefaultvalue.has_key(key):
-                    setattr(self, key, typesdefaultvalue[key])
-
-        self._tiledmap = tiledmap
-        self._parent = parent
+        schema = self._schema
+        # set past the __setattr__ of FreezableObject, new objects are not frozen
+        if schema is not None:
+            for key, value in schema.defaults:
+                _setattr(self, key, value)
+
+        _setattr(self, "_tiledmap", tiledmap)
+        _setattr(self, "_parent", parent)
+        _setattr(self, "_extra", None)
+
+    def __getattr__(self, key):
+        """ unknown xml attributes read as plain attributes
+        """
+        if not key.startswith('_'):
+            extra = self._extra
+            if extra is not None and key in extra:
+                return extra[key]
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, key))
 
     def __str__(self):
         try:
-            return tostring(self.write_xml())
+            return etree.tostring(self.write_xml())
         except:
             raise ValueError
 
@@ -335,28 +1181,72 @@ class BaseObject(object):
                            3, All Clear (public and protect and private)
         :rtype : BaseObject instance
         """
-        # all attr set None before read xml
-        items = vars(self).items()
-        if items is not None:
-            for key, value in vars(self).items():
-                if clearlevel == 0:
-                    return
-                elif clearlevel == 1:
-                    if key.startswith('_'): continue
-                elif clearlevel == 2:
-                    if key.startswith('__'): continue
-                setattr(self, key, None)
-
-        classname = self.__class__.__name__
-        classnodename = get_class_node_name(classname)
-        if classnodename != node.tag:
-            logger.error("classnodename != node.tag. classnodename:%s, node.tag:%s", classnodename, node.tag)
+        schema = self._schema
+        # all attr set None before read xml, past the __setattr__ of
+        # FreezableObject, which refuses the whole read when frozen
+        if clearlevel == 1:
+            for key in schema.public:
+                _setattr(self, key, None)
+        elif clearlevel >= 2:
+            for key in schema.public:
+                _setattr(self, key, None)
+            self._tiledmap = None
+            self._parent = None
+            if clearlevel >= 3:
+                for key in getattr(self, "__dict__", {}).keys():
+                    setattr(self, key, None)
+        _setattr(self, "_extra", None)
+
+        if schema.nodename != node.tag:
+            logger.error("classnodename != node.tag. classnodename:%s, node.tag:%s", schema.nodename, node.tag)
             raise Exception
+        casters = schema.casters
         for key, value in node.items():
-                casted_value = types[key](value)
-                setattr(self, key, casted_value)
+            caster = casters.get(key)
+            if caster is not None:
+                _setattr(self, key, caster(value))
+            else:
+                if self._extra is None:
+                    _setattr(self, "_extra", OrderedDict())
+                self._extra[key] = types[key](value)
+        return self
+
+    def read_json(self, dic):
+        """read the json attributes to self
+
+        Only attributes with a known type are read, child objects are read
+        by the subclasses.
+
+        :param dic: dict decoded from json
+        :rtype : BaseObject instance
+        """
+        schema = self._schema
+        for key in schema.public:
+            _setattr(self, key, None)
+        for key in schema.attributes:
+            if key in dic:
+                _setattr(self, key, read_json_value(key, dic[key]))
         return self
 
+    def _child_properties_read_json(self, dic, parent):
+        """read "properties" and "propertytypes" of dic
+
+        rtype : None or TiledProperties instance
+        """
+        if dic.get("properties"):
+            return TiledProperties(self._tiledmap, parent).read_json(dic)
+        return None
+
+    def _drop_json_defaults(self, defaults):
+        """set back to None the attributes write_json fills in when missing
+
+        :param defaults: dict of attribute name : value write_json uses
+        """
+        for key, value in defaults.items():
+            current = getattr(self, key, None)
+            if current is not None and current == value:
+                setattr(self, key, None)
+
     def write_xml(self, outattrorder = None):
         """write the attributes to xml
 
@@ -364,65 +1254,102 @@ class BaseObject(object):
                         None(default) is all attr is out
         :rtype : Element instance
         """
-        classname = self.__class__.__name__
-        element = Element(get_class_node_name(classname))
+        schema = self._schema
+        element = etree.Element(schema.nodename)
 
-        dictattr = self.__dict__;
         orderdictattr = OrderedDict()
-        if dictattr:
-            if outattrorder is None or not outattrorder:
-                keys = dictattr.keys()
-            else:
-                keys = outattrorder
-
-            for key in keys:
-                if key.startswith('_') or not dictattr.has_key(key):
-                    continue
-                value = dictattr[key]
-                if value is None : continue
-                if type(value) is list:
-                   element = self._child_list_attr_write_xml(element, value)
-                elif classtypesnodename.has_key(type(value).__name__):
-                    element = self._child_attr_write_xml(element, value)
+        childset = schema.childset
+        for key in outattrorder or schema.public:
+            value = getattr(self, key, None)
+            if value is None : continue
+            if key in childset:
+                if isinstance(value, list):
+                    element = self._child_list_attr_write_xml(element, value)
                 else:
+                    element = self._child_attr_write_xml(element, value)
+            else:
+                orderdictattr[key] = ("%s" % float_to_int(value))
+        if self._extra:
+            for key, value in self._extra.items():
+                if value is not None:
                     orderdictattr[key] = ("%s" % float_to_int(value))
         if orderdictattr:
             element.attrib = orderdictattr
         return element
 
+    def write_xml_stream(self, write, level = 0, tail = None):
+        """write the xml of self to write(), indented like indent()
+
+        :param write: file object's write
+        :param level: indent level
+        :param tail: text after the end tag, see write_element
+        """
+        write_element(write, self.write_xml(), level, tail, indents = self._indents())
+
+    def _indents(self):
+        """ IndentTable of the map's output, see TiledMap.pretty
+        """
+        if self._tiledmap is not None and not self._tiledmap.pretty:
+            return COMPACT_INDENTS
+        return PRETTY_INDENTS
+
+    def _write_xml_stream_children(self, write, element, children, level, tail):
+        """write element, then stream children one BaseObject at a time
+
+        :param element: Element of self without child elements
+        :param children: list of BaseObject, None items are skipped
+        """
+        indents = self._indents()
+        children = [child for child in children if child is not None]
+        if not children:
+            write_element(write, element, level, tail, indents = indents)
+            return
+        write_start_tag(write, element)
+        write(">" + indents[level + 1])
+        last = len(children) - 1
+        for i, child in enumerate(children):
+            if i == last:
+                child.write_xml_stream(write, level + 1, indents[level])
+            else:
+                child.write_xml_stream(write, level + 1, indents[level + 1])
+        write("</" + element.tag + ">")
+        write_tail(write, element, level, tail)
+
     def write_json(self):
         """write the attributes to json
 
         :rtype : string
         """
-        dictattr = self.__dict__;
-        if dictattr is None:
-            return None
-
+        schema = self._schema
+        childset = schema.childset
         dic = {}
-        for key, value in dictattr.items():
-            if key.startswith('_'):
-                continue
+        for key in schema.public:
+            value = getattr(self, key, None)
             if value is None : continue
-            if type(value) is list:
-                dic.update(self._child_list_attr_write_json(key, value))
-            elif classtypesnodename.has_key(type(value).__name__):
-                dic = self._child_attr_write_json(dic, value)
+            if key in childset:
+                if isinstance(value, list):
+                    dic.update(self._child_list_attr_write_json(key, value))
+                else:
+                    dic = self._child_attr_write_json(dic, value)
             else:
                 dic[key] = format_value(value)
+        if self._extra:
+            for key, value in self._extra.items():
+                if value is not None:
+                    dic[key] = format_value(value)
         if dic:
             return dic
         else:
             return None
 
     def _child_attr_read_xml(self, parentelement, type, parent):
-        childattrelement = parentelement.find(get_class_node_name(type.__name__))
+        childattrelement = parentelement.find(type._schema.nodename)
         if childattrelement is not None:
             return type(self._tiledmap, parent).read_xml(childattrelement)
         return None
 
     def _child_list_attr_read_xml(self, parentelement, type, parent):
-        childlistattrelement = parentelement.findall(get_class_node_name(type.__name__))
+        childlistattrelement = parentelement.findall(type._schema.nodename)
         if childlistattrelement is not None:
             ls = list()
             for childelement in childlistattrelement:
@@ -461,6 +1388,51 @@ class BaseObject(object):
         return {parentname : ls}
             
             
+class FreezableObject(BaseObject):
+    """ Base of the classes a tileset is made of
+
+    A frozen object is shared by several maps, see share_object:
+    setting or deleting its public attributes raises AttributeError.
+    """
+    __slots__ = ("_frozen",)
+
+    def __new__(cls, *args, **kwargs):
+        self = object.__new__(cls)
+        _setattr(self, "_frozen", False)
+        return self
+
+    def __setattr__(self, key, value):
+        if self._frozen and key[0] != '_':
+            self.__refuse(key)
+        _setattr(self, key, value)
+
+    def __delattr__(self, key):
+        if self._frozen and key[0] != '_':
+            self.__refuse(key)
+        object.__delattr__(self, key)
+
+    def read_xml(self, node, *args, **kwargs):
+        if self._frozen:
+            self.__refuse("read_xml")
+        return super(FreezableObject, self).read_xml(node, *args, **kwargs)
+
+    def read_json(self, dic):
+        if self._frozen:
+            self.__refuse("read_json")
+        return super(FreezableObject, self).read_json(dic)
+
+    def __setstate__(self, state):
+        # pickle sets the frozen flag among the other attributes
+        if not isinstance(state, tuple):
+            state = (state, None)
+        for attributes in state:
+            for key, value in (attributes or {}).items():
+                object.__setattr__(self, key, value)
+
+    def __refuse(self, key):
+        e = "{} is shared by several maps, '{}' can't be changed, see TiledTileset.unshare"
+        raise AttributeError(e.format(type(self).__name__, key))
+
 
 class TiledMap(BaseObject):
     """TileMap Data. Contains the layers, objects, images, and others
@@ -469,7 +1441,7 @@ class TiledMap(BaseObject):
 
     Can contain: properties, tileset, layer, objectgroup, imagelayer
     """
-    def __init__(self, filepath = None):
+    def __init__(self, filepath = None, lazy = False, streaming = False, mapped = False):
         self.version = "1.0"
         self.orientation= "orthogonal"
         self.renderorder = "right-down"
@@ -489,12 +1461,26 @@ class TiledMap(BaseObject):
 
         self.__encoding = None
         self.__compression = None
+        self.__compressionlevel = None
         self.__unfoldtsx = False
+        self.__pretty = True
+        self.__lazy = lazy
+        self.__gidindex = None
+        self.__spatialindex = None
+        self.__collisiongrids = {}
 
         self.__filepath = filepath
         if filepath:
-            elementTree = parse(filepath).getroot()
-            self.read_xml(elementTree)
+            if os.path.splitext(filepath)[1].lower() == ".json":
+                with open(filepath, "rb") as f:
+                    self.read_json(json.load(f))
+            elif mapped:
+                self.read_xml(xmlbackend.parse_mapped(filepath))
+            elif streaming:
+                self.read_xml_stream(filepath)
+            else:
+                elementTree = xmlbackend.get_xml_backend().parse(filepath)
+                self.read_xml(elementTree)
 
 
     def read_xml(self, node):
@@ -504,21 +1490,112 @@ class TiledMap(BaseObject):
         self.tilesets = self._child_list_attr_read_xml(node, TiledTileset, self)
         ls = []
         for child in node:
-            if child.tag == get_class_node_name(TiledLayer.__name__):
+            if child.tag == TiledLayer._schema.nodename:
                 tiledlayer = TiledLayer(self, self).read_xml(child)
                 if tiledlayer is not None:
                    ls.append(tiledlayer)
-            if child.tag == get_class_node_name(TiledImagelayer.__name__):
+            if child.tag == TiledImagelayer._schema.nodename:
                 tiledImagelayer = TiledImagelayer(self, self).read_xml(child)
                 if tiledImagelayer is not None:
                     ls.append(tiledImagelayer)
-            if child.tag == get_class_node_name(TiledObjectgroup.__name__):
+            if child.tag == TiledObjectgroup._schema.nodename:
                 tiledObjectgroup = TiledObjectgroup(self, self).read_xml(child)
                 if tiledObjectgroup is not None:
                     ls.append(tiledObjectgroup)
         if ls: self.layers = ls
         return self
 
+    def read_json(self, dic):
+        super(TiledMap, self).read_json(dic)
+        if isinstance(dic.get("version"), (six.integer_types, float)):
+            self.version = "%.1f" % dic["version"]
+        self.properties = self._child_properties_read_json(dic, self)
+        ls = [TiledTileset(self, self).read_json(item) for item in dic.get("tilesets") or []]
+        self.tilesets = ls or None
+        layertypes = {"tilelayer": TiledLayer,
+                      "imagelayer": TiledImagelayer,
+                      "objectgroup": TiledObjectgroup}
+        ls = []
+        for item in dic.get("layers") or []:
+            layertype = layertypes.get(item.get("type"))
+            if layertype is not None:
+                ls.append(layertype(self, self).read_json(item))
+        self.layers = ls or None
+        return self
+
+    def read_xml_stream(self, source):
+        """read the map with iterparse
+
+        Tilesets, layers and the objects of object groups are built as soon as
+        their end tag is parsed, then their elements are cleared,
+        so the whole ElementTree is never held in memory.
+        The gids of a layer's <tile> elements are collected as they are parsed.
+
+        :param source: file path or file object
+        :rtype : TiledMap instance
+        """
+        propertiesname = get_class_node_name(TiledProperties.__name__)
+        tilesetname = get_class_node_name(TiledTileset.__name__)
+        layername = get_class_node_name(TiledLayer.__name__)
+        imagelayername = get_class_node_name(TiledImagelayer.__name__)
+        objectgroupname = get_class_node_name(TiledObjectgroup.__name__)
+        objectname = get_class_node_name(TiledObject.__name__)
+        dataname = TiledData._schema.nodename
+        tilename = TiledData_Tile._schema.nodename
+
+        stack = []
+        ls = []
+        objectgroup = None
+        gids = []
+        for event, elem in xmlbackend.get_xml_backend().iterparse(source, ("start", "end")):
+            if event == "start":
+                if not stack:
+                    super(TiledMap, self).read_xml(elem)
+                    self.tilesets = []
+                elif len(stack) == 1 and elem.tag == objectgroupname:
+                    objectgroup = TiledObjectgroup(self, self)
+                    super(TiledObjectgroup, objectgroup).read_xml(elem)
+                    objectgroup.objects = []
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            if depth == 3 and elem.tag == tilename and stack[-1].tag == dataname:
+                gids.append(int(elem.get("gid", 0)))
+                del stack[-1][:]
+            elif depth == 2 and objectgroup is not None:
+                if elem.tag == objectname:
+                    objectgroup.objects.append(TiledObject(self, objectgroup).read_xml(elem))
+                elif elem.tag == propertiesname and objectgroup.properties is None:
+                    objectgroup.properties = TiledProperties(self, objectgroup).read_xml(elem)
+                elem.clear()
+                del stack[-1][:]
+            elif depth == 1:
+                if elem.tag == propertiesname and self.properties is None:
+                    self.properties = TiledProperties(self, self).read_xml(elem)
+                elif elem.tag == tilesetname:
+                    self.tilesets.append(TiledTileset(self, self).read_xml(elem))
+                elif elem.tag == layername:
+                    tiledlayer = TiledLayer(self, self).read_xml(elem)
+                    if gids and tiledlayer.data is not None:
+                        tiledlayer.data._read_xml_gids(gids)
+                    gids = []
+                    ls.append(tiledlayer)
+                elif elem.tag == imagelayername:
+                    ls.append(TiledImagelayer(self, self).read_xml(elem))
+                elif elem.tag == objectgroupname:
+                    if not objectgroup.objects:
+                        objectgroup.objects = None
+                    ls.append(objectgroup)
+                    objectgroup = None
+                elem.clear()
+                del stack[-1][:]
+
+        if not self.tilesets: self.tilesets = None
+        if ls: self.layers = ls
+        return self
+
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["version", "orientation", "renderorder", "width",
@@ -527,23 +1604,161 @@ class TiledMap(BaseObject):
                             "nextobjectid", "properties", "tilesets", "layers"]
         return super(TiledMap, self).write_xml(outattrorder)
 
+    def write_xml_stream(self, write, level = 0, tail = None):
+        element = self.write_xml(["version", "orientation", "renderorder", "width",
+                                  "height", "tilewidth", "tileheight", "hexsidelength",
+                                  "staggeraxis", "staggerindex", "backgroundcolor",
+                                  "nextobjectid"])
+        children = [self.properties] + (self.tilesets or []) + (self.layers or [])
+        self._write_xml_stream_children(write, element, children, level, tail)
+
     def get_tiledtile_by_gid(self, gid):
-        """ get TiledTile by gid
+        """ get TiledTile by gid, flip flags are ignored
         rtype : TiledTile instance
         """
-        firstgid = endgid = 0
-        length = len(self.tilesets)
-        for i in range(length):
-            tileset = self.tilesets[i]
-            firstgid = tileset.firstgid
-            if i >= length - 1 :
-                return tileset.get_tiledtile_by_id(gid - firstgid)
-            else:
-                endgid = self.tilesets[i + 1].firstgid
-                if firstgid <= gid and endgid > gid:
-                    return tileset.get_tiledtile_by_id(gid - firstgid)
+        gid &= GID_MASK
+        tileset = self.get_tileset_by_gid(gid)
+        if tileset is not None:
+            return tileset.get_tiledtile_by_id(gid - tileset.firstgid)
         return None
 
+    def get_tileset_by_gid(self, gid):
+        """ get the TiledTileset that gid belongs to
+
+        Binary search over the sorted firstgid of the tilesets,
+        flip flags are ignored.
+        rtype : TiledTileset instance
+        """
+        if not self.tilesets:
+            return None
+        firstgids, tilesets = self.__gid_index()
+        i = bisect.bisect_right(firstgids, gid & GID_MASK) - 1
+        if i < 0:
+            return None
+        return tilesets[i]
+
+    def invalidate_gid_index(self):
+        """ drop the gid lookup index
+
+        The index is rebuilt on the next lookup. Setting tilesets or
+        a firstgid drops it by itself; call this after changing the
+        tilesets list or tile ids in place.
+        """
+        self.__gidindex = None
+        if self.tilesets is not None:
+            for tileset in self.tilesets:
+                tileset.invalidate_tile_index()
+
+    def spatial_index(self, cellsize = None):
+        """ index of the objects of every object group, built on the first call
+
+        Objects added, moved or removed through the TiledObjectgroup
+        methods update it; call invalidate_spatial_index after replacing
+        layers or changing objects in place.
+
+        :param cellsize: grid cell size in pixels, 4 tiles by default,
+                         a different size rebuilds the index
+        rtype : SpatialIndex instance
+        """
+        from .spatial import SpatialIndex
+        if cellsize is None:
+            cellsize = self.__spatial_cellsize()
+        index = self.__spatialindex
+        if index is None or index.cellsize != cellsize:
+            index = SpatialIndex(cellsize)
+            for layer in self.layers or []:
+                if isinstance(layer, TiledObjectgroup):
+                    for tiledobject in layer.objects or []:
+                        index.add(tiledobject)
+            self.__spatialindex = index
+        return index
+
+    def built_spatial_index(self):
+        """ the spatial index when it was built, else None
+        """
+        return self.__spatialindex
+
+    def invalidate_spatial_index(self):
+        """ drop the spatial indexes of the map and its object groups
+
+        They are rebuilt on the next spatial_index() call.
+        """
+        self.__spatialindex = None
+        for layer in self.layers or []:
+            if isinstance(layer, TiledObjectgroup):
+                layer.invalidate_spatial_index()
+
+    def collision_grid(self, predicate = None, layers = None, objectgroups = None, objectpredicate = None):
+        """ the collision grid of the map, cached
+
+        See collision.build_collision_grid for the parameters, predicate
+        and objectpredicate are part of the cache key so pass the same
+        function objects to hit the cache. The grid is rebuilt when
+        layer data or object groups changed since, as told by their
+        revision(); call invalidate_collision_grids after changing
+        tilesets or tile properties.
+        rtype : CollisionGrid instance
+        """
+        from .collision import build_collision_grid
+        if layers is not None:
+            layers = frozenset(layers)
+        if objectgroups is not None and objectgroups is not True:
+            objectgroups = frozenset(objectgroups)
+        key = (predicate, layers, objectgroups, objectpredicate)
+        revisions = self.__layer_revisions()
+        cached = self.__collisiongrids.get(key)
+        if cached is not None and cached[0] == revisions:
+            return cached[1]
+        grid = build_collision_grid(self, predicate, layers, objectgroups, objectpredicate)
+        self.__collisiongrids[key] = (revisions, grid)
+        return grid
+
+    def invalidate_collision_grids(self):
+        """ drop the cached collision grids
+        """
+        self.__collisiongrids.clear()
+
+    def __layer_revisions(self):
+        revisions = [self.width, self.height, self.tilesets]
+        for layer in self.layers or []:
+            if isinstance(layer, TiledLayer):
+                revisions.append((layer, layer.data.revision() if layer.data is not None else None))
+            elif isinstance(layer, TiledObjectgroup):
+                revisions.append((layer, layer.revision(), len(layer.objects or ())))
+        return revisions
+
+    def __spatial_cellsize(self):
+        return max(self.tilewidth or 32, self.tileheight or 32) * 4
+
+    def __gid_index(self):
+        """ sorted firstgids and their tilesets, built on the first lookup
+        """
+        index = self.__gidindex
+        if index is None:
+            tilesets = sorted(self.tilesets, key=lambda tileset: tileset.firstgid)
+            firstgids = [tileset.firstgid for tileset in tilesets]
+            index = self.__gidindex = (firstgids, tilesets)
+        return index
+
+    def _drop_gid_index(self):
+        """ drop the gid lookup index only, see TiledTileset.firstgid
+        """
+        self.__gidindex = None
+
+    @property
+    def tilesets(self):
+        """ list of TiledTileset instance
+
+        Setting it drops the gid lookup index; call invalidate_gid_index
+        after changing the list in place.
+        """
+        return self.__tilesets
+
+    @tilesets.setter
+    def tilesets(self, value):
+        self.__tilesets = value
+        self.__gidindex = None
+
     @property
     def filepath(self):
         """ TileMap file path
@@ -566,7 +1781,7 @@ class TiledMap(BaseObject):
     def compression(self):
         """compression: 
         The compression used to compress the tile layer data. 
-        Tiled Qt supports "gzip" and "zlib".
+        Tiled Qt supports "gzip", "zlib" and "zstd".
         None : Keep the initial state
         """
         return self.__compression
@@ -575,6 +1790,19 @@ class TiledMap(BaseObject):
     def compression(self, value):
         self.__compression = value
 
+    @property
+    def compressionlevel(self):
+        """compressionlevel:
+        The level used to compress the tile layer data, see compressions.
+        None : the codec's default level, compressed layers are
+               written back as they were read
+        """
+        return self.__compressionlevel
+
+    @compressionlevel.setter
+    def compressionlevel(self, value):
+        self.__compressionlevel = value
+
     @property
     def unfoldtsx(self):
         """The unfoldtsx used to read .tsx file data.
@@ -585,12 +1813,43 @@ class TiledMap(BaseObject):
     def unfoldtsx(self, value):
         self.__unfoldtsx = value
 
+    @property
+    def pretty(self):
+        """The pretty used to indent the .tmx output.
+        True : one element per line, indented by depth
+        False : compact, no whitespace between elements
+        """
+        return self.__pretty
+
+    @pretty.setter
+    def pretty(self, value):
+        self.__pretty = value
+
+    @property
+    def lazy(self):
+        """The lazy used to delay decoding layer data.
+        True : keep csv/base64 layer data undecoded until
+               one_d_data() or two_d_data() is first called
+        False : decode every layer while reading
+        """
+        return self.__lazy
+
 
     @staticmethod
-    def read_tmx_xml(filepath):
+    def read_tmx_xml(filepath, lazy = False, streaming = False, mapped = False):
         """Read .tmx file
 
         :param filepath: string file's path
+        :param lazy: 
+                        True : decode layer data on first access
+                        False : decode layer data while reading
+        :param streaming: 
+                        True : read with iterparse, see read_xml_stream
+                        False : parse the whole ElementTree first
+        :param mapped: 
+                        True : memory-map the file, with lazy layer data
+                               stays in the mapping until it is decoded
+                        False : read the file
         :rtype TiledMap instance
         """
 
@@ -601,48 +1860,104 @@ class TiledMap(BaseObject):
             logger.error('file is not exit : %s', filepath)
             raise Exception
         if os.path.splitext(filepath)[1].lower() != ".tmx":
-            Logger.error('file is not .tmx file : %s', filepath)
+            logger.error('file is not .tmx file : %s', filepath)
             raise Exception
-        return TiledMap(filepath)
+        return TiledMap(filepath, lazy, streaming, mapped)
+
+    @staticmethod
+    def read_tmx_json(filepath, lazy = False):
+        """Read .json file written by write_tmx_json or Tiled
+
+        Plain array layer data is taken as it is, base64 layer data
+        goes through the same decoder as .tmx files.
+
+        :param filepath: string file's path
+        :param lazy: 
+                        True : decode base64 layer data on first access
+                        False : decode layer data while reading
+        :rtype TiledMap instance
+        """
+        if not filepath:
+            logger.error('file path is not null')
+            raise Exception
+        if not os.path.exists(filepath):
+            logger.error('file is not exit : %s', filepath)
+            raise Exception
+        if os.path.splitext(filepath)[1].lower() != ".json":
+            logger.error('file is not .json file : %s', filepath)
+            raise Exception
+        return TiledMap(filepath, lazy)
 
     @staticmethod
     def write_tmx_xml(tiledmap, filepath, 
                       encoding = None, compression = None,
-                      unfoldtsx = True):
+                      unfoldtsx = True, streaming = False, pretty = True,
+                      compressionlevel = None, raise_errors = False):
         """Read .tmx file
 
-        :param filepath: string file's path
+        :param filepath: string file's path, or a file object when streaming
         :param encoding: 
                         The encoding used to encode the tile layer data.
                         When used, it can be "xml" and "base64" and "csv" at the moment.
                         None : Keep the initial state
         :param compression: 
                         The compression used to compress the tile layer data. 
-                        Tiled Qt supports "gzip" and "zlib".
+                        Tiled Qt supports "gzip", "zlib" and "zstd".
                         None : Keep the initial state
         :param unfoldtsx:
                         The unfoldtsx used to read .tsx file data.
                         True : When tileset source is .tsx file. read .tsx file data,
                                and combine to out data
                         False : Keep the initial state
+        :param streaming:
+                        True : write the file as it is produced, without building
+                               the whole Element tree, see write_xml_stream
+                        False : build the Element tree, indent it, then write it
+        :param pretty:
+                        True : indent the output
+                        False : compact output for machine-only pipelines
+        :param compressionlevel:
+                        The level used to compress the tile layer data,
+                        e.g. 1 for previews, 9 for shipping builds.
+                        None : the codec's default level
+        :param raise_errors:
+                        True : let the exception of a failed write propagate
+                        False : log it and return False
         :rtype True or False
         """
         try:
             tiledmap.encoding = encoding
             tiledmap.compression = compression
+            tiledmap.compressionlevel = compressionlevel
             tiledmap.unfoldtsx = unfoldtsx
-            element = tiledmap.write_xml()
-            indent(element)
-            ElementTree(element).write(filepath, encoding="utf-8", xml_declaration="utf-8", method="xml")
-        except Exception,e:
-            logger.exception(e) 
+            tiledmap.pretty = pretty
+            if streaming:
+                if hasattr(filepath, "write"):
+                    file = filepath
+                else:
+                    file = open(filepath, "wb")
+                try:
+                    file.write("<?xml version='1.0' encoding='utf-8'?>\n")
+                    tiledmap.write_xml_stream(file.write)
+                finally:
+                    if file is not filepath:
+                        file.close()
+            else:
+                element = tiledmap.write_xml()
+                indent(element, indents = PRETTY_INDENTS if pretty else COMPACT_INDENTS)
+                xmlbackend.get_xml_backend().write(element, filepath, "utf-8")
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.exception(e)
             return False
         return True
 
     @staticmethod
     def write_tmx_json(tiledmap, filepath, 
                        encoding = None, compression = None,
-                       unfoldtsx = True):
+                       unfoldtsx = True, indent = 4, sort_keys = True,
+                       streaming = False, compressionlevel = None, raise_errors = False):
         """Read .tmx file
 
         :param filepath: string file's path
@@ -652,31 +1967,63 @@ class TiledMap(BaseObject):
                         None : Keep the initial state
         :param compression: 
                         The compression used to compress the tile layer data. 
-                        Tiled Qt supports "gzip" and "zlib".
+                        Tiled Qt supports "gzip", "zlib" and "zstd".
                         None : Keep the initial state
         :param unfoldtsx:
                         The unfoldtsx used to read .tsx file data.
                         True : When tileset source is .tsx file. read .tsx file data,
                                and combine to out data
                         False : Keep the initial state
+        :param indent:
+                        spaces per level, layer data arrays are written one
+                        map row per line
+                        None : compact, no whitespace at all
+        :param sort_keys: sort the keys of every object
+        :param streaming:
+                        True : write the chunks of json.JSONEncoder.iterencode
+                               as they are produced
+                        False : encode the whole document, then write it
+        :param compressionlevel: see write_tmx_xml
+        :param raise_errors: see write_tmx_xml
         :rtype True or False
         """
         try:
             tiledmap.encoding = encoding
             tiledmap.compression = compression
+            tiledmap.compressionlevel = compressionlevel
             tiledmap.unfoldtsx = unfoldtsx
             dic = tiledmap.write_json()
-            file = open(filepath, "wb")
-            file.write(json.dumps(dic, indent = 4, sort_keys = True))
-            file.flush()
-            file.close()
-        except Exception,e:
-            logger.exception(e) 
+            if indent is None:
+                separators = (",", ":")
+            else:
+                separators = (",", ": ")
+            datarows = json_data_rows(dic, indent)
+            encoder = json.JSONEncoder(indent = indent, separators = separators,
+                                       sort_keys = sort_keys)
+            filled = set()
+            with open(filepath, "wb") as file:
+                if streaming:
+                    chunks = []
+                    for chunk in encoder.iterencode(dic):
+                        chunks.append(json_fill_rows(chunk, datarows, filled))
+                        if len(chunks) >= 4096:
+                            file.write("".join(chunks))
+                            del chunks[:]
+                    json_check_rows(datarows, filled)
+                    file.write("".join(chunks))
+                else:
+                    text = json_fill_rows(encoder.encode(dic), datarows, filled)
+                    json_check_rows(datarows, filled)
+                    file.write(text)
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.exception(e)
             return False
         return True
 
 
-class TiledTileset(BaseObject):
+class TiledTileset(FreezableObject):
     """ Represents a Tiledset 
     <tileset>
     External tilesets are supported.  GID/ID's from Tiled are not guaranteed to
@@ -705,15 +2052,35 @@ class TiledTileset(BaseObject):
         self.terraintypes = None
         self.tiles = None
         self.image = None
+        self.__tileindex = None
+        self.__definition = None
+        self.__shared = False
+
+    @property
+    def firstgid(self):
+        """ first global tile id of the tileset, setting it drops the
+        gid lookup index of the map
+        """
+        return self.__firstgid
+
+    @firstgid.setter
+    def firstgid(self, value):
+        self.__firstgid = value
+        tiledmap = getattr(self, "_tiledmap", None)
+        if tiledmap is not None:
+            tiledmap._drop_gid_index()
 
     def read_xml(self, node):
         super(TiledTileset, self).read_xml(node)
+        self.__definition = None
+        self.__shared = False
         if self.source is not None and self.source[-4:].lower() == ".tsx":
             dirname = os.path.dirname(self._tiledmap.filepath)
             path = os.path.abspath(os.path.join(dirname, self.source))
-            path = unicode(path, 'utf-8')
-            node = parse(path).getroot()
-            super(TiledTileset, self).read_xml(node, False)
+            if not isinstance(path, six.text_type):
+                path = unicode(path, 'utf-8')
+            self.__share(tileset_cache.get(path))
+            return self
         self.tileoffset = self._child_attr_read_xml(node, TiledTileoffset, self)
         self.properties = self._child_attr_read_xml(node, TiledProperties, self)
         self.terraintypes = self._child_attr_read_xml(node, TiledTerraintypes, self)
@@ -739,7 +2106,7 @@ class TiledTileset(BaseObject):
         dic = super(TiledTileset, self).write_json()
         if not dic.has_key("margin"): dic["margin"] = 0
         if not dic.has_key("spacing"): dic["spacing"] = 0
-        del dic["tiles"]
+        dic.pop("tiles", None)
         if self.tiles is not None:
             tilepropvalue = {}
             tileproptype = {}
@@ -762,19 +2129,218 @@ class TiledTileset(BaseObject):
 
         return dic
 
+    def read_json(self, dic):
+        super(TiledTileset, self).read_json(dic)
+        self.__definition = None
+        self.__shared = False
+        if self.source is not None:
+            if self.source[-4:].lower() == ".tsx" and self._tiledmap.filepath:
+                dirname = os.path.dirname(self._tiledmap.filepath)
+                self.__share(tileset_cache.get(os.path.join(dirname, self.source)))
+            return self
+        self._drop_json_defaults({"spacing": 0, "margin": 0})
+        if "tileoffset" in dic:
+            self.tileoffset = TiledTileoffset(self._tiledmap, self).read_json(dic["tileoffset"])
+        self.properties = self._child_properties_read_json(dic, self)
+        if dic.get("terrains"):
+            self.terraintypes = TiledTerraintypes(self._tiledmap, self).read_json(dic)
+        if dic.get("image"):
+            self.image = TiledImage(self._tiledmap, self).read_json(dic)
+
+        tiles = dic.get("tiles") or {}
+        tileproperties = dic.get("tileproperties") or {}
+        tilepropertytypes = dic.get("tilepropertytypes") or {}
+        ls = []
+        for id in sorted(set(tiles) | set(tileproperties), key=int):
+            tiledic = dict(tiles.get(id) or {})
+            tiledic["id"] = int(id)
+            if id in tileproperties:
+                tiledic["properties"] = tileproperties[id]
+                tiledic["propertytypes"] = tilepropertytypes.get(id) or {}
+            ls.append(TiledTile(self._tiledmap, self).read_json(tiledic))
+        self.tiles = ls or None
+        return self
+
+    @property
+    def definition(self):
+        """ The shared TiledTileset read from the .tsx file
+
+        None when the tileset is embedded in the map.
+        """
+        return self.__definition
+
+    def __share(self, definition):
+        """ take the .tsx content from the cached definition
+
+        Child objects are shared with every map using the same .tsx file,
+        not copied; they are read-only, see unshare.
+        """
+        self.__definition = definition
+        self.__shared = True
+        for key in ("name", "tilewidth", "tileheight", "spacing", "margin",
+                    "tilecount", "columns", "tileoffset", "properties",
+                    "terraintypes", "tiles", "image"):
+            setattr(self, key, getattr(definition, key))
+
+    def unshare(self):
+        """ give the tileset its own copy of the .tsx content to edit
+
+        The tiles, properties, terrains, image and tileoffset of a .tsx
+        file are shared by every map using it and raise on changes.
+        The copy only belongs to this map, edits are not written back
+        to the .tsx file.
+        rtype : TiledTileset instance, self
+        """
+        if not self.__shared:
+            return self
+        copy = TiledTileset(self._tiledmap, self._parent).read_xml(self.__definition.write_xml())
+        for key in ("tileoffset", "properties", "terraintypes", "tiles", "image"):
+            value = getattr(copy, key)
+            for child in (value if isinstance(value, list) else [value]):
+                if child is not None:
+                    child._parent = self
+            setattr(self, key, value)
+        self.__shared = False
+        self.__tileindex = None
+        return self
+
+    @property
+    def shared(self):
+        """ True while the .tsx content is shared with other maps
+        """
+        return self.__shared
+
     def get_tiledtile_by_id(self, id):
         """ get tiledtile by id
 
         rtype : TiledTile instance
         """
-        if self.tiles is not None:
-            for tile in self.tiles:
-                if tile.id == id:
-                    return tile
-        return None
+        if self.tiles is None:
+            return None
+        if self.__definition is not None and self.tiles is self.__definition.tiles:
+            return self.__definition.get_tiledtile_by_id(id)
+        index = self.__tileindex
+        if index is None or index[0] is not self.tiles or index[1] != len(self.tiles):
+            tiles = dict((tile.id, tile) for tile in reversed(self.tiles))
+            index = self.__tileindex = (self.tiles, len(self.tiles), tiles)
+        return index[2].get(id)
+
+    def invalidate_tile_index(self):
+        """ drop the tile id lookup index, rebuilt on the next lookup
+        """
+        self.__tileindex = None
+
+
+class TiledTilesetCache(object):
+    """ Cache of parsed external .tsx tilesets
+
+    Entries are keyed by absolute path and are re-read when the file's
+    mtime or size changes. The least recently used entry is dropped once
+    maxsize is reached. Safe to use from several threads.
+
+    Cached tilesets are shared between maps and frozen, see
+    FreezableObject: setting a public attribute of them or their
+    children raises AttributeError, changing their lists raises
+    TypeError. Their children belong to no map, _parent leads to the
+    cached tileset and _tiledmap is None. TiledTileset.unshare gives
+    a map its own copy to edit, parented to the map's tileset.
+    """
+    def __init__(self, maxsize = 128):
+        self.__maxsize = maxsize
+        self.__entries = OrderedDict()
+        self.__lock = threading.RLock()
+
+    @property
+    def maxsize(self):
+        return self.__maxsize
+
+    @maxsize.setter
+    def maxsize(self, value):
+        with self.__lock:
+            self.__maxsize = value
+            self.__trim()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self.__entries
+
+    def get(self, path):
+        """ get the tileset of a .tsx file, parsing it when needed
+
+        :param path: string .tsx file's path
+        :rtype TiledTileset instance
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime, stat.st_size)
+        with self.__lock:
+            entry = self.__entries.pop(path, None)
+            if entry is not None and entry[0] == stamp:
+                self.__entries[path] = entry
+                return entry[1]
+
+        tileset = TiledTileset(None, None).read_xml(xmlbackend.get_xml_backend().parse(path))
+        share_object(tileset)
+
+        with self.__lock:
+            self.__entries[path] = (stamp, tileset)
+            self.__trim()
+        return tileset
+
+    def invalidate(self, path = None):
+        """ drop one .tsx file from the cache, or all of them when path is None
+        """
+        with self.__lock:
+            if path is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(os.path.abspath(path), None)
+
+    def __trim(self):
+        while len(self.__entries) > max(self.__maxsize, 0):
+            self.__entries.popitem(last = False)
+
+tileset_cache = TiledTilesetCache()
 
 
-class TiledTileoffset(BaseObject):
+class SharedList(list):
+    """ child list of a shared object, see share_object
+
+    Reads like a list, changing it raises TypeError.
+    """
+    __slots__ = ()
+
+    def __refuse(self, *args, **kwargs):
+        raise TypeError("list shared by several maps can't be changed, see TiledTileset.unshare")
+
+    __setitem__ = __delitem__ = __setslice__ = __delslice__ = __refuse
+    __iadd__ = __imul__ = __refuse
+    append = extend = insert = pop = remove = reverse = sort = __refuse
+
+    def __reduce__(self):
+        return (SharedList, (list(self),))
+
+def share_object(obj):
+    """ freeze obj and its child objects, in place
+
+    Child lists become SharedList; private attributes such as lookup
+    indexes can still be set.
+    """
+    for key in obj._schema.children:
+        value = getattr(obj, key, None)
+        if isinstance(value, list):
+            for child in value:
+                if isinstance(child, FreezableObject):
+                    share_object(child)
+            setattr(obj, key, SharedList(value))
+        elif isinstance(value, FreezableObject):
+            share_object(value)
+    obj._frozen = True
+
+
+class TiledTileoffset(FreezableObject):
     """ Represents a Tileoffset 
     <tileoffset>
     This element is used to specify an offset in pixels, 
@@ -794,7 +2360,7 @@ class TiledTileoffset(BaseObject):
     def write_json(self):
         return {"tileoffset" : super(TiledTileoffset, self).write_json()}
 
-class TiledProperties(BaseObject):
+class TiledProperties(FreezableObject):
     """ Properties
     <properties>
 
@@ -810,6 +2376,23 @@ class TiledProperties(BaseObject):
         self.properties = self._child_list_attr_read_xml(node, TiledProperty, self)
         return self
 
+    def read_json(self, dic):
+        """ read "properties" and "propertytypes" of the owner's dict
+        """
+        super(TiledProperties, self).read_json(dic)
+        propertytypes = dic.get("propertytypes") or {}
+        ls = []
+        for name, value in sorted((dic.get("properties") or {}).items()):
+            tiledproperty = TiledProperty(self._tiledmap, self)
+            tiledproperty.name = name
+            tiledproperty.type = propertytypes.get(name)
+            if tiledproperty.type == "string":
+                tiledproperty.type = None
+            tiledproperty.value = read_json_value("value", value)
+            ls.append(tiledproperty)
+        self.properties = ls or None
+        return self
+
     def write_json(self):
         result = None
         propertiesjson = {}
@@ -825,11 +2408,12 @@ class TiledProperties(BaseObject):
             return {"properties":propertiesjson, "propertytypes" : propertytypesjson,}
         return None
 
-class TiledProperty(BaseObject):
+class TiledProperty(FreezableObject):
     """ Property
     <Property>
     """
-    
+    __slots__ = ("name", "type", "value")
+
     def __init__(self, tiledmap, parent):
         self.name = None
         self.type = None
@@ -840,7 +2424,7 @@ class TiledProperty(BaseObject):
             outattrorder = ["name", "type", "value"]
         return super(TiledProperty, self).write_xml(outattrorder)
 
-class TiledTerraintypes(BaseObject):
+class TiledTerraintypes(FreezableObject):
     """ Represents a Terraintypes
     <terraintypes>
 
@@ -855,7 +2439,15 @@ class TiledTerraintypes(BaseObject):
         self.terrains = self._child_list_attr_read_xml(node, TiledTerrain, self)
         return self
 
-class TiledTerrain(BaseObject):
+    def read_json(self, dic):
+        """ read "terrains" of the tileset's dict
+        """
+        super(TiledTerraintypes, self).read_json(dic)
+        ls = [TiledTerrain(self._tiledmap, self).read_json(item) for item in dic.get("terrains") or []]
+        self.terrains = ls or None
+        return self
+
+class TiledTerrain(FreezableObject):
     """ Represents a Terrain
     <terrain>
 
@@ -871,13 +2463,18 @@ class TiledTerrain(BaseObject):
         super(TiledTerrain, self).read_xml(node)
         self.properties = self._child_attr_read_xml(node, TiledProperties, self)
         return self
+
+    def read_json(self, dic):
+        super(TiledTerrain, self).read_json(dic)
+        self.properties = self._child_properties_read_json(dic, self)
+        return self
     
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["name", "tile", "properties"]
         return super(TiledTerrain, self).write_xml(outattrorder)
 
-class TiledTile(BaseObject):
+class TiledTile(FreezableObject):
     """ Represents a Tile
     <tile>
 
@@ -889,6 +2486,8 @@ class TiledTile(BaseObject):
                  objectgroup (since 0.10),
                  animation (since 0.10)
     """
+    __slots__ = ("id", "terrain", "probability", "properties", "image", "animation")
+
     def __init__(self, tiledmap, parent):
         self.id = None
         self.terrain = None
@@ -905,6 +2504,21 @@ class TiledTile(BaseObject):
         self.animation = self._child_attr_read_xml(node, TiledAnimation, self)
         return self
 
+    def read_json(self, dic):
+        """ read the tile's dict, "properties" and "propertytypes"
+        are moved in from the tileset's "tileproperties"
+        """
+        terrain = dic.get("terrain")
+        super(TiledTile, self).read_json(dic)
+        if terrain is not None:
+            self.terrain = ",".join("" if i == -1 else "%s" % i for i in terrain)
+        self.properties = self._child_properties_read_json(dic, self)
+        if dic.get("image"):
+            self.image = TiledImage(self._tiledmap, self).read_json(dic)
+        if dic.get("animation"):
+            self.animation = TiledAnimation(self._tiledmap, self).read_json(dic)
+        return self
+
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["id", "terrain", "probability", "properties",
@@ -933,7 +2547,7 @@ class TiledTile(BaseObject):
         return {("%s" % self.id) : dic}
 
 
-class TiledImage(BaseObject):
+class TiledImage(FreezableObject):
     """ Represents a Image 
     <image>
 
@@ -954,13 +2568,24 @@ class TiledImage(BaseObject):
                             "source"]
         return super(TiledImage, self).write_xml(outattrorder)
 
+    def read_json(self, dic):
+        """ read "image", "imagewidth", "imageheight" and "transparentcolor"
+        of the owner's dict
+        """
+        super(TiledImage, self).read_json({})
+        self.source = dic.get("image")
+        self.trans = dic.get("transparentcolor")
+        self.width = read_json_value("width", dic.get("imagewidth"))
+        self.height = read_json_value("height", dic.get("imageheight"))
+        return self
+
     def write_json(self):
         dic = { "image" : self.source }
         if self.trans is not None:
             dic["transparentcolor"] = self.trans
         return dic
 
-class TiledAnimation(BaseObject):
+class TiledAnimation(FreezableObject):
     """ Represents a Animation 
     <animation>
 
@@ -977,19 +2602,29 @@ class TiledAnimation(BaseObject):
         self.frames = self._child_list_attr_read_xml(node, TiledFrame, self)
         return self
 
+    def read_json(self, dic):
+        """ read "animation" of the tile's dict
+        """
+        super(TiledAnimation, self).read_json(dic)
+        ls = [TiledFrame(self._tiledmap, self).read_json(item) for item in dic.get("animation") or []]
+        self.frames = ls or None
+        return self
+
     def write_json(self):
         dic = {}
         if self.frames is not None:
             dic.update(self._child_list_attr_write_json("animation", self.frames))
         return dic
 
-class TiledFrame(BaseObject):
+class TiledFrame(FreezableObject):
     """ Represents a Frame 
     <frame>
     """
+    __slots__ = ("tileid", "duration")
+
     def __init__(self, tiledmap, parent):
-        tileid = None
-        duration = None
+        self.tileid = None
+        self.duration = None
         super(TiledFrame, self).__init__(tiledmap, parent)
 
     def write_xml(self, outattrorder = None):
@@ -1028,6 +2663,14 @@ class TiledLayer(BaseObject):
         self.data = self._child_attr_read_xml(node, TiledData, self)
         return self
 
+    def read_json(self, dic):
+        super(TiledLayer, self).read_json(dic)
+        self._drop_json_defaults({"name": "", "x": 0, "y": 0, "opacity": 1, "visible": True})
+        self.properties = self._child_properties_read_json(dic, self)
+        if dic.get("data") is not None:
+            self.data = TiledData(self._tiledmap, self).read_json(dic)
+        return self
+
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["name", "x", "y", "width",
@@ -1035,6 +2678,12 @@ class TiledLayer(BaseObject):
                             "offsety", "properties", "data"]
         return super(TiledLayer, self).write_xml(outattrorder)
 
+    def write_xml_stream(self, write, level = 0, tail = None):
+        element = self.write_xml(["name", "x", "y", "width",
+                                  "height", "opacity", "visible", "offsetx",
+                                  "offsety"])
+        self._write_xml_stream_children(write, element, [self.properties, self.data], level, tail)
+
     def write_json(self):
         dic = super(TiledLayer, self).write_json()
         dic["type"] = "tilelayer"
@@ -1059,7 +2708,7 @@ class TiledData(BaseObject):
             When used, it can be "base64" and "csv" at the moment.
     compression: 
             The compression used to compress the tile layer data. 
-            Tiled Qt supports "gzip" and "zlib".
+            Tiled Qt supports "gzip", "zlib" and "zstd".
 
     Can contain: tile
     """
@@ -1070,30 +2719,92 @@ class TiledData(BaseObject):
         self.__datasrc = None
         self.__one_d_data = None
         self.__two_d_data = None
-        self.__tiles = None
+        self.__xmltiles = False
+        self.__decoded = True
+        self.__edited = False
+        self.__revision = 0
 
     def read_xml(self, node):
+        """ read the data, the gids of <tile> elements go straight
+        to the one d data, no TiledData_Tile is kept per tile
+        """
         super(TiledData, self).read_xml(node)
         self.__datasrc = node.text
-        if self.__datasrc is not None and self.__datasrc.strip():
-            self.__one_d_data = self.__data_decode(self.__datasrc, self.encoding, self.compression)
-        self.__tiles = self._child_list_attr_read_xml(node, TiledData_Tile, self) 
-        if self.__tiles is not None:
-            self.__one_d_data = self.__data_decode(self.__tiles, "xml", self.compression)
-        self.__two_d_data = self.__one_d_change_two_d(self.__one_d_data)
+        self.__one_d_data = None
+        self.__two_d_data = None
+        self.__xmltiles = False
+        self.__decoded = False
+        self.__edited = False
+        self.__revision += 1
+        tiles = node.findall("tile")
+        if tiles:
+            self._read_xml_gids(self.__data_decode(tiles, "xml"))
+        elif self._tiledmap is None or not self._tiledmap.lazy:
+            self.__decode()
         return self
 
+    def _read_xml_gids(self, gids):
+        """ set the gids of the <tile> elements, see TiledMap.read_xml_stream
+
+        They are written back as <tile> elements when the encoding is kept.
+        Only the grid's uint32 buffer is kept, one_d_data() lists it on demand.
+        """
+        self.__xmltiles = True
+        self.__one_d_data = None
+        self.__two_d_data = self.__one_d_change_two_d(gids)
+        self.__decoded = True
+        self.__edited = False
+        self.__revision += 1
+
+    def read_json(self, dic):
+        """ read "data", "encoding" and "compression" of the layer's dict
+
+        A base64 string goes through the same decoder as .tmx data,
+        a plain array is taken as the gids and written back as csv.
+        """
+        super(TiledData, self).read_json(dic)
+        data = dic.get("data")
+        self.__xmltiles = False
+        self.__edited = False
+        self.__revision += 1
+        self.__one_d_data = None
+        self.__two_d_data = None
+        if isinstance(data, six.string_types):
+            self.__datasrc = data
+            self.__decoded = False
+            if self._tiledmap is None or not self._tiledmap.lazy:
+                self.__decode()
+        else:
+            self.encoding = "csv"
+            self.compression = None
+            self.__datasrc = None
+            self.__one_d_data = data
+            self.__two_d_data = self.__one_d_change_two_d(data)
+            self.__decoded = True
+        return self
+
+    def __decode(self):
+        """ decode datasrc to one d and two d data
+        """
+        datasrc = self.datasrc()
+        if datasrc is not None and datasrc.strip():
+            data = self.__data_decode(datasrc, self.encoding, self.compression)
+            self.__two_d_data = self.__one_d_change_two_d(data)
+            # a uint32 array becomes the grid's buffer, one_d_data() lists it on demand
+            self.__one_d_data = None if isinstance(data, array.array) else data
+        else:
+            self.__two_d_data = self.__one_d_change_two_d(self.__one_d_data)
+        self.__decoded = True
+
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["encoding", "compression"]
         element = super(TiledData, self).write_xml(outattrorder)
 
-        if (self._tiledmap.encoding is None and self._tiledmap.compression is None):
-            element.text = self.__datasrc
-            element = self._child_list_attr_write_xml(element, self.__tiles)
-        elif (self._tiledmap.encoding == self.encoding and self._tiledmap.compression == self.compression):
-            element.text = self.__datasrc
-            element = self._child_list_attr_write_xml(element, self.__tiles)
+        if self.__keeps_source():
+            element.text = self.datasrc()
+            if self.__xmltiles:
+                element = self.__data_encode_xml(self.__gids(), element)
         else:
             encoding = self._tiledmap.encoding
             if encoding is None:
@@ -1105,23 +2816,62 @@ class TiledData(BaseObject):
                 compression = self.compression
             else:
                 element.set("compression", compression)
-            element = self.__data_encode_xml(self.__one_d_data, element, encoding, compression)
+            element = self.__data_encode_xml(self.__gids(), element, encoding, compression)
         return element
 
+    def write_xml_stream(self, write, level = 0, tail = None):
+        """ write like write_xml, gids put out as <tile> elements are
+        written as text in chunks instead of one Element per tile
+        """
+        if not self.__writes_tiles() or not self.__gids():
+            super(TiledData, self).write_xml_stream(write, level, tail)
+            return
+        element = etree.Element(self._schema.nodename)
+        write_start_tag(write, element)
+        write(">")
+        indents = self._indents()
+        line = indents[level + 1] + "<tile gid=\"%s\" />"
+        data = self.__gids()
+        for i in range(0, len(data), 4096):
+            write("".join([line % gid for gid in data[i:i + 4096]]))
+        write(indents[level] + "</" + element.tag + ">")
+        write_tail(write, element, level, tail)
+
+    def __keeps_source(self):
+        """ True when datasrc or tiles are written back as they were read
+        """
+        if self.__edited:
+            return False
+        if self.__datasrc is None and not self.__xmltiles and self.__one_d_data is not None:
+            return False
+        if self._tiledmap.compressionlevel is not None and (self._tiledmap.compression or self.compression):
+            return False
+        return ((self._tiledmap.encoding is None and self._tiledmap.compression is None) or
+                (self._tiledmap.encoding == self.encoding and self._tiledmap.compression == self.compression))
+
+    def __writes_tiles(self):
+        """ True when write_xml puts the gids out as <tile> elements
+        """
+        if self.__keeps_source():
+            return self.__xmltiles
+        encoding = self._tiledmap.encoding
+        if encoding is None:
+            encoding = self.encoding
+        return encoding is None or encoding == "xml"
+
     def write_json(self):
-        if (self._tiledmap.encoding is None and self._tiledmap.compression is None) or (self._tiledmap.encoding == self.encoding and self._tiledmap.compression == self.compression):
+        if self.__keeps_source():
             dic = {}
-            if self.__datasrc is not None and self.__datasrc.strip():
-                if self.encoding is None:
-                    dic["data"] = self.__one_d_data
-                elif self.encoding == "csv":
-                    del dic["encoding"]
-                    dic["data"] = self.__one_d_data
+            datasrc = self.datasrc()
+            if datasrc is not None and datasrc.strip():
+                if self.encoding is None or self.encoding == "csv":
+                    # the dict starts empty, a csv layer is the plain array with no "encoding" key
+                    dic["data"] = self.one_d_data()
                 else:
                     dic = super(TiledData, self).write_json();
-                    dic["data"] = self.__datasrc.strip()
-            if self.__tiles is not None:
-                dic["data"] = self.__one_d_data
+                    dic["data"] = datasrc.strip()
+            if self.__xmltiles:
+                dic["data"] = self.one_d_data()
             return dic
         else:
             encoding = self._tiledmap.encoding
@@ -1130,14 +2880,18 @@ class TiledData(BaseObject):
             compression = self._tiledmap.compression
             if compression is None:
                 compression = self.compression
-            return self.__data_encode_json(self.__one_d_data, encoding, compression)
+            return self.__data_encode_json(self.one_d_data(), encoding, compression)
 
     def datasrc(self):
         """ The original data
 
         Read data from the XML
         It may be encrypted
+        Data read with TiledMap(mapped = True) is copied out of the mapping.
         """
+        if self.__datasrc is not None and not isinstance(self.__datasrc, six.string_types):
+            # a MappedText of xmlbackend.parse_mapped
+            return self.__datasrc.read()
         return self.__datasrc
 
     def one_d_data(self):
@@ -1145,7 +2899,22 @@ class TiledData(BaseObject):
 
         format datasrc to one d data
         May be datasrc = data; or encrypted datasrc to one d data
+        In lazy mode datasrc is decoded on the first call.
+        """
+        if not self.__decoded:
+            self.__decode()
+        if self.__one_d_data is None and self.__two_d_data is not None:
+            self.__one_d_data = gids_to_list(self.__two_d_data.data)
+        return self.__one_d_data
+
+    def __gids(self):
+        """ the gids for the encoders, the grid's uint32 buffer when
+        no one d list was built
         """
+        if not self.__decoded:
+            self.__decode()
+        if self.__one_d_data is None and self.__two_d_data is not None:
+            return self.__two_d_data.data
         return self.__one_d_data
 
     def two_d_data(self):
@@ -1153,58 +2922,134 @@ class TiledData(BaseObject):
 
         format datasrc to two d data
         May be datasrc = data; or encrypted datasrc to two d data
+        rtype : TiledGrid instance, use grid[y, x] or grid[y][x]
         """
+        if not self.__decoded:
+            self.__decode()
         return self.__two_d_data
 
+    def grid_changed(self):
+        """ call after writing to two_d_data() in place
+
+        one_d_data() follows the grid again and the layer is
+        encoded anew instead of writing datasrc back.
+        """
+        self.__one_d_data = None
+        self.__datasrc = None
+        self.__edited = True
+        self.__revision += 1
+
+    def revision(self):
+        """ count of the changes of the data, caches built from it compare it
+        """
+        return self.__revision
+
+    def view(self, x, y, width, height):
+        """ a rectangle of the grid sharing its buffer, no copy
+
+        Call grid_changed() after writing through the view.
+        rtype : TiledGridView instance
+        """
+        return self.__grid().view(x, y, width, height)
+
+    def get_region(self, x, y, width, height):
+        """ a compact copy of a rectangle of the grid
+
+        rtype : TiledGrid instance, region.data is its flat uint32 buffer
+        """
+        return self.__grid().get_region(x, y, width, height)
+
+    def set_region(self, x, y, region):
+        """ copy region into the layer with its top-left at (x, y)
+
+        :param region: TiledGrid, TiledGridView or a list of row lists
+        """
+        self.__grid().set_region(x, y, region)
+        self.grid_changed()
+
+    def fill(self, x, y, width, height, gid):
+        """ set every gid of a rectangle
+        """
+        self.__grid().fill(x, y, width, height, gid)
+        self.grid_changed()
+
+    def blit(self, source, x = 0, y = 0, sx = 0, sy = 0, width = None, height = None, skipgid = None):
+        """ copy a rectangle of another layer to (x, y), see TiledGrid.blit
+
+        :param source: TiledData, TiledGrid or TiledGridView instance
+        rtype : (x, y, width, height) rectangle written
+        """
+        if isinstance(source, TiledData):
+            source = source.__grid()
+        written = self.__grid().blit(source, x, y, sx, sy, width, height, skipgid)
+        if written[2] and written[3]:
+            self.grid_changed()
+        return written
+
+    def __grid(self):
+        """ the grid, an empty one of the layer's size when there is no data
+        """
+        grid = self.two_d_data()
+        if grid is None:
+            grid = self.__two_d_data = TiledGrid(self._parent.width, self._parent.height)
+        return grid
+
+    def split_data(self):
+        """ the tile gids and flip flags of the layer, see split_gids
+
+        rtype : (TiledGrid of gids without flags, bytearray of flags
+                 one per cell in row order)
+        """
+        grid = self.__grid()
+        gids, flags = split_gids(grid.data)
+        return TiledGrid(grid.width, grid.height, gids), flags
+
+    def join_data(self, gids, flags):
+        """ set the layer from tile gids and flip flags, as split_data
+        returns them; they are encoded recombined
+
+        :param gids: TiledGrid or a gid sequence in row order
+        :param flags: one flags value per cell in row order
+        """
+        if isinstance(gids, TiledGrid):
+            gids = gids.data
+        self.__two_d_data = TiledGrid(self._parent.width, self._parent.height, join_gids(gids, flags))
+        self.__decoded = True
+        self.grid_changed()
+
+    def get_flags_position(self, x, y):
+        """ flip flags of the tile at (x, y), see split_gids
+        """
+        return self.two_d_data()[y, x] >> FLAGS_SHIFT
+
     def get_tiledtile_position(self, x, y):
-        """ get tiledtile position
+        """ get tiledtile position, whatever its flip flags
         rtype : TiledTile instance
         """
-        gid = self.__two_d_data[y, x]
+        gid = self.two_d_data()[y, x]
         return self._tiledmap.get_tiledtile_by_gid(gid)
 
     def __one_d_change_two_d(self, data):
-        init = lambda: [0] * self._parent.width
-        result = tuple(array.array('H', init()) for i in range(self._parent.height))
-        for (y, x) in product(range(self._parent.height), range(self._parent.width)):
-            result[y][x] = data[y * self._parent.width + x]
-        return result
+        if data is None:
+            return None
+        return TiledGrid(self._parent.width, self._parent.height, data)
 
     def __data_decode(self, data, encoding = None, compression = None):
         """ data decode
 
-        param data : Tile instance list or string
+        param data : <tile> Element list or string
         param encoding : None or "xml" or "csv" or "base64"
-        param compression : None or "gzip" or "zlib"
+        param compression : None or a key of compressions
 
-        rtype : one_d list
+        rtype : one_d list, a uint32 array for base64
         """
         if encoding is None or encoding == "xml":
-            data = [int(i.gid) for i in data]
+            data = [int(i.get("gid", 0)) for i in data]
         elif encoding == "csv":
-            data = [int(i) for i in self.__datasrc.strip().split(",")]
+            data = csv_to_gids(data, self._parent.width * self._parent.height)
         elif encoding == "base64":
             data = base64.b64decode(data.strip().encode("latin1"))
-            if compression == "gzip":
-                # data = gzip.decompress(data)
-                with gzip.GzipFile(fileobj=six.BytesIO(data)) as f:
-                    data = f.read()
-            elif compression == "zlib":
-                data = zlib.decompress(data)
-            elif compression:
-                e = 'Compression type "{}" not supported.'.format(compression)
-                raise ValueError(e)
-
-            if six.PY2:
-                ndata = [ord(c) for c in data]
-            else:
-                ndata = [i for i in data]
-
-            data = []
-            for i in six.moves.range(0, len(ndata), 4):
-                n = (ndata[i]  + ndata[i + 1] * (2 ** 8) +
-                 ndata[i + 2] * (2 ** 16) + ndata[i + 3] * (2 ** 24))
-                data.append(n)
+            data = gids_from_bytes(decompress_data(data, compression))
         else:
             e = 'Encoding type "{}" not supported.'.format(encoding)
             raise ValueError(e)
@@ -1215,46 +3060,21 @@ class TiledData(BaseObject):
 
         param data : 1d_data
         param encoding : "xml" or "csv" or "base64"
-        param compression : None or "gzip" or "zlib"
+        param compression : None or a key of compressions
         rtype: Element instance
         """
         if encoding is None or encoding == "xml":
             element.attrib.clear()
             for item in data:
-                childelement = Element("tile")
+                childelement = etree.Element("tile")
                 childelement.set("gid", ("%s" % item))
                 element.append(childelement)
         elif encoding == "csv":
             element.attrib.clear()
             element.set("encoding", encoding)
-            context = "\n".join([",".join([
-                                            str(data[y * self._parent.width + x]) for x in range(self._parent.width)
-                                          ])
-                                 for y in range(self._parent.height)
-                               ])
-            element.text = "\n" + context + "\n"
+            element.text = "\n" + gids_to_csv(data, self._parent.width) + "\n"
         elif encoding == "base64":
-            ndata = []
-            for i in data:
-                n = [i % (2 ** 8), i // (2 ** 8), i // (2 ** 16), i // ( 2 ** 24)]
-                ndata.extend(n)
-
-            if six.PY2:
-                data = b''.join([chr(i) for i in ndata])
-            else:
-                data = b''.join([bytes((i,)) for i in ndata])
-
-            if compression == "gzip":
-                bytes_io = six.BytesIO()
-                with gzip.GzipFile(fileobj=bytes_io, mode = 'wb') as f:
-                    f.write(data)
-                    f.close()
-                data = bytes_io.getvalue()
-            elif compression == "zlib":
-                data = zlib.compress(data)
-            elif compression:
-                e = 'Compression type "{}" not supported.'.format(compression)
-                raise ValueError(e)
+            data = compress_data(gids_to_bytes(data), compression, self._tiledmap.compressionlevel)
             element.text = "\n      " + base64.b64encode(data).decode("latin1") + "\n    "
         else:
             e = 'Encoding type "{}" not supported.'.format(encoding)
@@ -1266,7 +3086,7 @@ class TiledData(BaseObject):
 
         param data : 1d_data
         param encoding : "xml" or "csv" or "base64"
-        param compression : None or "gzip" or "zlib"
+        param compression : None or a key of compressions
         rtype : dict
         """
         dict = {}
@@ -1278,27 +3098,7 @@ class TiledData(BaseObject):
             dict["encoding"] = "base64"
             if compression is not None:
                 dict["compression"] = compression
-            ndata = []
-            for i in data:
-                n = [i % (2 ** 8), i // (2 ** 8), i // (2 ** 16), i // ( 2 ** 24)]
-                ndata.extend(n)
-
-            if six.PY2:
-                data = b''.join([chr(i) for i in ndata])
-            else:
-                data = b''.join([bytes((i,)) for i in ndata])
-
-            if compression == "gzip":
-                bytes_io = six.BytesIO()
-                with gzip.GzipFile(fileobj=bytes_io, mode = 'wb') as f:
-                    f.write(data)
-                    f.close()
-                data = bytes_io.getvalue()
-            elif compression == "zlib":
-                data = zlib.compress(data)
-            elif compression:
-                e = 'Compression type "{}" not supported.'.format(compression)
-                raise ValueError(e)
+            data = compress_data(gids_to_bytes(data), compression, self._tiledmap.compressionlevel)
             dict["data"] = base64.b64encode(data).decode("latin1")
         else:
             e = 'Encoding type "{}" not supported.'.format(encoding)
@@ -1309,6 +3109,8 @@ class TiledData_Tile(BaseObject):
     """ Represents a Tile 
     <data><tile gid="0" /> ... </data>
     """
+    __slots__ = ("gid",)
+
     def __init__(self, tiledmap = None, parent = None):
         self.gid = None
         super(TiledData_Tile, self).__init__(tiledmap, parent)
@@ -1343,6 +3145,15 @@ class TiledImagelayer(BaseObject):
         self.image = self._child_attr_read_xml(node, TiledImage, self)
         return self
 
+    def read_json(self, dic):
+        super(TiledImagelayer, self).read_json(dic)
+        self._drop_json_defaults({"name": "", "x": 0, "y": 0, "width": 0,
+                                  "height": 0, "opacity": 1, "visible": True})
+        self.properties = self._child_properties_read_json(dic, self)
+        if dic.get("image"):
+            self.image = TiledImage(self._tiledmap, self).read_json(dic)
+        return self
+
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["name", "visible", "offsetx", "offsety",
@@ -1397,11 +3208,26 @@ class TiledObjectgroup(BaseObject):
         super(TiledObjectgroup, self).__init__(tiledmap, parent)
         self.properties = None
         self.objects = None
+        self.__spatialindex = None
+        self.__revision = 0
 
     def read_xml(self, node):
         super(TiledObjectgroup, self).read_xml(node)
         self.properties = self._child_attr_read_xml(node, TiledProperties, self)
         self.objects = self._child_list_attr_read_xml(node, TiledObject, self)
+        self.__spatialindex = None
+        self.__revision += 1
+        return self
+
+    def read_json(self, dic):
+        super(TiledObjectgroup, self).read_json(dic)
+        self._drop_json_defaults({"name": "", "x": 0, "y": 0, "width": 0, "height": 0,
+                                  "opacity": 1, "visible": True, "draworder": "topdown"})
+        self.properties = self._child_properties_read_json(dic, self)
+        ls = [TiledObject(self._tiledmap, self).read_json(item) for item in dic.get("objects") or []]
+        self.objects = ls or None
+        self.__spatialindex = None
+        self.__revision += 1
         return self
 
     def write_xml(self, outattrorder = None):
@@ -1412,6 +3238,13 @@ class TiledObjectgroup(BaseObject):
                             "objects"]
         return super(TiledObjectgroup, self).write_xml(outattrorder)
 
+    def write_xml_stream(self, write, level = 0, tail = None):
+        element = self.write_xml(["name", "color", "x", "y",
+                                  "width", "height", "opacity", "visible",
+                                  "offsetx", "offsety", "draworder"])
+        children = [self.properties] + (self.objects or [])
+        self._write_xml_stream_children(write, element, children, level, tail)
+
     def write_json(self):
         dic = super(TiledObjectgroup, self).write_json()
         dic["type"] = "objectgroup"
@@ -1428,6 +3261,101 @@ class TiledObjectgroup(BaseObject):
         if self.draworder is None: dic["draworder"] = "topdown"
         return dic
 
+    def spatial_index(self, cellsize = None):
+        """ index of the group's objects, built on the first call
+
+        :param cellsize: grid cell size in pixels, 4 tiles by default,
+                         a different size rebuilds the index
+        rtype : SpatialIndex instance
+        """
+        from .spatial import SpatialIndex
+        if cellsize is None:
+            cellsize = max(self._tiledmap.tilewidth or 32, self._tiledmap.tileheight or 32) * 4
+        index = self.__spatialindex
+        if index is None or index.cellsize != cellsize:
+            index = SpatialIndex(cellsize)
+            for tiledobject in self.objects or []:
+                index.add(tiledobject)
+            self.__spatialindex = index
+        return index
+
+    def invalidate_spatial_index(self):
+        """ drop the group's spatial index, rebuilt on the next spatial_index() call
+        """
+        self.__spatialindex = None
+
+    def query_rect(self, x1, y1, x2, y2):
+        """ objects whose bounds intersect the rectangle
+
+        rtype : list of TiledObject instance
+        """
+        return self.spatial_index().query_rect(x1, y1, x2, y2)
+
+    def query_point(self, x, y):
+        """ objects whose bounds contain the point
+
+        rtype : list of TiledObject instance
+        """
+        return self.spatial_index().query_point(x, y)
+
+    def nearest(self, x, y, count = 1, maxdistance = None):
+        """ the count objects closest to the point
+
+        rtype : list of (distance, TiledObject instance)
+        """
+        return self.spatial_index().nearest(x, y, count, maxdistance)
+
+    def add_object(self, tiledobject):
+        """ append an object and index it
+        """
+        tiledobject._parent = self
+        if self.objects is None:
+            self.objects = []
+        self.objects.append(tiledobject)
+        self.__revision += 1
+        for index in self.__built_indexes():
+            index.add(tiledobject)
+
+    def remove_object(self, tiledobject):
+        """ remove an object from the group and the indexes
+        """
+        self.objects.remove(tiledobject)
+        if not self.objects:
+            self.objects = None
+        self.__revision += 1
+        for index in self.__built_indexes():
+            if tiledobject in index:
+                index.remove(tiledobject)
+
+    def move_object(self, tiledobject, x = None, y = None, rotation = None):
+        """ set the position and rotation of an object and reindex it
+
+        Call it with no position after changing the size, rotation
+        or points of the object in place.
+        """
+        if x is not None:
+            tiledobject.x = x
+        if y is not None:
+            tiledobject.y = y
+        if rotation is not None:
+            tiledobject.rotation = rotation
+        self.__revision += 1
+        for index in self.__built_indexes():
+            index.move(tiledobject)
+
+    def revision(self):
+        """ count of the objects added, removed or moved through the group
+        """
+        return self.__revision
+
+    def __built_indexes(self):
+        indexes = []
+        if self.__spatialindex is not None:
+            indexes.append(self.__spatialindex)
+        if self._tiledmap is not None and self._tiledmap.built_spatial_index() is not None:
+            indexes.append(self._tiledmap.built_spatial_index())
+        return indexes
+
 class TiledObject(BaseObject):
     """ Represents a Object
     <object>
@@ -1447,6 +3375,9 @@ class TiledObject(BaseObject):
                     so only this kind of situation.)
                  image
     """
+    __slots__ = ("id", "name", "type", "x", "y", "width", "height", "rotation", "gid", "visible",
+                 "properties", "ellipse", "polygon", "polyline", "__tile", "__objecttype")
+
     def __init__(self, tiledmap, parent):
         self.id = None
         self.name = None
@@ -1473,6 +3404,26 @@ class TiledObject(BaseObject):
         self.ellipse = self._child_attr_read_xml(node, TiledEllipse, self)
         self.polygon = self._child_attr_read_xml(node, TiledPolygon, self)
         self.polyline = self._child_attr_read_xml(node, TiledPolyline, self)
+        self.__resolve_objecttype()
+        return self
+
+    def read_json(self, dic):
+        super(TiledObject, self).read_json(dic)
+        self._drop_json_defaults({"name": "", "type": "", "width": 0, "height": 0,
+                                  "rotation": 0, "visible": True})
+        self.properties = self._child_properties_read_json(dic, self)
+        if dic.get("ellipse"):
+            self.ellipse = TiledEllipse(self._tiledmap, self)
+        if dic.get("polygon") is not None:
+            self.polygon = TiledPolygon(self._tiledmap, self).read_json(dic["polygon"])
+        if dic.get("polyline") is not None:
+            self.polyline = TiledPolyline(self._tiledmap, self).read_json(dic["polyline"])
+        self.__resolve_objecttype()
+        return self
+
+    def __resolve_objecttype(self):
+        self.__tile = None
+        self.__objecttype = TiledObjectType.NONE
         if self.ellipse is not None:
             self.__objecttype = TiledObjectType.ELLIPSE
         elif self.polygon is not None:
@@ -1486,7 +3437,6 @@ class TiledObject(BaseObject):
                 self.__objecttype = TiledObjectType.TILE
         else:
             self.__objecttype = TiledObjectType.RECTANGLE
-        return self
 
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
@@ -1534,6 +3484,7 @@ class TiledEllipse(BaseObject):
     """
     def __init__(self, tiledmap = None, parent = None):
         self.properties = None
+        super(TiledEllipse, self).__init__(tiledmap, parent)
 
     def read_xml(self, node):
         super(TiledEllipse, self).read_xml(node)
@@ -1574,6 +3525,16 @@ class TiledPolygon(BaseObject):
         self.__recalculate()
         return self
 
+    def read_json(self, points):
+        """ read the list of {"x": x, "y": y} points
+        """
+        super(TiledPolygon, self).read_json({})
+        self.points = " ".join("%s,%s" % (float_to_int(point["x"]), float_to_int(point["y"]))
+                               for point in points)
+        self.__positions = read_positions(self.points)
+        self.__recalculate()
+        return self
+
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["properties", "points"]
@@ -1641,6 +3602,16 @@ class TiledPolyline(BaseObject):
         self.__recalculate()
         return self
 
+    def read_json(self, points):
+        """ read the list of {"x": x, "y": y} points
+        """
+        super(TiledPolyline, self).read_json({})
+        self.points = " ".join("%s,%s" % (float_to_int(point["x"]), float_to_int(point["y"]))
+                               for point in points)
+        self.__positions = read_positions(self.points)
+        self.__recalculate()
+        return self
+
     def write_xml(self, outattrorder = None):
         if outattrorder is None:
             outattrorder = ["properties", "points"]
@@ -1685,3 +3656,4 @@ class TiledPolyline(BaseObject):
                 if y > y2 : y2 = y
             self.__width = abs(x1 - x2)
             self.__height = abs(y1 - y2)
+
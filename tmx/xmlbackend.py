@@ -0,0 +1,346 @@
+# coding:utf-8
+
+# TMX library
+# Copyright (c) 2016 wboy <mrtop@126.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""=========================================
+Pluggable XML backends
+
+    "lxml"          : lxml.etree, when it is installed
+    "cElementTree"  : xml.etree.cElementTree
+    "ElementTree"   : the vendored tmx.ElementTree, always available
+
+The fastest available backend is used by default, see set_xml_backend.
+Parsed trees are only read, so any backend's elements will do.
+Trees written out are built with the vendored Element, which keeps
+the attribute order; the C backends write them with serialize(),
+a single pass serializer giving the same bytes as ElementTree.write.
+
+parse_mapped reads a memory-mapped file, the text of <data> elements
+is left in the mapping as a MappedText.
+========================================="""
+
+import re
+import mmap
+from collections import OrderedDict, namedtuple
+from . import ElementTree as _vendored
+
+
+__all__ = ['XmlBackend',
+           'xml_backends',
+           'get_xml_backend',
+           'set_xml_backend',
+           'serialize',
+           'write_xml_file',
+           'MappedText',
+           'parse_mapped']
+
+XmlBackend = namedtuple("XmlBackend", ["name", "parse", "iterparse", "write"])
+
+XML_DECLARATION = "<?xml version='1.0' encoding='%s'?>\n"
+
+# flush the serializer's pieces every that many pieces
+CHUNK_PIECES = 8192
+
+
+def serialize(write, elem, encoding = "utf-8"):
+    """write elem, its children and its tail like ElementTree.write(method="xml")
+
+    Elements without namespaces only, attributes are written in items() order.
+    Iterative, so deep trees don't use the stack.
+
+    :param write: file object's write
+    :param elem: Element, of any backend
+    :param encoding: output encoding
+    """
+    passthrough = encoding.lower() in ("utf-8", "utf8")
+    Comment = _vendored.Comment
+    ProcessingInstruction = _vendored.ProcessingInstruction
+
+    def encode(text):
+        if passthrough and type(text) is str:
+            return text
+        return text.encode(encoding, "xmlcharrefreplace")
+
+    def escape_cdata(text):
+        if "&" in text:
+            text = text.replace("&", "&amp;")
+        if "<" in text:
+            text = text.replace("<", "&lt;")
+        if ">" in text:
+            text = text.replace(">", "&gt;")
+        return encode(text)
+
+    attribcache = {}
+    def escape_attrib(text):
+        escaped = attribcache.get(text)
+        if escaped is None:
+            escaped = text
+            if "&" in escaped:
+                escaped = escaped.replace("&", "&amp;")
+            if "<" in escaped:
+                escaped = escaped.replace("<", "&lt;")
+            if ">" in escaped:
+                escaped = escaped.replace(">", "&gt;")
+            if "\"" in escaped:
+                escaped = escaped.replace("\"", "&quot;")
+            if "\n" in escaped:
+                escaped = escaped.replace("\n", "&#10;")
+            escaped = encode(escaped)
+            if len(text) < 32:
+                attribcache[text] = escaped
+        return escaped
+
+    pieces = []
+    append = pieces.append
+    stack = [iter((elem,))]
+    ends = []
+    while stack:
+        for e in stack[-1]:
+            tag = e.tag
+            if tag is Comment:
+                append("<!--%s-->" % encode(e.text))
+            elif tag is ProcessingInstruction:
+                append("<?%s?>" % encode(e.text))
+            else:
+                tag = encode(tag)
+                append("<" + tag)
+                for key, value in e.items():
+                    append(" %s=\"%s\"" % (encode(key), escape_attrib(value)))
+                text = e.text
+                if text or len(e):
+                    append(">")
+                    if text:
+                        append(escape_cdata(text))
+                    stack.append(iter(e))
+                    ends.append((tag, e.tail))
+                    break
+                append(" />")
+            if e.tail:
+                append(escape_cdata(e.tail))
+            if len(pieces) >= CHUNK_PIECES:
+                write("".join(pieces))
+                del pieces[:]
+        else:
+            stack.pop()
+            if ends:
+                tag, tail = ends.pop()
+                append("</" + tag + ">")
+                if tail:
+                    append(escape_cdata(tail))
+    write("".join(pieces))
+
+
+def write_xml_file(elem, file_or_filename, encoding = "utf-8", serializer = serialize):
+    """write the xml declaration and elem to a file
+
+    :param file_or_filename: file path or file object
+    :param serializer: serialize or a function with the same signature
+    """
+    if hasattr(file_or_filename, "write"):
+        file = file_or_filename
+    else:
+        file = open(file_or_filename, "wb")
+    try:
+        file.write(XML_DECLARATION % encoding)
+        serializer(file.write, elem, encoding)
+    finally:
+        if file is not file_or_filename:
+            file.close()
+
+
+def _vendored_write(elem, file_or_filename, encoding = "utf-8"):
+    _vendored.ElementTree(elem).write(file_or_filename, encoding = encoding,
+                                      xml_declaration = encoding, method = "xml")
+
+
+def _load_lxml():
+    from lxml import etree
+    def parse(source):
+        parser = etree.XMLParser(huge_tree = True, remove_comments = True)
+        return etree.parse(source, parser).getroot()
+    def iterparse(source, events = ("end",)):
+        return etree.iterparse(source, events = events, huge_tree = True, remove_comments = True)
+    return XmlBackend("lxml", parse, iterparse, write_xml_file)
+
+
+def _load_celementtree():
+    from xml.etree import cElementTree
+    def parse(source):
+        return cElementTree.parse(source).getroot()
+    return XmlBackend("cElementTree", parse, cElementTree.iterparse, write_xml_file)
+
+
+def _load_vendored():
+    def parse(source):
+        return _vendored.parse(source).getroot()
+    return XmlBackend("ElementTree", parse, _vendored.iterparse, _vendored_write)
+
+
+# backend name : loader, in order of preference
+xml_backends = OrderedDict([
+    ("lxml", _load_lxml),
+    ("cElementTree", _load_celementtree),
+    ("ElementTree", _load_vendored),
+])
+
+_backend = None
+
+
+def set_xml_backend(name = None):
+    """select the XML backend
+
+    :param name: key of xml_backends, None picks the first one available
+    :raises: ValueError on unknown name, ImportError when it is not installed
+    :rtype XmlBackend
+    """
+    global _backend
+    if name is not None:
+        if name not in xml_backends:
+            raise ValueError('XML backend "{}" not supported.'.format(name))
+        _backend = xml_backends[name]()
+        return _backend
+    for loader in xml_backends.values():
+        try:
+            _backend = loader()
+        except ImportError:
+            continue
+        return _backend
+
+
+def get_xml_backend():
+    """the XML backend in use
+
+    rtype : XmlBackend
+    """
+    if _backend is None:
+        return set_xml_backend()
+    return _backend
+
+
+class MappedText(object):
+    """ text of an element kept as offsets into a memory-mapped file
+
+    The mapping stays open as long as a MappedText refers to it.
+    """
+    __slots__ = ("mapping", "start", "end")
+
+    def __init__(self, mapping, start, end):
+        self.mapping = mapping
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def read(self):
+        """ copy the text out of the mapping
+
+        rtype : string
+        """
+        return self.mapping[self.start:self.end]
+
+    def __repr__(self):
+        return "<MappedText %d:%d>" % (self.start, self.end)
+
+
+# feed the parser this many bytes of the mapping at a time
+MAPPED_CHUNK = 1 << 20
+
+# fed to the parser instead of the text left in the mapping,
+# "-" is neither in csv nor in base64 data
+MAPPED_PLACEHOLDER = "-%d-"
+
+def _mapped_parser():
+    """a feed parser of the XML backend in use, for parse_mapped
+
+    lxml elements only take strings as text, cElementTree's parser
+    is used in their place.
+    """
+    if get_xml_backend().name != "ElementTree":
+        try:
+            from xml.etree.cElementTree import XMLParser
+            return XMLParser()
+        except ImportError:
+            pass
+    return _vendored.XMLParser()
+
+
+def parse_mapped(filepath, textnodes = ("data",)):
+    """parse a file through a read-only memory mapping
+
+    The text of textnodes elements without children is not copied,
+    it is cut out of what the parser is fed and set as a MappedText.
+    Text with entities, CDATA sections or non-ascii characters is
+    parsed the usual way. The pages of the mapping are shared by
+    every process mapping the same file.
+
+    The elements are those of the XML backend in use, except with
+    lxml: its elements can't hold a MappedText, cElementTree's are
+    returned.
+
+    :param filepath: string file's path
+    :param textnodes: tags whose text is left in the mapping
+    :rtype root Element
+    """
+    with open(filepath, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    tags = "|".join(re.escape(tag) for tag in textnodes)
+    starttag = re.compile(br"<(%s)(?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*\s*>" % tags.encode("ascii"))
+    special = re.compile(br"[&\x80-\xff]")
+
+    parser = _mapped_parser()
+    feed = parser.feed
+    def feedrange(start, end):
+        for i in range(start, end, MAPPED_CHUNK):
+            feed(mapping[i:min(i + MAPPED_CHUNK, end)])
+
+    texts = []
+    pos = 0
+    match = starttag.search(mapping)
+    while match is not None:
+        start = match.end()
+        end = mapping.find(b"<", start)
+        if end == -1:
+            break
+        closetag = b"</" + match.group(1)
+        if end > start and mapping[end:end + len(closetag) + 1] == closetag + b">" and \
+                special.search(mapping, start, end) is None:
+            feedrange(pos, start)
+            feed(MAPPED_PLACEHOLDER % len(texts))
+            texts.append(MappedText(mapping, start, end))
+            pos = end
+        match = starttag.search(mapping, end)
+    feedrange(pos, len(mapping))
+    root = parser.close()
+
+    placeholders = dict((MAPPED_PLACEHOLDER % i, text) for i, text in enumerate(texts))
+    found = 0
+    textnodes = frozenset(textnodes)
+    stack = [root]
+    while stack:
+        elem = stack.pop()
+        if elem.tag not in textnodes:
+            stack.extend(elem)
+        elif elem.text:
+            text = placeholders.pop(elem.text, None)
+            if text is not None:
+                elem.text = text
+                found += 1
+    if found != len(texts):
+        # a textnode start tag in a comment or a CDATA section
+        return get_xml_backend().parse(filepath)
+    return root